@@ -0,0 +1,113 @@
+"""
+Measures the share of JSON serialization in the handling of bookList responses.
+
+For each response size, the operation is executed against a temporary SQLite
+database and its result encoded with every installed encoder; the share is the
+encoding time over execution plus encoding time.
+
+Usage:
+    PYTHONPATH=src python benchmarks/serialization.py [sizes...]
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("WHICH_DB", "sqlite")
+os.environ.setdefault("DB_NAME", "benchmark.sqlite3")
+os.environ.setdefault("JWT_ALG", "HS256")
+
+from sqlalchemy import create_engine  # noqa: E402
+from sqlalchemy.orm import Session  # noqa: E402
+from strawberry import Schema  # noqa: E402
+
+from database.models import Author, Base, Book, LanguageChoices  # noqa: E402
+from json_encoding import ENCODERS, JSONEncoder, load_json_encoder  # noqa: E402
+from jwt_token_manager import RequesterData  # noqa: E402
+from schema.basic import Query  # noqa: E402
+
+QUERY = """
+query {
+  bookList {
+    id title publicationYear language category
+    authors { id firstName lastName }
+  }
+}
+"""
+REPEAT = 5
+
+
+def populate(session: Session, size: int) -> None:
+    author = Author(first_name="Frank", last_name="Herbert", created_by="bench")
+    session.add_all(
+        Book(
+            title=f"Book {i}",
+            publication_year=1900 + i % 120,
+            language=list(LanguageChoices)[i % 4],
+            category="novel",
+            created_by="bench",
+            authors=[author],
+        )
+        for i in range(size)
+    )
+    session.commit()
+
+
+def best_of(func) -> float:
+    timings = []
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def run(size: int, encoders) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{tmp}/benchmark.sqlite3")
+        Base.metadata.create_all(engine)
+        with Session(engine) as session:
+            populate(session, size)
+            schema = Schema(query=Query)
+            context = {
+                "db": session,
+                "requester": RequesterData(name="bench", groups={"basic"}),
+                "authentication_error": None,
+            }
+            result = None
+
+            def execute():
+                nonlocal result
+                result = asyncio.run(schema.execute(QUERY, context_value=context))
+
+            execute_time = best_of(execute)
+            response = {"data": result.data}
+            for encoder in encoders:
+                encode_time = best_of(lambda: encoder.encode(response))
+                share = encode_time / (execute_time + encode_time)
+                print(
+                    f"{size:>8} {encoder.name:>8} {len(encoder.encode(response)):>10}"
+                    f" {execute_time * 1000:>10.2f} {encode_time * 1000:>10.2f}"
+                    f" {share:>7.1%}"
+                )
+        engine.dispose()
+
+
+def main(sizes) -> None:
+    encoders = [JSONEncoder()] + [
+        encoder
+        for encoder in map(load_json_encoder, ENCODERS)
+        if type(encoder) is not JSONEncoder
+    ]
+    print(
+        f"{'books':>8} {'encoder':>8} {'bytes':>10} {'exec ms':>10}"
+        f" {'encode ms':>10} {'share':>7}"
+    )
+    for size in sizes:
+        run(size, encoders)
+
+
+if __name__ == "__main__":
+    main([int(arg) for arg in sys.argv[1:]] or [10, 100, 1000, 10000])
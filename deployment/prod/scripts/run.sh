@@ -2,4 +2,5 @@
 
 set -e
 
-fastapi run --proxy-headers --host 0.0.0.0 --port 8000
+# settings are read from gunicorn.conf.py in the working directory
+exec gunicorn
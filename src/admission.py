@@ -0,0 +1,116 @@
+import asyncio
+from typing import Dict
+
+from exceptions import ServiceOverloadedError
+from metrics import Counter, Gauge
+
+lane_waiting = Gauge(
+    "admission_lane_waiting", "Operations waiting for a slot, per admission lane."
+)
+lane_rejected = Counter(
+    "admission_lane_rejected_total", "Operations rejected, per admission lane."
+)
+
+
+class Lane:
+    """
+    A bounded number of concurrently executing operations, with a bounded queue.
+
+    Attributes:
+        name (str): The lane name, e.g. 'query:basic'.
+        capacity (int): Operations allowed to execute concurrently.
+        max_queue (int): Operations allowed to wait for a slot.
+        max_wait (float): Seconds an operation waits for a slot before rejection.
+    """
+
+    def __init__(self, name: str, capacity: int, max_queue: int, max_wait: float):
+        self.name = name
+        self.capacity = capacity
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.waiting = 0
+        self._slots = asyncio.Semaphore(capacity)
+
+    async def acquire(self) -> None:
+        """
+        Waits for an execution slot.
+
+        Raises:
+            ServiceOverloadedError: If the queue is full or no slot frees up in time.
+        """
+        if self.waiting >= self.max_queue:
+            lane_rejected.inc(lane=self.name)
+            raise ServiceOverloadedError(self.name)
+        self.waiting += 1
+        lane_waiting.set(self.waiting, lane=self.name)
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.max_wait)
+        except asyncio.TimeoutError as e:
+            lane_rejected.inc(lane=self.name)
+            raise ServiceOverloadedError(self.name) from e
+        finally:
+            self.waiting -= 1
+            lane_waiting.set(self.waiting, lane=self.name)
+
+    def release(self) -> None:
+        self._slots.release()
+
+
+def share_pool(shares: Dict[str, int], pool_size: int) -> Dict[str, int]:
+    """
+    Splits the connections of a pool between lanes, in proportion to their shares.
+
+    Args:
+        shares (Dict[str, int]): The relative share of each lane.
+        pool_size (int): The connections of the engine pool.
+
+    Returns:
+        Dict[str, int]: The capacity of each lane, at least one, adding up to at
+            most the pool size.
+
+    Raises:
+        ValueError: If the pool has fewer connections than there are lanes.
+    """
+    if pool_size < len(shares):
+        raise ValueError(
+            f"A pool of {pool_size} connections cannot serve {len(shares)} lanes, "
+            "raise DB_CONNECTION_BUDGET, or lower WEB_WORKERS or DB_POOL_HEADROOM"
+        )
+    total = sum(shares.values())
+    exact = {name: share * pool_size / total for name, share in shares.items()}
+    capacities = {name: max(1, int(value)) for name, value in exact.items()}
+    # the lanes raised to one slot take them from the largest ones
+    while sum(capacities.values()) > pool_size:
+        largest = max(capacities, key=capacities.get)
+        capacities[largest] -= 1
+    # the slots lost by rounding down go to the largest remainders
+    spare = pool_size - sum(capacities.values())
+    for name in sorted(exact, key=lambda name: capacities[name] - exact[name])[:spare]:
+        capacities[name] += 1
+    assert sum(capacities.values()) <= pool_size
+    return capacities
+
+
+class AdmissionController:
+    """
+    Routes operations to their lane by operation type and requester role.
+
+    Lanes share the DB pool between them, so that a burst of basic queries can not
+    starve admin operations or mutations, and an overload is answered right away
+    instead of piling up pool checkout timeouts.
+    """
+
+    def __init__(self, capacities: Dict[str, int], max_queue: int, max_wait_ms: int):
+        self.lanes = {
+            name: Lane(name, capacity, max_queue, max_wait_ms / 1000)
+            for name, capacity in capacities.items()
+        }
+
+    def is_idle(self) -> bool:
+        """
+        Tells whether no operation is waiting for a slot in any lane.
+        """
+        return not any(lane.waiting for lane in self.lanes.values())
+
+    def get_lane(self, operation_type: str, is_admin: bool) -> Lane:
+        return self.lanes[f"{operation_type}:{'admin' if is_admin else 'basic'}"]
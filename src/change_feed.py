@@ -0,0 +1,46 @@
+import asyncio
+from typing import AsyncIterator, Dict, List
+
+from database.db_conf import SessionLocal
+from database.outbox import get_changes_since
+from json_encoding import get_json_encoder
+
+
+def read_changes(cursor: int, limit: int, settle_ms: int) -> List[Dict]:
+    with SessionLocal() as session:
+        return [
+            {
+                "id": change.id,
+                "entity": change.entity,
+                "entityId": change.entity_id,
+                "operation": change.operation,
+                "fields": change.fields,
+                "version": change.version,
+                "changedOn": change.changed_on,
+            }
+            for change in get_changes_since(session, cursor, limit, settle_ms)
+        ]
+
+
+async def stream_changes(
+    cursor: int, page_size: int, poll_interval_ms: int, settle_ms: int
+) -> AsyncIterator[bytes]:
+    """
+    Streams the changes recorded after a cursor as JSON lines, forever.
+
+    The outbox is read page by page, each page with a short-lived session, and
+    polled every `poll_interval_ms` once caught up. A consumer resumes after a
+    disconnection from the id of the last change it received.
+    """
+    encoder = get_json_encoder()
+    while True:
+        changes = await asyncio.to_thread(read_changes, cursor, page_size, settle_ms)
+        if changes:
+            cursor = changes[-1]["id"]
+            lines = [encoder.encode(change) for change in changes]
+            yield b"".join(
+                (line.encode() if isinstance(line, str) else line) + b"\n"
+                for line in lines
+            )
+        if len(changes) < page_size:
+            await asyncio.sleep(poll_interval_ms / 1000)
@@ -1,5 +1,7 @@
 from functools import lru_cache
+from typing import Dict, List
 
+from pydantic import model_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -11,8 +13,111 @@ class Settings(BaseSettings):
     DB_USERNAME: str = ""
     DB_PASSWORD: str = ""
     DB_HOST: str = ""
-    JWT_SECRET: str
+    DB_CONNECTION_BUDGET: int = 10
+    DB_POOL_HEADROOM: int = 3
+    DB_QUERY_READ_ONLY: bool = True
+    DB_QUERY_DEFERRABLE: bool = False
+    DB_STATEMENT_TIMEOUTS_MS: Dict[str, int] = {
+        "query:basic": 2000,
+        "query:admin": 10000,
+        "mutation:basic": 5000,
+        "mutation:admin": 10000,
+    }
+    DB_LOCK_TIMEOUTS_MS: Dict[str, int] = {
+        "query:basic": 1000,
+        "query:admin": 1000,
+        "mutation:basic": 2000,
+        "mutation:admin": 5000,
+    }
+    DB_OPERATION_STATEMENT_TIMEOUTS_MS: Dict[str, int] = {}
+    DB_OPERATION_LOCK_TIMEOUTS_MS: Dict[str, int] = {}
+    ORPHAN_SWEEP_INTERVAL_SECONDS: int = 3600
+    ORPHAN_SWEEP_BATCH_SIZE: int = 1000
+    SOFT_DELETE_ENABLED: bool = True
+    PURGE_INTERVAL_SECONDS: int = 600
+    PURGE_GRACE_SECONDS: int = 86400
+    PURGE_BATCH_SIZE: int = 500
+    CHANGE_FEED_PAGE_SIZE: int = 100
+    CHANGE_FEED_POLL_INTERVAL_MS: int = 1000
+    CHANGE_FEED_SETTLE_MS: int = 1000
+    IDEMPOTENCY_KEY_TTL_SECONDS: int = 86400
+    IDEMPOTENCY_KEY_LEASE_SECONDS: int = 300
+    IDEMPOTENCY_MAX_KEY_LENGTH: int = 255
+    IDEMPOTENCY_MAX_RESPONSE_BYTES: int = 65536
+    WEB_WORKERS: int = 1
+    WEB_WORKER_MAX_REQUESTS: int = 10000
+    WEB_WORKER_MAX_REQUESTS_JITTER: int = 1000
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = 30
+    JWT_SECRET: str = ""
     JWT_ALG: str
+    JWT_JWKS_FILE: str = ""
+    JWT_JWKS_URL: str = ""
+    JWT_JWKS_REFRESH_SECONDS: int = 300
+    JWT_JWKS_MIN_REFRESH_SECONDS: int = 30
+    GRAPHQL_MAX_BATCH_OPERATIONS: int = 10
+    JSON_ENCODER: str = "auto"
+    COMPRESSION_MINIMUM_SIZE: int = 1024
+    COMPRESSION_GZIP_LEVEL: int = 6
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    SLOW_QUERY_THRESHOLD_MS: int = 500
+    SLOW_QUERY_EXPLAIN_SAMPLE_RATE: float = 0.1
+    SLOW_QUERY_EXPLAIN_TIMEOUT_MS: int = 5000
+    TRACING_EXPORTER: str = ""
+    TRACING_FILE: str = "spans.jsonl"
+    TRACING_SAMPLE_RATE: float = 0.01
+    PROFILING_ENABLED: bool = False
+    PROFILING_OUTPUT_DIR: str = ""
+    MEMORY_ACCOUNTING_SAMPLE_RATE: float = 0.0
+    METRICS_OPERATION_NAMES: List[str] = []
+    METRICS_TOKEN: str = ""
+    LOOP_WATCHDOG_ENABLED: bool = True
+    LOOP_WATCHDOG_INTERVAL_MS: int = 100
+    LOOP_BLOCK_THRESHOLD_MS: int = 250
+    ADMISSION_LANES: Dict[str, int] = {
+        "query:basic": 5,
+        "query:admin": 2,
+        "mutation:basic": 1,
+        "mutation:admin": 2,
+    }
+    ADMISSION_MAX_QUEUE: int = 100
+    COALESCING_ENABLED: bool = True
+    ADMISSION_MAX_WAIT_MS: int = 1000
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_QUOTAS: Dict[str, int] = {"basic": 300, "admin": 1200}
+    RATE_LIMIT_WINDOW_SECONDS: int = 60
+    RATE_LIMIT_BACKEND: str = ""
+    RATE_LIMIT_REDIS_URL: str = "redis://localhost:6379/0"
+
+    @model_validator(mode="after")
+    def jwt_key_must_be_configured(self):
+        if not (self.JWT_SECRET or self.JWT_JWKS_FILE or self.JWT_JWKS_URL):
+            raise ValueError(
+                "JWT_SECRET is required when neither JWT_JWKS_FILE nor JWT_JWKS_URL "
+                "is set"
+            )
+        return self
+
+    @property
+    def DB_POOL_SIZE(self) -> int:
+        """
+        Connections of the engine pool of each worker process.
+
+        The DB_CONNECTION_BUDGET is shared between the WEB_WORKERS so that the whole
+        deployment never opens more connections than the database allows for it.
+        """
+        return max(1, self.DB_CONNECTION_BUDGET // self.WEB_WORKERS)
+
+    @property
+    def DB_ADMISSION_POOL_SIZE(self) -> int:
+        """
+        Connections of the engine pool shared between the admission lanes.
+
+        DB_POOL_HEADROOM connections are kept for what takes connections without
+        going through admission: the sessions of batches, the purger, the orphan
+        sweeper, slow query EXPLAINs, change feed polling and lazy loads after a
+        session released its connection.
+        """
+        return self.DB_POOL_SIZE - self.DB_POOL_HEADROOM
 
 
 @lru_cache()
@@ -1,18 +1,35 @@
 from abc import ABC
-from typing import List, Optional
+from datetime import datetime
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
-from sqlalchemy import delete
+from sqlalchemy import (
+    Delete,
+    Row,
+    Select,
+    Update,
+    delete,
+    exists,
+    func,
+    insert,
+    select,
+    update,
+)
 from sqlalchemy.exc import NoResultFound
 from sqlalchemy.orm import Session
 from strawberry.types.nodes import SelectedField
 
+from conf import get_settings
+from database import outbox
 from database.models import Author as AuthorModel
 from database.models import BaseModel
 from database.models import Book as BookModel
-from database.query_builders import AuthorSQLQuery, BookSQLQuery
+from database.models import book_authors
+from database.query_builders import LIVE_ONLY, AuthorSQLQuery, BookSQLQuery
 from database.validators.author import Validator
-from exceptions import ObjectNotFound
+from database.validators.book import NO_AUTHOR_ERROR
+from exceptions import ObjectNotFound, VersionConflictError
 from filters.base import Filter
+from filters.ordering import AuthorOrder, BookOrder
 
 
 class BaseSQLCrud(ABC):
@@ -53,10 +70,11 @@ class BaseSQLCrud(ABC):
         session: Session,
         fields: Optional[List[SelectedField]] = None,
         q_filter: Optional[Filter] = None,
-    ) -> BaseModel:
-        query_builder = cls.QUERY_BUILDER(fields, q_filter=q_filter)
+        order_by: Optional[List[BookOrder | AuthorOrder]] = None,
+    ) -> List[BaseModel]:
+        query_builder = cls.QUERY_BUILDER(fields, q_filter=q_filter, order_by=order_by)
         query = query_builder.build()
-        return session.execute(query).unique().scalars()
+        return session.execute(query).unique().scalars().all()
 
     @classmethod
     def update_by_id(
@@ -65,18 +83,134 @@ class BaseSQLCrud(ABC):
         data: Validator,
         id_: int,
         fields: List[SelectedField],
+        *,
+        expected_version: Optional[int] = None,
     ) -> BaseModel:
-        obj = cls.get_one_by_id(session, id_, fields, with_for_update=True)
-        values = data.model_dump(exclude_unset=True)
-        for k, v in values.items():
-            setattr(obj, k, v)
+        """
+        Updates an object and increments its version in a single UPDATE statement.
+
+        No row lock is taken: when `expected_version` is given, the update only
+        applies if the object is still at that version (optimistic concurrency).
+        Relationships of the returned object, loaded lazily, skip soft-deleted
+        objects as the queries of the query builders do.
+
+        Raises:
+            ObjectNotFound: If no object has the id.
+            VersionConflictError: If the object is not at the expected version.
+        """
+        criteria = [cls.MODEL.id == id_, cls.MODEL.deleted_on.is_(None)]
+        if expected_version is not None:
+            criteria.append(cls.MODEL.version == expected_version)
+        query = (
+            update(cls.MODEL)
+            .where(*criteria)
+            .values(
+                **data.model_dump(exclude_unset=True), version=cls.MODEL.version + 1
+            )
+            .returning(cls.MODEL)
+            .options(*LIVE_ONLY)
+        )
+        obj = session.execute(query).scalar_one_or_none()
+        if obj is None:
+            current_version = session.scalar(
+                select(cls.MODEL.version).where(*criteria[:2])
+            )
+            if current_version is None:
+                raise ObjectNotFound(cls.MODEL, id_)
+            raise VersionConflictError(
+                cls.MODEL, id_, expected_version, current_version
+            )
         return obj
 
     @classmethod
-    def remove_by_id(cls, session: Session, id_: int) -> int:
-        query = delete(cls.MODEL).filter_by(id=id_)
-        rows = session.execute(query)
-        return rows.rowcount
+    def count_by_filter(cls, session: Session, q_filter: Filter) -> int:
+        """
+        Counts the objects a bulk update or removal with the filter would change.
+
+        An object is counted once even when it matches through several related
+        objects (e.g. a book through two of its authors).
+        """
+        ids = cls._get_filtered_ids(q_filter).distinct()
+        return session.scalar(select(func.count()).select_from(ids.subquery()))
+
+    @classmethod
+    def update_by_filter(
+        cls, session: Session, q_filter: Filter, data: Validator
+    ) -> List[Row]:
+        """
+        Updates all the objects matching a filter with a single UPDATE statement.
+
+        Returns:
+            List[Row]: The id and new version of each object updated.
+        """
+        ids = cls._get_filtered_ids(q_filter)
+        query = (
+            update(cls.MODEL)
+            .where(cls.MODEL.id.in_(ids))
+            .values(
+                **data.model_dump(exclude_unset=True), version=cls.MODEL.version + 1
+            )
+            .returning(cls.MODEL.id, cls.MODEL.version)
+            .execution_options(synchronize_session=False)
+        )
+        return session.execute(query).all()
+
+    @classmethod
+    def remove_by_filter(cls, session: Session, q_filter: Filter) -> List[Row]:
+        """
+        Deletes all the objects matching a filter with a single statement (see
+        `remove_by_id`).
+
+        Returns:
+            List[Row]: The id and version of each object deleted.
+        """
+        ids = cls._get_filtered_ids(q_filter)
+        query = cls._build_remove_query().where(cls.MODEL.id.in_(ids))
+        return session.execute(query).all()
+
+    @classmethod
+    def _get_filtered_ids(cls, q_filter: Filter) -> Select:
+        return cls.QUERY_BUILDER(q_filter=q_filter).build_ids().correlate(None)
+
+    @classmethod
+    def remove_by_id(cls, session: Session, id_: int) -> Optional[Row]:
+        """
+        Returns:
+            Optional[Row]: The id and version of the object deleted, None if none.
+        """
+        query = cls._build_remove_query().where(cls.MODEL.id == id_)
+        return session.execute(query).one_or_none()
+
+    @classmethod
+    def _build_remove_query(cls) -> Update | Delete:
+        """
+        Soft-deletes (see SOFT_DELETE_ENABLED) or deletes objects. Soft-deleted
+        objects are hard-deleted later, in batches, by the Purger.
+        """
+        if not get_settings().SOFT_DELETE_ENABLED:
+            query = delete(cls.MODEL)
+        else:
+            query = (
+                update(cls.MODEL)
+                .where(cls.MODEL.deleted_on.is_(None))
+                .values(deleted_on=datetime.now(), version=cls.MODEL.version + 1)
+            )
+        return query.returning(cls.MODEL.id, cls.MODEL.version).execution_options(
+            synchronize_session=False
+        )
+
+    @classmethod
+    def record_changes(
+        cls,
+        session: Session,
+        operation: str,
+        rows: Iterable[Tuple[int, int]],
+        fields: Iterable[str] = (),
+    ) -> None:
+        """
+        Writes the changes of objects to the outbox (see `outbox.record_changes`).
+        """
+        outbox.record_changes(session, cls.MODEL, operation, rows, fields)
 
     @classmethod
     def create_relation(
@@ -90,26 +224,105 @@ class BaseSQLCrud(ABC):
             for related_obj_id in related_ids
         ]
 
-    @classmethod
-    def remove_relation(
-        cls, session: Session, base_obj: BaseModel, related_ids: List[int]
-    ):
-        relation_name = cls.MODEL.__tablename__
-        existing_relations = getattr(base_obj, relation_name)
-        for id_ in related_ids:
-            try:
-                related_obj = cls.get_one_by_id(session, id_)
-                if related_obj in existing_relations:
-                    existing_relations.remove(related_obj)
-            except ObjectNotFound:
-                pass
-
 
 class AuthorSQLCrud(BaseSQLCrud):
     MODEL = AuthorModel
     QUERY_BUILDER = AuthorSQLQuery
 
 
+class AuthorChanges(NamedTuple):
+    """
+    The author links of a book to change, resolved against the database.
+
+    Attributes:
+        author_count (int): The current number of live authors of the book.
+        add (List[int]): Ids of existing authors not linked to the book yet.
+        remove (List[int]): Ids of authors currently linked to the book.
+    """
+
+    author_count: int
+    add: List[int]
+    remove: List[int]
+
+
 class BookSQLCrud(BaseSQLCrud):
     MODEL = BookModel
     QUERY_BUILDER = BookSQLQuery
+
+    @staticmethod
+    def _count_live_authors(id_: int) -> Select:
+        links = book_authors.c
+        return (
+            select(func.count())
+            .select_from(book_authors)
+            .join(AuthorModel, AuthorModel.id == links.authors_id)
+            .where(links.book_id == id_, AuthorModel.deleted_on.is_(None))
+        )
+
+    @classmethod
+    def get_author_changes(
+        cls, session: Session, id_: int, add: Iterable[int], remove: Iterable[int]
+    ) -> AuthorChanges:
+        """
+        Resolves requested author changes of a book in a single SELECT.
+
+        Ids to remove that are not linked to the book are ignored, as are ids to add
+        that already are.
+
+        Raises:
+            ObjectNotFound: If an author to add does not exist.
+        """
+        add, remove = list(dict.fromkeys(add)), list(dict.fromkeys(remove))
+        if not add and not remove:
+            return AuthorChanges(0, [], [])
+        links = book_authors.c
+        # not correlated to the authors selected below
+        author_count = cls._count_live_authors(id_).correlate(None).scalar_subquery()
+        linked = exists().where(
+            links.book_id == id_, links.authors_id == AuthorModel.id
+        )
+        rows = session.execute(
+            select(AuthorModel.id, linked, author_count).where(
+                AuthorModel.id.in_(add + remove), AuthorModel.deleted_on.is_(None)
+            )
+        ).all()
+        linked_by_id = {author_id: is_linked for author_id, is_linked, _ in rows}
+        for author_id in add:
+            if author_id not in linked_by_id:
+                raise ObjectNotFound(AuthorModel, author_id)
+        return AuthorChanges(
+            rows[0][2] if rows else 0,
+            [author_id for author_id in add if not linked_by_id[author_id]],
+            [author_id for author_id in remove if linked_by_id.get(author_id)],
+        )
+
+    @classmethod
+    def change_authors(
+        cls, session: Session, id_: int, add: List[int], remove: List[int]
+    ) -> None:
+        """
+        Adds and removes author links of a book with set-based statements.
+
+        The book must keep at least one author: this is checked again after the
+        changes, in the same transaction, against concurrent modifications.
+
+        Raises:
+            ValueError: If the book has no author left.
+        """
+        links = book_authors.c
+        if remove:
+            session.execute(
+                delete(book_authors).where(
+                    links.book_id == id_, links.authors_id.in_(remove)
+                )
+            )
+        if add:
+            session.execute(
+                insert(book_authors).values(
+                    [{"book_id": id_, "authors_id": author_id} for author_id in add]
+                )
+            )
+        if remove:
+            author_count = session.scalar(cls._count_live_authors(id_))
+            if not author_count:
+                raise ValueError(NO_AUTHOR_ERROR)
@@ -1,7 +1,15 @@
-from sqlalchemy import create_engine
+import sqlite3
+from typing import Optional
+
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker
 
 from conf import get_settings
+from database.lazy_session import LazySession
+from database.pool_metrics import instrument_pool
+from database.slow_query_log import SlowQueryLog
+from database.transactions import TransactionOptions
+from tracing import instrument_engine
 
 DB_CHOICES = {
     "sqlite": f"sqlite:///./{get_settings().DB_NAME}",
@@ -10,6 +18,43 @@ DB_CHOICES = {
 
 DATABASE_URL = DB_CHOICES[get_settings().WHICH_DB]
 
-engine = create_engine(DATABASE_URL, pool_size=10, max_overflow=0)
+
+def enable_sqlite_foreign_keys(dbapi_connection, connection_record):
+    # SQLite only enforces foreign keys, and their ON DELETE CASCADE, when asked to
+    if isinstance(dbapi_connection, sqlite3.Connection):
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA foreign_keys=ON")
+        cursor.close()
+
+
+engine = create_engine(
+    DATABASE_URL, pool_size=get_settings().DB_POOL_SIZE, max_overflow=0
+)
+event.listen(engine, "connect", enable_sqlite_foreign_keys)
+
+slow_query_log = SlowQueryLog(
+    engine,
+    threshold_ms=get_settings().SLOW_QUERY_THRESHOLD_MS,
+    explain_sample_rate=get_settings().SLOW_QUERY_EXPLAIN_SAMPLE_RATE,
+    explain_timeout_ms=get_settings().SLOW_QUERY_EXPLAIN_TIMEOUT_MS,
+)
 
 SessionLocal = sessionmaker(engine)
+
+
+def new_session(
+    operation_type: str, options: Optional[TransactionOptions] = None
+) -> LazySession:
+    """
+    Returns the lazy session of an operation of the given type, one that does not
+    expire loaded objects when it releases its connection for queries.
+    """
+    if operation_type == "query":
+        return LazySession(
+            SessionLocal, operation_type, options, expire_on_commit=False
+        )
+    return LazySession(SessionLocal, operation_type, options)
+
+
+instrument_engine(engine)
+instrument_pool(engine)
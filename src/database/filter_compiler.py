@@ -0,0 +1,105 @@
+import enum
+from datetime import date
+from typing import Any, Callable, Dict, List, Tuple
+
+import strawberry
+from sqlalchemy.orm import InstrumentedAttribute
+from sqlalchemy.sql.elements import SQLCoreOperations
+
+OPERATORS_BY_TYPE = {
+    str: ("eq", "in_", "prefix", "contains"),
+    int: ("eq", "in_", "range"),
+    date: ("eq", "in_", "range"),
+    enum.Enum: ("eq", "in_"),
+}
+
+SHORTHAND_OPERATOR_BY_TYPE = {
+    str: "contains",
+    int: "eq",
+    date: "range",
+    enum.Enum: "eq",
+}
+
+
+def get_column_kind(column: InstrumentedAttribute) -> type:
+    python_type = column.type.python_type
+    if issubclass(python_type, enum.Enum):
+        return enum.Enum
+    if python_type not in OPERATORS_BY_TYPE:
+        raise TypeError(f"Column '{column}' of type '{python_type}' is not filterable.")
+    return python_type
+
+
+class FilterCompiler:
+    """
+    Compiles filter values into SQL predicates using operators derived from column types.
+
+    The dispatch table is built once, when the compiler is instantiated (usually as a
+    query builder class attribute), so compiling a predicate is a single dict lookup.
+
+    Attributes:
+        columns (Dict[str, InstrumentedAttribute]): Filterable columns by filter name.
+        kinds (Dict[str, type]): Column kind (str, int, date or enum) by filter name.
+    """
+
+    def __init__(
+        self,
+        columns: Dict[str, InstrumentedAttribute],
+        aliases: Dict[str, Tuple[str, str]] | None = None,
+    ):
+        self.columns = columns
+        self.kinds = {name: get_column_kind(col) for name, col in columns.items()}
+        self._aliases = {
+            name: (name, SHORTHAND_OPERATOR_BY_TYPE[kind])
+            for name, kind in self.kinds.items()
+        } | (aliases or {})
+        self._dispatch = {
+            (name, op): self._make_operator(columns[name], op)
+            for name, kind in self.kinds.items()
+            for op in OPERATORS_BY_TYPE[kind]
+        }
+
+    @staticmethod
+    def _make_operator(
+        column: InstrumentedAttribute, op: str
+    ) -> Callable[[Any], SQLCoreOperations]:
+        python_type = column.type.python_type
+        coerce = python_type if issubclass(python_type, enum.Enum) else lambda v: v
+        match op:
+            case "eq":
+                return lambda value: column == coerce(value)
+            case "in_":
+                return lambda value: column.in_([coerce(v) for v in value])
+            case "prefix":
+                return lambda value: column.startswith(value, autoescape=True)
+            case "contains":
+                return lambda value: column.icontains(value, autoescape=True)
+            case "range":
+                return lambda value: column.between(value["from_"], value["to_"])
+        raise ValueError(f"Unknown filter operator '{op}'.")
+
+    def resolve_shorthand(self, name: str) -> Tuple[str, str]:
+        """
+        Returns the (column filter name, operator) pair behind a plain filter field.
+
+        Args:
+            name (str): The filter field name, e.g. 'title' or 'created_between'.
+
+        Returns:
+            Tuple[str, str]: The filter name of the column and the operator to apply.
+        """
+        return self._aliases[name]
+
+    def compile(self, name: str, op: str, value: Any) -> SQLCoreOperations:
+        return self._dispatch[(name, op)](value)
+
+    def compile_lookup(
+        self, lookup: Dict[str, Dict[str, Any]]
+    ) -> List[SQLCoreOperations]:
+        return [
+            self.compile(name, op, value)
+            for name, operators in lookup.items()
+            if operators
+            for op, value in operators.items()
+            if value is not None and value is not strawberry.UNSET
+        ]
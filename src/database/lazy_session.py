@@ -0,0 +1,82 @@
+from typing import Any, Callable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from database.transactions import TransactionOptions
+from metrics import Counter
+
+sessions_materialized = Counter(
+    "db_sessions_materialized_total",
+    "Operation sessions actually created, by operation type.",
+)
+
+
+class LazySession:
+    """
+    Stands for the DB session of an operation, created when first used.
+
+    Operations that never touch the DB (introspection, permission denied, answered
+    from another execution) thus cost neither a session nor a connection. A query
+    operation releases its connection with `release` once it has read everything.
+
+    Attributes:
+        factory (Callable[..., Session]): Creates the session.
+        operation_type (str): Label of the metrics.
+        options (Optional[TransactionOptions]): Applied to every transaction of the
+            session, including the ones begun after a `release`.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[..., Session],
+        operation_type: str,
+        options: Optional[TransactionOptions] = None,
+        **kwargs: Any,
+    ):
+        self.factory = factory
+        self.operation_type = operation_type
+        self.options = options
+        self._kwargs = kwargs
+        self._session: Optional[Session] = None
+
+    @property
+    def is_materialized(self) -> bool:
+        return self._session is not None
+
+    def __getattr__(self, name: str) -> Any:
+        if self._session is None:
+            self._session = self.factory(**self._kwargs)
+            event.listen(self._session, "after_begin", self._apply_options)
+            sessions_materialized.inc(operation_type=self.operation_type)
+        return getattr(self._session, name)
+
+    def _apply_options(self, session, transaction, connection) -> None:
+        if self.options is not None:
+            self.options.apply(connection)
+
+    def restrict(self, options: TransactionOptions) -> None:
+        """
+        Adds the options of another operation sharing the session: its transactions,
+        including the one in progress, get the strictest of all the options.
+        """
+        self.options = options if self.options is None else self.options.merge(options)
+        if self._session is not None and self._session.in_transaction():
+            self.options.apply_timeouts(self._session.connection())
+
+    def release(self) -> None:
+        """
+        Ends the transaction of the session, which returns its connection to the
+        pool. Loaded objects stay usable if the session does not expire them on
+        commit; a later use of the session checks out a connection again.
+        """
+        if self._session is not None and self._session.in_transaction():
+            self._session.commit()
+
+    def rollback(self) -> None:
+        if self._session is not None:
+            self._session.rollback()
+
+    def close(self) -> None:
+        if self._session is not None:
+            self._session.close()
@@ -1,14 +1,31 @@
 import enum
-from datetime import date
+from datetime import date, datetime
 from typing import List, Optional, TypeAlias
 
-from sqlalchemy import Column, ForeignKey, String, Table
+from sqlalchemy import JSON, Column, ForeignKey, Index, String, Table, text
 from sqlalchemy.orm import Mapped, declarative_base, mapped_column, relationship
 
 Base = declarative_base()
 
 BaseModel: TypeAlias = Base
 
+LIVE = text("deleted_on IS NULL")
+DELETED = text("deleted_on IS NOT NULL")
+
+
+def live_index(name: str, *columns: str) -> Index:
+    """
+    Index of the rows that are not soft-deleted, the only ones ever queried.
+    """
+    return Index(name, *columns, postgresql_where=LIVE, sqlite_where=LIVE)
+
+
+def deleted_index(name: str) -> Index:
+    """
+    Index of the soft-deleted rows, scanned by the purger.
+    """
+    return Index(name, "deleted_on", postgresql_where=DELETED, sqlite_where=DELETED)
+
 
 class LanguageChoices(enum.Enum):
     EN = "English"
@@ -20,18 +37,26 @@ class LanguageChoices(enum.Enum):
 book_authors = Table(
     "book_authors",
     Base.metadata,
-    Column("book_id", ForeignKey("books.id")),
-    Column("authors_id", ForeignKey("authors.id")),
+    Column("book_id", ForeignKey("books.id", ondelete="CASCADE")),
+    Column("authors_id", ForeignKey("authors.id", ondelete="CASCADE")),
+    Index("ix_book_authors_book_id_authors_id", "book_id", "authors_id"),
+    Index("ix_book_authors_authors_id", "authors_id"),
 )
 
 
 class Book(Base):
     __tablename__ = "books"
+    __table_args__ = (
+        live_index("ix_books_title_id", "title", "id"),
+        live_index("ix_books_publication_year_id", "publication_year", "id"),
+        live_index("ix_books_created_on_id", "created_on", "id"),
+        deleted_index("ix_books_deleted_on"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(120))
     authors: Mapped[List["Author"]] = relationship(
-        "Author", secondary=book_authors, back_populates="books"
+        "Author", secondary=book_authors, back_populates="books", passive_deletes=True
     )
     publication_year: Mapped[int]
     language: Mapped[LanguageChoices]
@@ -40,19 +65,63 @@ class Book(Base):
     created_on: Mapped[date] = mapped_column(insert_default=date.today)
     last_updated_by: Mapped[Optional[str]] = mapped_column(String(20))
     last_updated_on: Mapped[Optional[date]] = mapped_column(onupdate=date.today)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+    deleted_on: Mapped[Optional[datetime]] = mapped_column(default=None)
 
 
 class Author(Base):
     __tablename__ = "authors"
+    __table_args__ = (
+        live_index("ix_authors_last_name_id", "last_name", "id"),
+        live_index("ix_authors_first_name_id", "first_name", "id"),
+        live_index("ix_authors_created_on_id", "created_on", "id"),
+        deleted_index("ix_authors_deleted_on"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     first_name: Mapped[str] = mapped_column(String(120))
     middle_name: Mapped[Optional[str]] = mapped_column(String(120), default=None)
     last_name: Mapped[str] = mapped_column(String(120))
     books: Mapped[List["Book"]] = relationship(
-        "Book", secondary=book_authors, back_populates="authors"
+        "Book", secondary=book_authors, back_populates="authors", passive_deletes=True
     )
     created_by: Mapped[str] = mapped_column(String(20))
     created_on: Mapped[date] = mapped_column(insert_default=date.today)
     last_updated_by: Mapped[Optional[str]] = mapped_column(String(20))
     last_updated_on: Mapped[Optional[date]] = mapped_column(onupdate=date.today)
+    version: Mapped[int] = mapped_column(default=1, server_default="1")
+    deleted_on: Mapped[Optional[datetime]] = mapped_column(default=None)
+
+
+class Change(Base):
+    """
+    A change of a book or an author, written to this outbox table in the
+    transaction of the change itself and read by the change feed in id order.
+    """
+
+    __tablename__ = "changes"
+    # ids are the cursors of the change feed, they must never be reused
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    entity: Mapped[str] = mapped_column(String(20))
+    entity_id: Mapped[int]
+    operation: Mapped[str] = mapped_column(String(10))
+    fields: Mapped[List[str]] = mapped_column(JSON)
+    version: Mapped[int]
+    changed_on: Mapped[datetime]
+
+
+class IdempotencyKey(Base):
+    """
+    The response of a mutation sent with an idempotency key, replayed on retries.
+    """
+
+    __tablename__ = "idempotency_keys"
+    __table_args__ = (Index("ix_idempotency_keys_created_on", "created_on"),)
+
+    requester: Mapped[str] = mapped_column(String(20), primary_key=True)
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(64))
+    response: Mapped[Optional[dict]] = mapped_column(JSON)
+    created_on: Mapped[datetime]
@@ -0,0 +1,84 @@
+import asyncio
+import logging
+
+from sqlalchemy import Engine, delete, exists, or_, select
+
+from database.models import Author, Book, book_authors
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+orphan_links_deleted = Counter(
+    "orphan_book_author_links_deleted_total",
+    "book_authors rows deleted by the orphan sweeper.",
+)
+
+
+class OrphanSweeper:
+    """
+    Deletes the book_authors rows left behind by deletes that did not cascade.
+
+    Rows are deleted in batches of orphaned book (or author) ids, each batch in its
+    own short transaction, so that a large backlog never holds locks for long.
+
+    Attributes:
+        engine (Engine): The engine of the database to sweep.
+        batch_size (int): Orphaned ids deleted per transaction.
+        interval (int): Seconds between two sweeps of `run_forever`.
+    """
+
+    def __init__(self, engine: Engine, batch_size: int, interval: int):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.interval = interval
+
+    def _orphan_batches(self):
+        links = book_authors.c
+        yield links.book_id, select(links.book_id).where(
+            links.book_id.is_not(None),
+            ~exists().where(Book.id == links.book_id),
+        )
+        yield links.authors_id, select(links.authors_id).where(
+            links.authors_id.is_not(None),
+            ~exists().where(Author.id == links.authors_id),
+        )
+
+    def sweep(self) -> int:
+        """
+        Deletes all the orphaned rows, batch by batch.
+
+        Returns:
+            int: The number of rows deleted.
+        """
+        links = book_authors.c
+        deleted = 0
+        with self.engine.connect() as conn:
+            with conn.begin():
+                deleted += conn.execute(
+                    delete(book_authors).where(
+                        or_(links.book_id.is_(None), links.authors_id.is_(None))
+                    )
+                ).rowcount
+            for column, orphans in self._orphan_batches():
+                while True:
+                    with conn.begin():
+                        ids = conn.scalars(
+                            orphans.distinct().limit(self.batch_size)
+                        ).all()
+                        if not ids:
+                            break
+                        deleted += conn.execute(
+                            delete(book_authors).where(column.in_(ids))
+                        ).rowcount
+        orphan_links_deleted.inc(deleted)
+        return deleted
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                deleted = await asyncio.to_thread(self.sweep)
+                if deleted:
+                    logger.info("Deleted %s orphaned book_authors rows", deleted)
+            except Exception:
+                logger.exception("Orphan sweep failed")
+            await asyncio.sleep(self.interval)
@@ -0,0 +1,125 @@
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from sqlalchemy import DateTime, event, insert, select, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.functions import FunctionElement
+
+from database.models import BaseModel, Change
+
+CREATE = "create"
+UPDATE = "update"
+DELETE = "delete"
+
+RECORDED_CHANGES = "recorded_changes"
+
+
+class database_now(FunctionElement):
+    """
+    The current local time of the database clock, unlike CURRENT_TIMESTAMP which
+    is the start time of the transaction on PostgreSQL.
+    """
+
+    type = DateTime()
+    inherit_cache = True
+
+
+@compiles(database_now)
+def _compile_database_now(element, compiler, **kw):
+    return "LOCALTIMESTAMP"
+
+
+@compiles(database_now, "postgresql")
+def _compile_database_now_postgresql(element, compiler, **kw):
+    return "clock_timestamp()::timestamp"
+
+
+@compiles(database_now, "sqlite")
+def _compile_database_now_sqlite(element, compiler, **kw):
+    # the storage format of SQLAlchemy, with microseconds
+    return "strftime('%Y-%m-%d %H:%M:%f000', 'now', 'localtime')"
+
+
+def record_changes(
+    session: Session,
+    model: BaseModel,
+    operation: str,
+    rows: Iterable[Tuple[int, int]],
+    fields: Iterable[str] = (),
+) -> None:
+    """
+    Writes the changes of objects to the outbox, in the transaction of the session,
+    with a single INSERT statement. They are stamped again with the database clock
+    right before the transaction commits (see `stamp_recorded_changes`).
+
+    Args:
+        model (BaseModel): The model of the changed objects.
+        operation (str): CREATE, UPDATE or DELETE.
+        rows (Iterable[Tuple[int, int]]): The id and new version of each object.
+        fields (Iterable[str]): The names of the changed fields.
+    """
+    fields = sorted(fields)
+    changed_on = datetime.now()
+    values = [
+        {
+            "entity": model.__name__,
+            "entity_id": id_,
+            "operation": operation,
+            "fields": fields,
+            "version": version,
+            "changed_on": changed_on,
+        }
+        for id_, version in rows
+    ]
+    if values:
+        ids = session.scalars(insert(Change).returning(Change.id), values).all()
+        session.info.setdefault(RECORDED_CHANGES, []).extend(ids)
+
+
+@event.listens_for(Session, "before_commit")
+def stamp_recorded_changes(session: Session) -> None:
+    """
+    Stamps the changes recorded in a transaction with the time of the database
+    clock at commit, so that `get_changes_since` sees them settle only once
+    visible, however long the transaction ran after recording them.
+    """
+    ids = session.info.pop(RECORDED_CHANGES, None)
+    if ids:
+        session.execute(
+            update(Change).where(Change.id.in_(ids)).values(changed_on=database_now())
+        )
+
+
+@event.listens_for(Session, "after_rollback")
+def forget_recorded_changes(session: Session) -> None:
+    session.info.pop(RECORDED_CHANGES, None)
+
+
+def get_changes_since(
+    session: Session, cursor: int, limit: int, settle_ms: int
+) -> List[Change]:
+    """
+    Returns the changes recorded after a cursor, in the order they were recorded.
+
+    Ids are allocated when a change is written but become visible when its
+    transaction commits, so a change may become visible after a greater id. Changes
+    are stamped right before their transaction commits (see
+    `stamp_recorded_changes`) and only those stamped more than `settle_ms` ago, by
+    the database clock, are returned, for such transactions to finish committing
+    before a consumer moves its cursor past them.
+
+    Args:
+        cursor (int): The id of the last change already read, 0 to start over.
+        limit (int): The maximum number of changes to return.
+        settle_ms (int): The age, in milliseconds, of the most recent change read.
+    """
+    now = session.scalar(select(database_now()))
+    settled_on = now - timedelta(milliseconds=settle_ms)
+    query = (
+        select(Change)
+        .where(Change.id > cursor, Change.changed_on <= settled_on)
+        .order_by(Change.id)
+        .limit(limit)
+    )
+    return session.scalars(query).all()
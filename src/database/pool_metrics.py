@@ -0,0 +1,43 @@
+import time
+
+from sqlalchemy import Engine, event
+
+from metrics import Counter, Gauge, Histogram
+from operation_context import current_operation
+from utils import get_operation_label
+
+pool_checkouts = Counter(
+    "db_pool_checkouts_total", "Connections checked out of the pool, by operation."
+)
+pool_checked_out = Gauge(
+    "db_pool_checked_out_connections", "Connections currently checked out."
+)
+pool_hold_time = Histogram(
+    "db_pool_connection_hold_seconds",
+    "Time a connection stays checked out of the pool, by operation.",
+)
+
+
+def instrument_pool(engine: Engine) -> None:
+    """
+    Records the checkouts of the engine pool and how long connections are held,
+    attributed to the operation that checked them out.
+    """
+
+    @event.listens_for(engine, "checkout")
+    def record_checkout(dbapi_connection, connection_record, connection_proxy):
+        operation = get_operation_label(current_operation.get())
+        connection_record.info["checkout"] = (time.perf_counter(), operation)
+        pool_checkouts.inc(operation=operation)
+        pool_checked_out.inc()
+
+    @event.listens_for(engine, "checkin")
+    def record_checkin(dbapi_connection, connection_record):
+        checkout = connection_record.info.pop("checkout", None)
+        if checkout is None:
+            return
+        checked_out_at, operation = checkout
+        pool_hold_time.observe(
+            time.perf_counter() - checked_out_at, operation=operation
+        )
+        pool_checked_out.dec()
@@ -0,0 +1,144 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from functools import partial
+from typing import Callable, Optional
+
+from sqlalchemy import Engine, delete, select, tuple_
+
+from database.models import Author, Book, IdempotencyKey, book_authors
+from metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+purged_objects = Counter(
+    "purged_objects_total", "Soft-deleted objects hard-deleted by the purger."
+)
+purged_idempotency_keys = Counter(
+    "purged_idempotency_keys_total", "Expired idempotency keys deleted by the purger."
+)
+
+RELATION_COLUMNS = {Book: book_authors.c.book_id, Author: book_authors.c.authors_id}
+
+
+class Purger:
+    """
+    Hard-deletes soft-deleted books and authors, and their book_authors rows, and
+    deletes expired idempotency keys.
+
+    Objects are purged once soft-deleted for longer than the grace period, in small
+    batches, each in its own transaction, and only while `is_quiet` says the
+    service is not under pressure, so that the request path never waits for them.
+
+    Attributes:
+        engine (Engine): The engine of the database to purge.
+        batch_size (int): Objects deleted per transaction.
+        grace (timedelta): Time objects stay soft-deleted before being purged.
+        interval (int): Seconds between two purges of `run_forever`.
+        is_quiet (Callable[[], bool]): Checked before every batch.
+        key_ttl (Optional[timedelta]): Time idempotency keys are kept, None to keep
+            them forever.
+        purge_soft_deleted (bool): Whether to purge soft-deleted objects, False to
+            only delete expired idempotency keys.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        batch_size: int,
+        grace_seconds: int,
+        interval: int,
+        is_quiet: Callable[[], bool] = lambda: True,
+        key_ttl_seconds: Optional[int] = None,
+        purge_soft_deleted: bool = True,
+    ):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.grace = timedelta(seconds=grace_seconds)
+        self.interval = interval
+        self.is_quiet = is_quiet
+        self.key_ttl = (
+            timedelta(seconds=key_ttl_seconds) if key_ttl_seconds is not None else None
+        )
+        self.purge_soft_deleted = purge_soft_deleted
+
+    def purge_batch(self, model) -> int:
+        """
+        Hard-deletes one batch of soft-deleted objects of a model.
+
+        Returns:
+            int: The number of objects deleted, 0 when none is left.
+        """
+        cutoff = datetime.now() - self.grace
+        with self.engine.begin() as conn:
+            ids = conn.scalars(
+                select(model.id)
+                .where(model.deleted_on.is_not(None), model.deleted_on < cutoff)
+                .limit(self.batch_size)
+            ).all()
+            if not ids:
+                return 0
+            relation = RELATION_COLUMNS[model]
+            conn.execute(delete(book_authors).where(relation.in_(ids)))
+            deleted = conn.execute(delete(model).where(model.id.in_(ids))).rowcount
+        purged_objects.inc(deleted, model=model.__name__)
+        return deleted
+
+    def purge_idempotency_keys_batch(self) -> int:
+        """
+        Deletes one batch of expired idempotency keys.
+
+        Returns:
+            int: The number of keys deleted, 0 when none is left.
+        """
+        cutoff = datetime.now() - self.key_ttl
+        expired = (
+            select(IdempotencyKey.requester, IdempotencyKey.key)
+            .where(IdempotencyKey.created_on < cutoff)
+            .limit(self.batch_size)
+        )
+        with self.engine.begin() as conn:
+            keys = conn.execute(expired).all()
+            if not keys:
+                return 0
+            deleted = conn.execute(
+                delete(IdempotencyKey).where(
+                    tuple_(IdempotencyKey.requester, IdempotencyKey.key).in_(keys)
+                )
+            ).rowcount
+        purged_idempotency_keys.inc(deleted)
+        return deleted
+
+    async def purge(self) -> int:
+        """
+        Purges batch after batch, yielding to the event loop in between, until no
+        object is left or the service gets busy.
+
+        Returns:
+            int: The number of objects and keys deleted.
+        """
+        batches = []
+        if self.purge_soft_deleted:
+            batches += [partial(self.purge_batch, model) for model in (Book, Author)]
+        if self.key_ttl is not None:
+            batches.append(self.purge_idempotency_keys_batch)
+        deleted = 0
+        for purge_batch in batches:
+            while self.is_quiet():
+                batch = await asyncio.to_thread(purge_batch)
+                deleted += batch
+                if batch < self.batch_size:
+                    break
+        return deleted
+
+    async def run_forever(self) -> None:
+        while True:
+            try:
+                deleted = await self.purge()
+                if deleted:
+                    logger.info(
+                        "Purged %s soft-deleted objects and expired keys", deleted
+                    )
+            except Exception:
+                logger.exception("Purge failed")
+            await asyncio.sleep(self.interval)
@@ -1,21 +1,45 @@
-from abc import ABC, abstractmethod
-from typing import Any, Dict, List, Optional, Tuple
+from abc import ABC
+from typing import Any, Dict, List, Optional
 
 from sqlalchemy import Select, select
 from sqlalchemy.inspection import inspect
-from sqlalchemy.orm import joinedload, load_only, strategy_options
-from sqlalchemy.sql.elements import SQLCoreOperations
+from sqlalchemy.orm import (
+    InstrumentedAttribute,
+    joinedload,
+    load_only,
+    strategy_options,
+    with_loader_criteria,
+)
+from sqlalchemy.sql.elements import SQLCoreOperations, UnaryExpression
 from strawberry.types.nodes import SelectedField
 from strawberry.utils.str_converters import to_snake_case
 
+from database.filter_compiler import FilterCompiler
 from database.models import Author as AuthorModel
 from database.models import BaseModel
 from database.models import Book as BookModel
-from filters.author import Filter
+from filters.base import Filter
+from filters.ordering import AuthorOrder, BookOrder, SortDirection
+from tracing import get_tracer
+
+# soft-deleted objects are never loaded, neither as results nor as related objects
+LIVE_ONLY = [
+    with_loader_criteria(model, model.deleted_on.is_(None), include_aliases=True)
+    for model in (AuthorModel, BookModel)
+]
+
+ADMIN_DATE_ALIASES = {
+    "created_between": ("created_on", "range"),
+    "last_updated_between": ("last_updated_on", "range"),
+}
 
 
 class SQLQuery(ABC):
     MODEL = None
+    FILTERS: FilterCompiler = None
+    JOINS: Dict[str, InstrumentedAttribute] = {}
+    EXISTS_FILTERS: Dict[str, InstrumentedAttribute] = {}
+    ORDERING: Dict[str, InstrumentedAttribute] = {}
     POSSIBLE_FILTER_ARGS = ["obj_id", "q_filter"]
 
     def __new__(cls, *args, **kwargs):
@@ -32,27 +56,14 @@ class SQLQuery(ABC):
         *,
         obj_id: Optional[int] = None,
         q_filter: Optional[Filter] = None,
+        order_by: Optional[List[BookOrder | AuthorOrder]] = None,
     ):
         self.fields = fields
         self.obj_id = obj_id
         self.q_filter = q_filter
+        self.order_by = order_by or []
         self.joins = []
 
-    @property
-    @abstractmethod
-    def _get_filter_criteria(self) -> Dict:
-        pass
-
-    @property
-    @abstractmethod
-    def _get_related_fields(self) -> List:
-        pass
-
-    @property
-    @abstractmethod
-    def _get_join(self) -> Dict:
-        pass
-
     def _get_model_field_objs(
         self, model: BaseModel, fields: List[SelectedField]
     ) -> Dict[str, List[Any]]:
@@ -83,99 +94,139 @@ class SQLQuery(ABC):
             options += [joinedload(relationship_attr).load_only(*relationship_fields)]
         return options
 
-    @staticmethod
-    def _format_query_value(value: Any) -> Tuple:
-        match value:
-            case str():
-                return (f"%{value}%",)
-            case dict():
-                return value.get("from_"), value.get("to_")
-            case _:
-                return (value,)
+    def _add_join(self, filter_name: str):
+        join = self.JOINS.get(filter_name)
+        if join is not None and join not in self.joins:
+            self.joins.append(join)
 
     def _build_filter_criteria(self) -> List[SQLCoreOperations]:
         if self.obj_id:
-            return [self.MODEL.id.like(self.obj_id)]
+            return [self.MODEL.id == self.obj_id]
         if not self.q_filter:
             return []
         criterion = []
         for k, v in self.q_filter.asdict().items():
-            if k in self._get_related_fields:
-                self.joins.append(self._get_join[k.split("_")[0]])
-            criterion.append(self._get_filter_criteria[k](*self._format_query_value(v)))
+            if k == "lookup":
+                for name in v:
+                    if v[name]:
+                        self._add_join(name)
+                criterion += self.FILTERS.compile_lookup(v)
+                continue
+            if k in self.EXISTS_FILTERS:
+                related = self.EXISTS_FILTERS[k].any()
+                criterion.append(related if v else ~related)
+                continue
+            name, op = self.FILTERS.resolve_shorthand(k)
+            self._add_join(name)
+            criterion.append(self.FILTERS.compile(name, op, v))
         return criterion
 
+    def _build_order_criteria(self) -> List[UnaryExpression]:
+        criterion = []
+        # the id tiebreak follows the last key direction so that a composite
+        # (column, id) index can be scanned in either direction
+        tiebreak = self.MODEL.id.asc()
+        for order in self.order_by:
+            column = self.ORDERING[order.field.value]
+            if order.direction == SortDirection.DESC:
+                criterion.append(column.desc())
+                tiebreak = self.MODEL.id.desc()
+            else:
+                criterion.append(column.asc())
+                tiebreak = self.MODEL.id.asc()
+        return criterion + [tiebreak]
+
+    def build_ids(self) -> Select:
+        """
+        Builds the query of the ids of the objects matching the filter, to be used
+        as the subquery of set-based UPDATE and DELETE statements.
+
+        Raises:
+            ValueError: If the filter has no criterion, i.e. matches every object.
+        """
+        query = select(self.MODEL.id)
+        criterion = self._build_filter_criteria()
+        if not criterion:
+            raise ValueError("A filter matching a subset of the objects is required")
+        criterion.append(self.MODEL.deleted_on.is_(None))
+        for j in self.joins:
+            query = query.join(j)
+            criterion.append(j.property.mapper.class_.deleted_on.is_(None))
+        return query.filter(*criterion)
+
     def build(self) -> Select:
-        query = select(self.MODEL)
+        with get_tracer().start_span(
+            "SQLQuery.build", attributes={"db.model": self.MODEL.__name__}
+        ):
+            return self._build()
+
+    def _build(self) -> Select:
+        query = select(self.MODEL).options(*LIVE_ONLY)
         subquery = self._build_filter_criteria()
         for j in self.joins:
             query = query.join(j)
         if self.fields:
             options = self._build_options()
             query = query.options(*options)
-        return query.filter(*subquery)
+        query = query.filter(*subquery)
+        if self.obj_id:
+            return query
+        return query.order_by(*self._build_order_criteria())
 
 
 class AuthorSQLQuery(SQLQuery):
     MODEL = AuthorModel
-
-    @property
-    def _get_filter_criteria(self):
-        return {
-            "first_name": AuthorModel.first_name.ilike,
-            "middle_name": AuthorModel.middle_name.ilike,
-            "last_name": AuthorModel.last_name.ilike,
-            "book_title": BookModel.title.ilike,
-            "book_publication_year": BookModel.publication_year.like,
-            "created_by": AuthorModel.created_by.ilike,
-            "created_between": AuthorModel.created_on.between,
-            "last_updated_by": AuthorModel.last_updated_by.ilike,
-            "last_updated_between": AuthorModel.last_updated_on.between,
-        }
-
-    @property
-    def _get_related_fields(self):
-        return [
-            "book_title",
-            "book_publication_year",
-        ]
-
-    @property
-    def _get_join(self):
-        return {
-            "book": AuthorModel.books,
-        }
+    FILTERS = FilterCompiler(
+        {
+            "first_name": AuthorModel.first_name,
+            "middle_name": AuthorModel.middle_name,
+            "last_name": AuthorModel.last_name,
+            "book_title": BookModel.title,
+            "book_publication_year": BookModel.publication_year,
+            "created_by": AuthorModel.created_by,
+            "created_on": AuthorModel.created_on,
+            "last_updated_by": AuthorModel.last_updated_by,
+            "last_updated_on": AuthorModel.last_updated_on,
+        },
+        aliases=ADMIN_DATE_ALIASES,
+    )
+    JOINS = {
+        "book_title": AuthorModel.books,
+        "book_publication_year": AuthorModel.books,
+    }
+    EXISTS_FILTERS = {"has_books": AuthorModel.books}
+    ORDERING = {
+        "last_name": AuthorModel.last_name,
+        "first_name": AuthorModel.first_name,
+        "created_on": AuthorModel.created_on,
+    }
 
 
 class BookSQLQuery(SQLQuery):
     MODEL = BookModel
-
-    @property
-    def _get_filter_criteria(self):
-        return {
-            "title": BookModel.title.ilike,
-            "publication_year": BookModel.publication_year.like,
-            "language": BookModel.language.like,
-            "category": BookModel.category.ilike,
-            "created_by": BookModel.created_by.ilike,
-            "created_between": BookModel.created_on.between,
-            "last_updated_by": BookModel.last_updated_by.ilike,
-            "last_updated_between": BookModel.last_updated_on.between,
-            "author_first_name": AuthorModel.first_name.ilike,
-            "author_middle_name": AuthorModel.middle_name.ilike,
-            "author_last_name": AuthorModel.last_name.ilike,
-        }
-
-    @property
-    def _get_related_fields(self):
-        return [
-            "author_first_name",
-            "author_middle_name",
-            "author_last_name",
-        ]
-
-    @property
-    def _get_join(self):
-        return {
-            "author": BookModel.authors,
-        }
+    FILTERS = FilterCompiler(
+        {
+            "title": BookModel.title,
+            "publication_year": BookModel.publication_year,
+            "language": BookModel.language,
+            "category": BookModel.category,
+            "created_by": BookModel.created_by,
+            "created_on": BookModel.created_on,
+            "last_updated_by": BookModel.last_updated_by,
+            "last_updated_on": BookModel.last_updated_on,
+            "author_first_name": AuthorModel.first_name,
+            "author_middle_name": AuthorModel.middle_name,
+            "author_last_name": AuthorModel.last_name,
+        },
+        aliases=ADMIN_DATE_ALIASES,
+    )
+    JOINS = {
+        "author_first_name": BookModel.authors,
+        "author_middle_name": BookModel.authors,
+        "author_last_name": BookModel.authors,
+    }
+    ORDERING = {
+        "title": BookModel.title,
+        "publication_year": BookModel.publication_year,
+        "created_on": BookModel.created_on,
+    }
@@ -0,0 +1,191 @@
+import logging
+import random
+import re
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from sqlalchemy import Engine, event
+
+from operation_context import current_operation, current_resolver
+
+logger = logging.getLogger(__name__)
+
+SKIP_OPTION = "skip_slow_query_log"
+
+EXPLAIN_PREFIXES = {
+    "postgresql": "EXPLAIN",
+    "sqlite": "EXPLAIN QUERY PLAN",
+}
+
+ANALYZE_PREFIXES = {
+    "postgresql": "EXPLAIN (ANALYZE, BUFFERS)",
+}
+
+LOCKING_CLAUSE = re.compile(
+    r"\bFOR\s+(?:NO\s+KEY\s+UPDATE|UPDATE|KEY\s+SHARE|SHARE)\b", re.IGNORECASE
+)
+
+
+def normalize_statement(statement: str) -> str:
+    return re.sub(r"\s+", " ", statement).strip()
+
+
+def get_explain_prefix(dialect: str, statement: str) -> Optional[str]:
+    """
+    Returns how to explain a statement with a dialect.
+
+    EXPLAIN ANALYZE runs the statement again, so statements locking rows only get
+    their estimated plan.
+    """
+    analyze_prefix = ANALYZE_PREFIXES.get(dialect)
+    if analyze_prefix is None or LOCKING_CLAUSE.search(statement):
+        return EXPLAIN_PREFIXES.get(dialect)
+    return analyze_prefix
+
+
+def get_parameters_shape(parameters: Any) -> Any:
+    """
+    Describes bound parameters by type only, so that no value is ever logged.
+
+    Args:
+        parameters (Any): The DBAPI parameters (sequence, mapping or list of them).
+
+    Returns:
+        Any: The same structure with every value replaced by its type name.
+    """
+    match parameters:
+        case dict():
+            return {k: type(v).__name__ for k, v in parameters.items()}
+        case list():
+            return [get_parameters_shape(p) for p in parameters[:1]] + (
+                [f"... x{len(parameters)}"] if len(parameters) > 1 else []
+            )
+        case tuple():
+            return tuple(type(v).__name__ for v in parameters)
+        case _:
+            return type(parameters).__name__
+
+
+class SlowQueryLog:
+    """
+    Logs the statements of an engine running longer than a threshold.
+
+    Slow SELECT statements are explained on a separate connection by a single
+    background thread, for a sampled fraction of them, so that neither the request
+    path nor the pool pay for more than one EXPLAIN at a time. On PostgreSQL, they
+    are run again with EXPLAIN ANALYZE, under a statement timeout, unless they lock
+    rows (FOR UPDATE, FOR SHARE...), which only get their estimated plan.
+
+    Attributes:
+        engine (Engine): The instrumented engine.
+        threshold (float): Duration, in seconds, above which a statement is logged.
+        explain_sample_rate (float): Fraction of slow SELECT statements to explain.
+        explain_timeout_ms (int): Statement timeout of the EXPLAIN statements.
+    """
+
+    def __init__(
+        self,
+        engine: Engine,
+        threshold_ms: int,
+        explain_sample_rate: float,
+        explain_timeout_ms: int = 5000,
+    ):
+        self.engine = engine
+        self.threshold = threshold_ms / 1000
+        self.explain_sample_rate = explain_sample_rate
+        self.explain_timeout_ms = explain_timeout_ms
+        self._explain_prefix = EXPLAIN_PREFIXES.get(engine.dialect.name)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+        event.listen(engine, "handle_error", self._handle_error)
+
+    def remove(self) -> None:
+        """
+        Detaches the listeners from the engine and waits for pending EXPLAINs.
+        """
+        if event.contains(
+            self.engine, "after_cursor_execute", self._after_cursor_execute
+        ):
+            event.remove(
+                self.engine, "before_cursor_execute", self._before_cursor_execute
+            )
+            event.remove(
+                self.engine, "after_cursor_execute", self._after_cursor_execute
+            )
+            event.remove(self.engine, "handle_error", self._handle_error)
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def _before_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+    def _handle_error(self, context) -> None:
+        # failed statements never reach after_cursor_execute
+        start_times = context.connection and context.connection.info.get(
+            "query_start_time"
+        )
+        if start_times and context.execution_context is not None:
+            start_times.pop()
+
+    def _after_cursor_execute(
+        self, conn, cursor, statement, parameters, context, executemany
+    ):
+        duration = time.perf_counter() - conn.info["query_start_time"].pop()
+        if duration < self.threshold or conn.get_execution_options().get(SKIP_OPTION):
+            return
+        entry = {
+            "duration_ms": round(duration * 1000, 2),
+            "operation": current_operation.get(),
+            "resolver": current_resolver.get(),
+            "statement": normalize_statement(statement),
+            "parameters": get_parameters_shape(parameters),
+        }
+        logger.warning("Slow query: %s", entry)
+        if self._should_explain(statement, executemany):
+            self._explain(statement, parameters, entry)
+
+    def _should_explain(self, statement: str, executemany: bool) -> bool:
+        return (
+            self._explain_prefix is not None
+            and not executemany
+            and statement.lstrip().upper().startswith("SELECT")
+            and random.random() < self.explain_sample_rate
+        )
+
+    def _explain(self, statement: str, parameters: Any, entry: Dict) -> Future:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="slow-query-explain"
+            )
+        return self._executor.submit(self._run_explain, statement, parameters, entry)
+
+    def _run_explain(self, statement: str, parameters: Any, entry: Dict) -> str:
+        dialect = self.engine.dialect.name
+        prefix = get_explain_prefix(dialect, statement)
+        try:
+            with self.engine.connect() as conn:
+                conn = conn.execution_options(**{SKIP_OPTION: True})
+                if dialect == "postgresql":
+                    conn.exec_driver_sql(
+                        f"SET LOCAL statement_timeout = {int(self.explain_timeout_ms)}"
+                    )
+                rows = conn.exec_driver_sql(f"{prefix} {statement}", parameters).all()
+                # EXPLAIN ANALYZE runs the statement, never keep its side effects
+                conn.rollback()
+        except Exception:
+            logger.exception("Could not explain slow query: %s", entry["statement"])
+            return ""
+        plan = "\n".join(" ".join(str(col) for col in row) for row in rows)
+        logger.warning(
+            "Slow query plan (%s ms, %s): %s\n%s",
+            entry["duration_ms"],
+            entry["operation"],
+            entry["statement"],
+            plan,
+        )
+        return plan
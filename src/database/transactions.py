@@ -0,0 +1,113 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import Connection
+from sqlalchemy.exc import DBAPIError
+
+from conf import get_settings
+
+TIMEOUT_SQLSTATES = {"57014": "statement_timeout", "55P03": "lock_timeout"}
+
+
+@dataclass(frozen=True)
+class TransactionOptions:
+    """
+    Settings of the transactions of an operation, applied on PostgreSQL only.
+
+    Attributes:
+        read_only (bool): Rejects writes, and lets the server skip write bookkeeping.
+        deferrable (bool): With `read_only`, runs in a serializable snapshot that
+            waits to start instead of ever failing or slowing down writers.
+        statement_timeout_ms (int): Cancels statements running longer, 0 for none.
+        lock_timeout_ms (int): Cancels statements waiting longer for a lock, 0 for
+            none.
+    """
+
+    read_only: bool = False
+    deferrable: bool = False
+    statement_timeout_ms: int = 0
+    lock_timeout_ms: int = 0
+
+    def apply(self, connection: Connection) -> None:
+        """
+        Sets the options of the transaction just begun on a connection; SET LOCAL
+        ends with the transaction, so nothing leaks to the next user of the
+        pooled connection.
+        """
+        if connection.dialect.name != "postgresql":
+            return
+        if self.read_only:
+            mode = "READ ONLY"
+            if self.deferrable:
+                mode = "ISOLATION LEVEL SERIALIZABLE READ ONLY DEFERRABLE"
+            connection.exec_driver_sql(f"SET TRANSACTION {mode}")
+        self.apply_timeouts(connection)
+
+    def apply_timeouts(self, connection: Connection) -> None:
+        """
+        Sets the timeouts of the transaction in progress on a connection.
+        """
+        if connection.dialect.name != "postgresql":
+            return
+        for name, value in (
+            ("statement_timeout", self.statement_timeout_ms),
+            ("lock_timeout", self.lock_timeout_ms),
+        ):
+            if value:
+                connection.exec_driver_sql(f"SET LOCAL {name} = {int(value)}")
+
+    def merge(self, other: "TransactionOptions") -> "TransactionOptions":
+        """
+        Returns the strictest options of both, e.g. for the operations sharing the
+        session of a batch: the shortest timeouts, 0 meaning none.
+        """
+        return TransactionOptions(
+            read_only=self.read_only or other.read_only,
+            deferrable=self.deferrable and other.deferrable,
+            statement_timeout_ms=_shortest(
+                self.statement_timeout_ms, other.statement_timeout_ms
+            ),
+            lock_timeout_ms=_shortest(self.lock_timeout_ms, other.lock_timeout_ms),
+        )
+
+
+def _shortest(timeout_ms: int, other_ms: int) -> int:
+    return (
+        min(timeout_ms, other_ms) if timeout_ms and other_ms else timeout_ms or other_ms
+    )
+
+
+def get_transaction_options(
+    operation_type: str, is_admin: bool, operation_name: str
+) -> TransactionOptions:
+    """
+    Returns the transaction options of an operation from the settings.
+
+    Timeouts are looked up by operation name first, then by operation type and
+    role of the requester, e.g. 'query:basic', as the admission lanes.
+    """
+    settings = get_settings()
+    lane = f"{operation_type}:{'admin' if is_admin else 'basic'}"
+    is_query = operation_type == "query"
+    return TransactionOptions(
+        read_only=is_query and settings.DB_QUERY_READ_ONLY,
+        deferrable=is_query and settings.DB_QUERY_DEFERRABLE,
+        statement_timeout_ms=settings.DB_OPERATION_STATEMENT_TIMEOUTS_MS.get(
+            operation_name, settings.DB_STATEMENT_TIMEOUTS_MS.get(lane, 0)
+        ),
+        lock_timeout_ms=settings.DB_OPERATION_LOCK_TIMEOUTS_MS.get(
+            operation_name, settings.DB_LOCK_TIMEOUTS_MS.get(lane, 0)
+        ),
+    )
+
+
+def get_timeout(error: DBAPIError) -> Optional[str]:
+    """
+    Returns:
+        Optional[str]: 'statement_timeout' or 'lock_timeout' if the statement was
+            canceled by that timeout, None otherwise.
+    """
+    sqlstate = getattr(error.orig, "pgcode", None) or getattr(
+        error.orig, "sqlstate", None
+    )
+    return TIMEOUT_SQLSTATES.get(sqlstate)
@@ -6,6 +6,8 @@ from pydantic import Field, model_validator
 from database.models import LanguageChoices
 from database.validators.base import Validator
 
+NO_AUTHOR_ERROR = "Book must have at least one author"
+
 
 class BookCreateValidator(Validator):
     title: str
@@ -33,5 +35,12 @@ class BookUpdateValidator(Validator):
             data.author_count + len(data.add_authors) - len(data.remove_authors)
         )
         if data.remove_authors and expected_author_count <= 0:
-            raise ValueError("Book must have at least one author")
+            raise ValueError(NO_AUTHOR_ERROR)
         return data
+
+
+class BookBulkUpdateValidator(Validator):
+    publication_year: Optional[int] = None
+    language: Optional[LanguageChoices] = None
+    category: Optional[str] = None
+    last_updated_by: str
@@ -10,3 +10,4 @@ class AdminExtraFields:
     created_on: date
     last_updated_by: Optional[str]
     last_updated_on: Optional[date]
+    version: int
@@ -0,0 +1,7 @@
+import strawberry
+
+
+@strawberry.type
+class BulkOperationResult:
+    affected: int
+    dry_run: bool
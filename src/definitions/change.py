@@ -0,0 +1,21 @@
+from datetime import datetime
+from typing import List
+
+import strawberry
+
+
+@strawberry.type
+class Change:
+    id: int
+    entity: str
+    entity_id: int
+    operation: str
+    fields: List[str]
+    version: int
+    changed_on: datetime
+
+
+@strawberry.type
+class ChangePage:
+    changes: List[Change]
+    cursor: int
@@ -8,6 +8,31 @@ class ObjectNotFound(StrawberryGraphQLError):
         super().__init__(f"{model.__name__} object with id '{id_}' could not be found.")
 
 
+class VersionConflictError(StrawberryGraphQLError):
+    """
+    Exception raised when an object was modified since the version a client read.
+
+    Args:
+        model (BaseModel): The model of the object.
+        id_ (int): The id of the object.
+        expected_version (int): The version the client based its update on.
+        current_version (int): The version currently stored.
+    """
+
+    def __init__(
+        self, model: BaseModel, id_: int, expected_version: int, current_version: int
+    ):
+        super().__init__(
+            f"{model.__name__} object with id '{id_}' was modified concurrently "
+            f"(expected version {expected_version}, current {current_version}).",
+            extensions={
+                "code": "VERSION_CONFLICT",
+                "expectedVersion": expected_version,
+                "currentVersion": current_version,
+            },
+        )
+
+
 class JWTTokenInvalidError(StrawberryGraphQLError):
     """
     Exception raised when a JWT token is invalid or missing required data.
@@ -20,3 +45,81 @@ class JWTTokenInvalidError(StrawberryGraphQLError):
 
     def __init__(self, error: Exception | str):
         super().__init__(f"Token not valid: {error}")
+
+
+class ServiceOverloadedError(StrawberryGraphQLError):
+    """
+    Exception raised when an operation is not admitted because its lane is saturated.
+
+    Args:
+        lane (str): The admission lane of the operation.
+    """
+
+    def __init__(self, lane: str):
+        super().__init__(
+            f"Service is overloaded ({lane}), please retry later.",
+            extensions={"code": "SERVICE_OVERLOADED"},
+        )
+
+
+class RateLimitExceededError(StrawberryGraphQLError):
+    """
+    Exception raised when a requester has used up its operation quota.
+
+    Args:
+        retry_after (int): Seconds until the operation can be retried.
+    """
+
+    def __init__(self, retry_after: int):
+        super().__init__(
+            f"Rate limit exceeded, retry in {retry_after} seconds.",
+            extensions={"code": "RATE_LIMITED", "retryAfter": retry_after},
+        )
+
+
+class InvalidIdempotencyKeyError(StrawberryGraphQLError):
+    """
+    Exception raised when an idempotency key can not be used for an operation.
+
+    Args:
+        reason (str): Why the key is rejected.
+    """
+
+    def __init__(self, reason: str):
+        super().__init__(
+            f"Invalid idempotency key: {reason}.",
+            extensions={"code": "INVALID_IDEMPOTENCY_KEY"},
+        )
+
+
+class IdempotencyKeyInProgressError(StrawberryGraphQLError):
+    """
+    Exception raised when an operation is retried before the first attempt with the
+    same idempotency key has completed.
+
+    Args:
+        key (str): The idempotency key.
+    """
+
+    def __init__(self, key: str):
+        super().__init__(
+            f"An operation with idempotency key '{key}' is in progress.",
+            extensions={"code": "IDEMPOTENCY_KEY_IN_PROGRESS"},
+        )
+
+
+class DatabaseTimeoutError(StrawberryGraphQLError):
+    """
+    Exception raised when a statement is canceled by a timeout of its operation.
+
+    Args:
+        timeout (str): The timeout that expired, 'statement_timeout' or
+            'lock_timeout'.
+    """
+
+    def __init__(self, timeout: str):
+        super().__init__(
+            f"The operation was canceled by its {timeout}, please simplify it or "
+            "retry later.",
+            extensions={"code": timeout.upper()},
+        )
@@ -1,10 +1,528 @@
+import asyncio
+import copy
+import cProfile
+import inspect
+import logging
+import random
+
+from graphql import ExecutionResult
+from sqlalchemy.exc import DBAPIError
 from strawberry.extensions import SchemaExtension
+from strawberry.types.graphql import OperationType
+
+from admission import AdmissionController, share_pool
+from conf import get_settings
+from database.db_conf import new_session
+from database.transactions import get_timeout, get_transaction_options
+from exceptions import (
+    DatabaseTimeoutError,
+    IdempotencyKeyInProgressError,
+    InvalidIdempotencyKeyError,
+    JWTTokenInvalidError,
+    RateLimitExceededError,
+    ServiceOverloadedError,
+)
+from idempotency import IdempotencyStore, get_fingerprint, get_idempotency_key
+from jwt_token_manager import JWTToken
+from memory_accounting import AllocationTracker, allocation_count, peak_memory
+from op_profiling import PROFILE_HEADER, dump, summarize
+from operation_context import current_operation, current_resolver
+from permissions import HasAdminGroup
+from rate_limit import RateLimiter, load_backend
+from single_flight import SingleFlight, coalesced_operations, get_flight_key
+from tracing import get_tracer
+from utils import get_operation_label, get_operation_name, get_root_fields
 
-from database.db_conf import SessionLocal
+logger = logging.getLogger(__name__)
 
 
 class SQLAlchemySession(SchemaExtension):
+    """
+    Gives an operation its DB session once it has been parsed and validated.
+
+    The session is lazy (see LazySession): no connection is checked out until a
+    resolver touches the DB. Query operations of a batched request reuse the
+    session shared by the batch (`context["batch_db"]`, closed by the router); any
+    other operation gets its own.
+
+    Query sessions do not expire objects on commit and release their connection as
+    soon as no root resolver is running: root resolvers load everything the
+    selection needs, so nested fields are read from the loaded objects.
+
+    Transactions get the options of the operation (see get_transaction_options):
+    read-only for queries and statement and lock timeouts, reported as
+    STATEMENT_TIMEOUT and LOCK_TIMEOUT errors. The queries of a batch share the
+    strictest options of all of them.
+    """
+
+    def on_execute(self):
+        if self.execution_context.result is not None:
+            # answered without executing, e.g. coalesced, no session needed
+            yield
+            return
+        context = self.execution_context.context
+        shared_db = context.get("batch_db")
+        operation_type = self.execution_context.operation_type
+        self.is_query = operation_type == OperationType.QUERY
+        self.running_resolvers = 0
+        options = get_transaction_options(
+            operation_type.value,
+            HasAdminGroup.is_admin(context.get("requester")),
+            get_operation_name(self.execution_context),
+        )
+        if shared_db is not None and self.is_query:
+            shared_db.restrict(options)
+            context["db"] = shared_db
+            yield
+            return
+        context["db"] = new_session(operation_type.value, options)
+        yield
+        context["db"].close()
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+        return self._resolve_root(_next, root, info, *args, **kwargs)
+
+    async def _resolve_root(self, _next, root, info, *args, **kwargs):
+        self.running_resolvers += 1
+        try:
+            result = _next(root, info, *args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        except DBAPIError as e:
+            timeout = get_timeout(e)
+            if timeout is None:
+                raise
+            info.context["db"].rollback()
+            raise DatabaseTimeoutError(timeout) from e
+        finally:
+            self.running_resolvers -= 1
+            if self.is_query and not self.running_resolvers:
+                info.context["db"].release()
+
+
+class Idempotency(SchemaExtension):
+    """
+    Answers a mutation retried with the same idempotency key with the response of
+    its first execution, without executing it again (see IdempotencyStore).
+
+    Must be listed after SQLAlchemySession: the key is claimed in the session of
+    the mutation.
+    """
+
+    store = None
+
+    @classmethod
+    def get_store(cls) -> IdempotencyStore:
+        if cls.store is None:
+            settings = get_settings()
+            cls.store = IdempotencyStore(
+                settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+                settings.IDEMPOTENCY_KEY_LEASE_SECONDS,
+                settings.IDEMPOTENCY_MAX_KEY_LENGTH,
+                settings.IDEMPOTENCY_MAX_RESPONSE_BYTES,
+            )
+        return cls.store
+
+    def on_execute(self):
+        execution_context = self.execution_context
+        context = execution_context.context
+        requester = context.get("requester")
+        key = get_idempotency_key(execution_context)
+        if (
+            execution_context.result is not None
+            or execution_context.operation_type != OperationType.MUTATION
+            or key is None
+            or requester is None
+        ):
+            yield
+            return
+        store = self.get_store()
+        db = context["db"]
+        try:
+            result = store.claim(
+                db, requester.name, key, get_fingerprint(execution_context)
+            )
+        except (InvalidIdempotencyKeyError, IdempotencyKeyInProgressError) as e:
+            execution_context.result = ExecutionResult(data=None, errors=[e])
+            response = context.get("response")
+            if response is not None and "batch_db" not in context:
+                in_progress = isinstance(e, IdempotencyKeyInProgressError)
+                response.status_code = 409 if in_progress else 422
+            yield
+            return
+        if result is not None:
+            execution_context.result = result
+            yield
+            return
+        try:
+            yield
+        except BaseException:
+            # an uncommitted claim is released with the mutation, a committed one
+            # is answered as applied once its lease has expired
+            db.rollback()
+            raise
+        store.complete(db, requester.name, key, execution_context.result)
+
+
+class JWTAuthentication(SchemaExtension):
+    """
+    Decodes the requester token once per operation.
+
+    The decoded requester (or None when no token is sent) is stored in
+    `context["requester"]`, a decoding error in `context["authentication_error"]`,
+    so that permission classes only read the context.
+    """
+
     def on_operation(self):
-        self.execution_context.context["db"] = SessionLocal()
+        context = self.execution_context.context
+        context["requester"] = None
+        context["authentication_error"] = None
+        authentication = context["request"].headers.get("authentication")
+        if authentication:
+            try:
+                context["requester"] = JWTToken.decode(authentication.split()[-1])
+            except JWTTokenInvalidError as e:
+                context["authentication_error"] = e
+        yield
+
+
+class OperationContext(SchemaExtension):
+    """
+    Exposes the running operation name and root resolver through context variables.
+
+    Code that has no access to `info` (SQL event listeners, monitoring threads)
+    reads them to attribute its measurements to a GraphQL operation.
+    """
+
+    def on_execute(self):
+        token = current_operation.set(get_operation_name(self.execution_context))
+        yield
+        current_operation.reset(token)
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+        return self._resolve_root(_next, root, info, *args, **kwargs)
+
+    @staticmethod
+    async def _resolve_root(_next, root, info, *args, **kwargs):
+        token = current_resolver.set(f"{info.parent_type.name}.{info.field_name}")
+        try:
+            result = _next(root, info, *args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+        finally:
+            current_resolver.reset(token)
+
+
+class Tracing(SchemaExtension):
+    """
+    Opens a span for each GraphQL execution phase and each root resolver.
+    """
+
+    @property
+    def tracer(self):
+        return get_tracer()
+
+    def on_operation(self):
+        with self.tracer.start_span("graphql.operation"):
+            yield
+
+    def on_parse(self):
+        with self.tracer.start_span("graphql.parse"):
+            yield
+
+    def on_validate(self):
+        with self.tracer.start_span("graphql.validate"):
+            yield
+
+    def on_execute(self):
+        with self.tracer.start_span("graphql.execute") as span:
+            span.set_attribute(
+                "graphql.operation.name", get_operation_name(self.execution_context)
+            )
+            yield
+
+    def resolve(self, _next, root, info, *args, **kwargs):
+        if info.path.prev is not None:
+            return _next(root, info, *args, **kwargs)
+        return self._resolve_root(_next, root, info, *args, **kwargs)
+
+    async def _resolve_root(self, _next, root, info, *args, **kwargs):
+        name = f"{info.parent_type.name}.{info.field_name}"
+        with self.tracer.start_span(f"graphql.resolve {name}"):
+            result = _next(root, info, *args, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+
+class Profiling(SchemaExtension):
+    """
+    Profiles an operation when an admin requester sends the `x-profile` header.
+
+    The call-tree summary is returned in the response `extensions`; the raw profile
+    is also written to PROFILING_OUTPUT_DIR when set.
+
+    cProfile records everything run by the event loop thread, including the other
+    operations in flight, which would be attributed to the profiled one: an
+    operation is only profiled when it runs alone, otherwise the `profile`
+    extension tells that it was skipped.
+    """
+
+    in_flight = 0
+    started = 0
+
+    def on_operation(self):
+        context = self.execution_context.context
+        Profiling.in_flight += 1
+        Profiling.started += 1
+        self.started = Profiling.started
+        self.profile = None
+        self.skipped = False
+        if PROFILE_HEADER in context["request"].headers and HasAdminGroup.is_admin(
+            context.get("requester")
+        ):
+            if Profiling.in_flight > 1:
+                self.skipped = True
+            else:
+                self.profile = cProfile.Profile()
+                try:
+                    self.profile.enable()
+                except ValueError:
+                    # another profiler is already running on this thread
+                    self.profile = None
+        try:
+            yield
+        finally:
+            Profiling.in_flight -= 1
+            if self.profile is not None:
+                self.profile.disable()
+
+    def get_results(self):
+        if self.profile is not None and Profiling.started != self.started:
+            # another operation started while this one was profiled
+            self.profile.disable()
+            self.profile = None
+            self.skipped = True
+        if self.skipped:
+            return {"profile": {"skipped": "concurrent operations in flight"}}
+        if self.profile is None:
+            return {}
+        self.profile.disable()
+        summary = summarize(self.profile)
+        output_dir = get_settings().PROFILING_OUTPUT_DIR
+        if output_dir:
+            operation_name = get_operation_name(self.execution_context)
+            summary["file"] = dump(self.profile, output_dir, operation_name)
+        return {"profile": summary}
+
+
+class MemoryAccounting(SchemaExtension):
+    """
+    Records the memory used by a sampled fraction of the operations.
+
+    Peak memory and allocation count are exported as metrics per operation name and
+    logged with the root fields (and their arguments) and top allocation sites.
+    """
+
+    tracker = AllocationTracker()
+
+    def on_operation(self):
+        sample_rate = get_settings().MEMORY_ACCOUNTING_SAMPLE_RATE
+        traced = random.random() < sample_rate and self.tracker.start()
+        try:
+            yield
+        finally:
+            # always stop tracing, which is process-wide, and release the tracker
+            report = self.tracker.stop() if traced else None
+        if report is None or self.execution_context.graphql_document is None:
+            return
+        operation_name = get_operation_name(self.execution_context)
+        label = get_operation_label(operation_name)
+        peak_memory.observe(report.peak, operation=label)
+        allocation_count.observe(report.allocations, operation=label)
+        logger.info(
+            "Operation memory: %s",
+            {
+                "operation": operation_name,
+                "fields": get_root_fields(self.execution_context),
+                "peak_bytes": report.peak,
+                "allocations": report.allocations,
+                "top_sites": report.top_sites,
+            },
+        )
+
+
+class AdmissionControl(SchemaExtension):
+    """
+    Admits operations into execution through bounded lanes (see AdmissionController).
+
+    Must be listed before SQLAlchemySession so that no session is held while
+    waiting. Rejected operations are answered with a SERVICE_OVERLOADED error, and
+    with a 503 status when they are not part of a batch.
+    """
+
+    controller = None
+
+    @classmethod
+    def get_controller(cls) -> AdmissionController:
+        if cls.controller is None:
+            settings = get_settings()
+            cls.controller = AdmissionController(
+                share_pool(settings.ADMISSION_LANES, settings.DB_ADMISSION_POOL_SIZE),
+                settings.ADMISSION_MAX_QUEUE,
+                settings.ADMISSION_MAX_WAIT_MS,
+            )
+        return cls.controller
+
+    async def on_execute(self):
+        if self.execution_context.result is not None:
+            # already answered by a previous extension, e.g. rate limited
+            yield
+            return
+        context = self.execution_context.context
+        lane = self.get_controller().get_lane(
+            self.execution_context.operation_type.value,
+            HasAdminGroup.is_admin(context.get("requester")),
+        )
+        try:
+            await lane.acquire()
+        except ServiceOverloadedError as e:
+            self.execution_context.result = ExecutionResult(data=None, errors=[e])
+            response = context.get("response")
+            if response is not None and "batch_db" not in context:
+                response.status_code = 503
+                response.headers["Retry-After"] = "1"
+            yield
+            return
+        try:
+            yield
+        finally:
+            lane.release()
+
+
+class RateLimiting(SchemaExtension):
+    """
+    Charges each operation to the token bucket of its requester (see RateLimiter).
+
+    An operation costs one token per root field. The `RateLimit-*` headers of the
+    response describe the bucket; an operation over quota is answered with a
+    RATE_LIMITED error, and with a 429 status when it is not part of a batch.
+    Must be listed after JWTAuthentication and before AdmissionControl.
+    """
+
+    limiter = None
+
+    @classmethod
+    def get_limiter(cls) -> RateLimiter:
+        if cls.limiter is None:
+            settings = get_settings()
+            cls.limiter = RateLimiter(
+                load_backend(
+                    settings.RATE_LIMIT_BACKEND, settings.RATE_LIMIT_REDIS_URL
+                ),
+                settings.RATE_LIMIT_QUOTAS,
+                settings.RATE_LIMIT_WINDOW_SECONDS,
+            )
+        return cls.limiter
+
+    async def on_execute(self):
+        context = self.execution_context.context
+        requester = context.get("requester")
+        limiter = self.get_limiter()
+        cost = max(1, len(get_root_fields(self.execution_context)))
+        decision = await limiter.take(requester, cost)
+        response = context.get("response")
+        if decision is not None and response is not None:
+            response.headers["RateLimit-Policy"] = limiter.get_policy(
+                limiter.get_group(requester)
+            )
+            response.headers["RateLimit-Limit"] = str(decision.limit)
+            response.headers["RateLimit-Remaining"] = str(decision.remaining)
+            response.headers["RateLimit-Reset"] = str(decision.reset)
+        if decision is not None and not decision.allowed:
+            error = RateLimitExceededError(decision.retry_after)
+            self.execution_context.result = ExecutionResult(data=None, errors=[error])
+            if response is not None and "batch_db" not in context:
+                response.status_code = 429
+                response.headers["Retry-After"] = str(decision.retry_after)
+        yield
+
+
+class Coalescing(SchemaExtension):
+    """
+    Answers concurrent identical queries with a single execution (see SingleFlight).
+
+    Queries are identical when they have the same document, variables and role of
+    the requester, the only input of their resolvers. Must be listed before
+    AdmissionControl: operations queued for a saturated lane, the ones piling up
+    during traffic spikes, are the ones joining a flight, and they neither take a
+    lane slot nor open a session. The shared result is plain data, detached from
+    the session of the leading operation, and each waiting operation gets its own
+    copy. Only results without errors are shared: when the leading operation fails
+    (e.g. is rejected by AdmissionControl) or is cancelled, the waiting ones execute
+    on their own.
+    """
+
+    single_flight = SingleFlight()
+
+    async def on_execute(self):
+        execution_context = self.execution_context
+        context = execution_context.context
+        if (
+            execution_context.result is not None
+            or execution_context.operation_type != OperationType.QUERY
+            or context.get("authentication_error") is not None
+        ):
+            yield
+            return
+        requester = context.get("requester")
+        if requester is None:
+            role = "anonymous"
+        else:
+            role = "admin" if HasAdminGroup.is_admin(requester) else "basic"
+        key = get_flight_key(execution_context, role)
+        flight = self.single_flight.join(key)
+        if flight is not None:
+            result = await asyncio.shield(flight)
+            if result is not None:
+                coalesced_operations.inc(
+                    operation=get_operation_label(get_operation_name(execution_context))
+                )
+                execution_context.result = ExecutionResult(
+                    data=copy.deepcopy(result.data)
+                )
+            yield
+            return
+        result = None
+        try:
+            yield
+            if execution_context.result is not None and not (
+                execution_context.result.errors
+            ):
+                result = execution_context.result
+        finally:
+            self.single_flight.land(key, result)
+
+
+class HTTPCaching(SchemaExtension):
+    """
+    Sets the Cache-Control of the HTTP response from the operation type.
+
+    Query responses are private and revalidated with their ETag (see the router);
+    any mutation in the request makes the whole response `no-store`.
+    """
+
+    def on_execute(self):
+        response = self.execution_context.context.get("response")
+        if response is not None:
+            if self.execution_context.operation_type != OperationType.QUERY:
+                response.headers["Cache-Control"] = "no-store"
+            elif "Cache-Control" not in response.headers:
+                response.headers["Cache-Control"] = "private, no-cache"
         yield
-        self.execution_context.context["db"].close()
@@ -2,7 +2,32 @@ from typing import Optional
 
 import strawberry
 
+from database.query_builders import AuthorSQLQuery
 from filters.base import AdminExtraFieldsFilter, Filter
+from filters.lookups import build_lookup_input
+
+BASIC_LOOKUP_FIELDS = [
+    "first_name",
+    "middle_name",
+    "last_name",
+    "book_title",
+    "book_publication_year",
+]
+
+ADMIN_LOOKUP_FIELDS = BASIC_LOOKUP_FIELDS + [
+    "created_by",
+    "created_on",
+    "last_updated_by",
+    "last_updated_on",
+]
+
+AuthorBasicLookup = build_lookup_input(
+    "AuthorBasicLookup", AuthorSQLQuery.FILTERS, BASIC_LOOKUP_FIELDS
+)
+
+AuthorAdminLookup = build_lookup_input(
+    "AuthorAdminLookup", AuthorSQLQuery.FILTERS, ADMIN_LOOKUP_FIELDS
+)
 
 
 @strawberry.input
@@ -12,8 +37,10 @@ class AuthorBasicFilter(Filter):
     last_name: Optional[str] = strawberry.UNSET
     book_title: Optional[str] = strawberry.UNSET
     book_publication_year: Optional[int] = strawberry.UNSET
+    lookup: Optional[AuthorBasicLookup] = strawberry.UNSET
 
 
 @strawberry.input
 class AuthorAdminFilter(AuthorBasicFilter, AdminExtraFieldsFilter):
-    pass
+    has_books: Optional[bool] = strawberry.UNSET
+    lookup: Optional[AuthorAdminLookup] = strawberry.UNSET
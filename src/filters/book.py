@@ -2,7 +2,34 @@ from typing import Optional
 
 import strawberry
 
+from database.query_builders import BookSQLQuery
 from filters.base import AdminExtraFieldsFilter, Filter
+from filters.lookups import build_lookup_input
+
+BASIC_LOOKUP_FIELDS = [
+    "title",
+    "publication_year",
+    "language",
+    "category",
+    "author_first_name",
+    "author_middle_name",
+    "author_last_name",
+]
+
+ADMIN_LOOKUP_FIELDS = BASIC_LOOKUP_FIELDS + [
+    "created_by",
+    "created_on",
+    "last_updated_by",
+    "last_updated_on",
+]
+
+BookBasicLookup = build_lookup_input(
+    "BookBasicLookup", BookSQLQuery.FILTERS, BASIC_LOOKUP_FIELDS
+)
+
+BookAdminLookup = build_lookup_input(
+    "BookAdminLookup", BookSQLQuery.FILTERS, ADMIN_LOOKUP_FIELDS
+)
 
 
 @strawberry.input
@@ -12,8 +39,9 @@ class BookBasicFilter(Filter):
     author_first_name: Optional[str] = strawberry.UNSET
     author_middle_name: Optional[str] = strawberry.UNSET
     author_last_name: Optional[str] = strawberry.UNSET
+    lookup: Optional[BookBasicLookup] = strawberry.UNSET
 
 
 @strawberry.input
 class BookAdminFilter(BookBasicFilter, AdminExtraFieldsFilter):
-    pass
+    lookup: Optional[BookAdminLookup] = strawberry.UNSET
@@ -0,0 +1,69 @@
+import enum
+from datetime import date
+from typing import Dict, List, Optional
+
+import strawberry
+
+from database.filter_compiler import FilterCompiler
+from filters.base import BetweenDatesFilter
+from mixins import InputAsDictMixin
+
+
+@strawberry.input
+class BetweenIntsFilter:
+    from_: int
+    to_: int
+
+
+@strawberry.input
+class StrLookup:
+    eq: Optional[str] = strawberry.UNSET
+    in_: Optional[List[str]] = strawberry.UNSET
+    prefix: Optional[str] = strawberry.UNSET
+    contains: Optional[str] = strawberry.UNSET
+
+
+@strawberry.input
+class IntLookup:
+    eq: Optional[int] = strawberry.UNSET
+    in_: Optional[List[int]] = strawberry.UNSET
+    range: Optional[BetweenIntsFilter] = strawberry.UNSET
+
+
+@strawberry.input
+class DateLookup:
+    eq: Optional[date] = strawberry.UNSET
+    in_: Optional[List[date]] = strawberry.UNSET
+    range: Optional[BetweenDatesFilter] = strawberry.UNSET
+
+
+@strawberry.input
+class EnumLookup:
+    eq: Optional[str] = strawberry.UNSET
+    in_: Optional[List[str]] = strawberry.UNSET
+
+
+LOOKUP_BY_KIND: Dict[type, type] = {
+    str: StrLookup,
+    int: IntLookup,
+    date: DateLookup,
+    enum.Enum: EnumLookup,
+}
+
+
+def build_lookup_input(name: str, compiler: FilterCompiler, fields: List[str]) -> type:
+    """
+    Generates a Strawberry input with one typed lookup per filterable column.
+
+    Args:
+        name (str): The GraphQL name of the generated input.
+        compiler (FilterCompiler): The compiler holding the columns metadata.
+        fields (List[str]): The filter names to expose, in order.
+
+    Returns:
+        type: The generated Strawberry input class.
+    """
+    annotations = {f: Optional[LOOKUP_BY_KIND[compiler.kinds[f]]] for f in fields}
+    namespace = {f: strawberry.UNSET for f in fields}
+    namespace |= {"__annotations__": annotations, "__module__": __name__}
+    return strawberry.input(type(name, (InputAsDictMixin,), namespace))
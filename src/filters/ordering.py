@@ -0,0 +1,36 @@
+from enum import Enum
+from typing import Optional
+
+import strawberry
+
+
+@strawberry.enum
+class SortDirection(Enum):
+    ASC = "asc"
+    DESC = "desc"
+
+
+@strawberry.enum
+class BookOrderField(Enum):
+    TITLE = "title"
+    PUBLICATION_YEAR = "publication_year"
+    CREATED_ON = "created_on"
+
+
+@strawberry.enum
+class AuthorOrderField(Enum):
+    LAST_NAME = "last_name"
+    FIRST_NAME = "first_name"
+    CREATED_ON = "created_on"
+
+
+@strawberry.input
+class BookOrder:
+    field: BookOrderField
+    direction: Optional[SortDirection] = SortDirection.ASC
+
+
+@strawberry.input
+class AuthorOrder:
+    field: AuthorOrderField
+    direction: Optional[SortDirection] = SortDirection.ASC
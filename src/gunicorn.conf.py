@@ -0,0 +1,31 @@
+"""
+Gunicorn settings of the production serving profile, read from Settings.
+
+The app is imported once in the arbiter (preload) and forked into WEB_WORKERS
+uvicorn workers, each recycled after about WEB_WORKER_MAX_REQUESTS requests to cap
+memory growth. `kill -HUP` on the arbiter restarts the workers gracefully.
+"""
+
+from conf import get_settings
+
+settings = get_settings()
+
+wsgi_app = "main:app"
+worker_class = "uvicorn.workers.UvicornWorker"
+bind = "0.0.0.0:8000"
+workers = settings.WEB_WORKERS
+preload_app = True
+max_requests = settings.WEB_WORKER_MAX_REQUESTS
+max_requests_jitter = settings.WEB_WORKER_MAX_REQUESTS_JITTER
+graceful_timeout = settings.WEB_GRACEFUL_TIMEOUT_SECONDS
+# longer than the nginx upstream keepalive_timeout, so that nginx closes first
+keepalive = 75
+forwarded_allow_ips = "*"
+accesslog = "-"
+
+
+def post_fork(server, worker):
+    # connections opened by the arbiter must not be shared with the workers
+    from database.db_conf import engine
+
+    engine.dispose(close=False)
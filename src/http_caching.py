@@ -0,0 +1,90 @@
+import hashlib
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+CONTENT_CODINGS = ("br", "gzip")
+
+
+def make_etag(body: bytes) -> str:
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+
+def encode_etag(etag: str, coding: str) -> str:
+    """
+    Derives the strong ETag of a content-coded representation, e.g. '"<hash>-gzip"'.
+    """
+    return f'{etag[:-1]}-{coding}"'
+
+
+def _normalize(etag: str) -> str:
+    etag = etag.strip().removeprefix("W/")
+    for coding in CONTENT_CODINGS:
+        if etag.endswith(f'-{coding}"'):
+            return f'{etag[: -len(coding) - 2]}"'
+    return etag
+
+
+def matching_etag(if_none_match: Optional[str], etag: str) -> Optional[str]:
+    """
+    Evaluates an `If-None-Match` header against the ETag of the identity response.
+
+    Tags of content-coded representations match their identity response, since
+    the encoding is applied afterwards (see CompressionMiddleware).
+
+    Args:
+        if_none_match (Optional[str]): The request header value.
+        etag (str): The ETag of the uncompressed response.
+
+    Returns:
+        Optional[str]: The strong tag of the representation the client (or proxy)
+            already has, e.g. '"<hash>-gzip"', None when it has none.
+    """
+    if not if_none_match:
+        return None
+    if if_none_match.strip() == "*":
+        return etag
+    for tag in if_none_match.split(","):
+        if _normalize(tag) == etag:
+            return tag.strip().removeprefix("W/")
+    return None
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Tells whether an `If-None-Match` header matches the ETag of the identity
+    response (see `matching_etag`).
+    """
+    return matching_etag(if_none_match, etag) is not None
+
+
+def with_etag(request: Request, response: Response) -> Response:
+    """
+    Adds a strong ETag to a cacheable GraphQL response, or answers 304 for it.
+
+    A response is cacheable when the HTTPCaching extension allowed it, i.e. when
+    all its operations are queries and it succeeded at the HTTP level.
+    """
+    cache_control = response.headers.get("cache-control", "")
+    if (
+        response.status_code != 200
+        or not cache_control
+        or "no-store" in cache_control
+        or not isinstance(getattr(response, "body", None), bytes)
+    ):
+        return response
+    etag = make_etag(response.body)
+    response.headers["ETag"] = etag
+    matched = matching_etag(request.headers.get("if-none-match"), etag)
+    if matched is not None:
+        # 304s are not compressed, they keep the tag of the cached representation
+        return Response(
+            status_code=304,
+            headers={
+                "ETag": matched,
+                "Cache-Control": cache_control,
+                "Vary": "Accept-Encoding",
+            },
+        )
+    return response
@@ -0,0 +1,131 @@
+import gzip
+from typing import List, Optional
+
+from http_caching import CONTENT_CODINGS, encode_etag
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "application/graphql-response+json", "text/")
+
+
+def choose_coding(accept_encoding: str, available=CONTENT_CODINGS) -> Optional[str]:
+    """
+    Picks the preferred content-coding accepted by the client.
+
+    Args:
+        accept_encoding (str): The `Accept-Encoding` request header.
+        available (Sequence[str]): The supported codings, by server preference.
+
+    Returns:
+        Optional[str]: The coding to use, None for identity.
+    """
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+    candidates = [c for c in available if accepted.get(c, accepted.get("*", 0)) > 0]
+    if not candidates:
+        return None
+    return max(candidates, key=lambda c: accepted.get(c, accepted.get("*", 0)))
+
+
+class CompressionMiddleware:
+    """
+    ASGI middleware compressing responses with brotli or gzip, as negotiated.
+
+    Only complete (non-streamed) responses of a compressible type and of at least
+    `minimum_size` bytes are compressed. Brotli is used when the optional brotli
+    package is installed. Strong ETags are made specific to the coding.
+
+    Attributes:
+        minimum_size (int): Body size, in bytes, below which nothing is compressed.
+        gzip_level (int): The gzip compression level.
+        brotli_quality (int): The brotli compression quality.
+    """
+
+    def __init__(
+        self,
+        app,
+        minimum_size: int = 1024,
+        gzip_level: int = 6,
+        brotli_quality: int = 4,
+    ):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.codings = tuple(c for c in CONTENT_CODINGS if c != "br" or brotli)
+
+    def compress(self, body: bytes, coding: str) -> bytes:
+        if coding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level, mtime=0)
+
+    def _should_compress(self, headers: List, body: bytes) -> bool:
+        names = {name.lower(): value for name, value in headers}
+        content_type = names.get(b"content-type", b"").decode("latin-1")
+        return (
+            len(body) >= self.minimum_size
+            and b"content-encoding" not in names
+            and content_type.startswith(COMPRESSIBLE_TYPES)
+        )
+
+    @staticmethod
+    def _encode_headers(headers: List, coding: str, length: int) -> List:
+        encoded = [
+            (b"content-encoding", coding.encode()),
+            (b"content-length", str(length).encode()),
+            (b"vary", b"Accept-Encoding"),
+        ]
+        for name, value in headers:
+            match name.lower():
+                case b"content-length":
+                    continue
+                case b"etag" if not value.startswith(b"W/"):
+                    value = encode_etag(value.decode("latin-1"), coding).encode()
+            encoded.append((name, value))
+        return encoded
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        accept_encoding = dict(scope["headers"]).get(b"accept-encoding", b"")
+        coding = choose_coding(accept_encoding.decode("latin-1"), self.codings)
+        if coding is None:
+            return await self.app(scope, receive, send)
+        start = None
+        chunks = []
+        streaming = False
+
+        async def send_compressed(message):
+            nonlocal start, streaming
+            if streaming:
+                return await send(message)
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body"):
+                # streamed (multipart, SSE) responses are sent as they come
+                streaming = True
+                await send(start)
+                await send({**message, "body": b"".join(chunks)})
+                return
+            body = b"".join(chunks)
+            headers = list(start.get("headers", []))
+            if self._should_compress(headers, body):
+                body = self.compress(body, coding)
+                headers = self._encode_headers(headers, coding, len(body))
+            await send({**start, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
@@ -0,0 +1,210 @@
+import hashlib
+import json
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from graphql import ExecutionResult, GraphQLError
+from sqlalchemy import update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from strawberry.types import ExecutionContext
+
+from database.models import IdempotencyKey
+from exceptions import IdempotencyKeyInProgressError, InvalidIdempotencyKeyError
+from json_encoding import default
+
+IDEMPOTENCY_HEADER = "idempotency-key"
+IDEMPOTENCY_EXTENSION = "idempotencyKey"
+
+
+def get_idempotency_key(execution_context: ExecutionContext) -> Optional[str]:
+    """
+    Returns the idempotency key of an operation.
+
+    The key is read from the `idempotencyKey` entry of the request `extensions`, or
+    from the `Idempotency-Key` header unless the operation is part of a batch, where
+    the header would be shared by all the operations.
+    """
+    key = (execution_context.operation_extensions or {}).get(IDEMPOTENCY_EXTENSION)
+    context = execution_context.context
+    if key is None and "batch_db" not in context:
+        key = context["request"].headers.get(IDEMPOTENCY_HEADER)
+    return key
+
+
+def get_fingerprint(execution_context: ExecutionContext) -> str:
+    """
+    Hashes the document, operation name and variables of an operation, so that a key
+    reused for a different operation is told apart from a retry.
+    """
+    payload = json.dumps(
+        [
+            execution_context.query,
+            execution_context.operation_name,
+            execution_context.variables,
+        ],
+        sort_keys=True,
+        default=default,
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=32).hexdigest()
+
+
+def dump_result(result: ExecutionResult) -> Dict[str, Any]:
+    response = {"data": result.data}
+    if result.errors:
+        response["errors"] = [error.formatted for error in result.errors]
+    return response
+
+
+def load_result(response: Dict[str, Any]) -> ExecutionResult:
+    errors = [
+        GraphQLError(
+            error["message"], path=error.get("path"), extensions=error.get("extensions")
+        )
+        for error in response.get("errors", ())
+    ]
+    return ExecutionResult(data=response["data"], errors=errors or None)
+
+
+def applied_result(message: str, code: str) -> ExecutionResult:
+    """
+    Returns the result replayed for an operation that was applied, when its
+    response cannot be.
+    """
+    return ExecutionResult(
+        data=None,
+        errors=[
+            GraphQLError(
+                f"The operation was applied but {message}.",
+                extensions={"code": code},
+            )
+        ],
+    )
+
+
+class IdempotencyStore:
+    """
+    Stores the responses of mutations by requester and idempotency key.
+
+    A key is claimed by inserting its row in the transaction of the mutation, so
+    that it is committed with the first write of the mutation, or not at all. The
+    response is stored once the mutation has completed; until then, retries are
+    answered with IDEMPOTENCY_KEY_IN_PROGRESS. A committed claim still without
+    response after its lease was left by an execution that died after applying the
+    mutation: retries are told so instead of waiting for the key to expire.
+
+    Attributes:
+        ttl (timedelta): Time after which a key can be reused (see the Purger).
+        lease (timedelta): Time after which a claim without response is answered
+            as applied. Must exceed the duration of the slowest mutation.
+        max_key_length (int): Longest key accepted.
+        max_response_bytes (int): Largest response stored, larger ones are replaced
+            with an error telling that the mutation was applied.
+    """
+
+    def __init__(
+        self,
+        ttl_seconds: int,
+        lease_seconds: int,
+        max_key_length: int,
+        max_response_bytes: int,
+    ):
+        self.ttl = timedelta(seconds=ttl_seconds)
+        self.lease = timedelta(seconds=lease_seconds)
+        self.max_key_length = max_key_length
+        self.max_response_bytes = max_response_bytes
+
+    def claim(
+        self, session: Session, requester: str, key: str, fingerprint: str
+    ) -> Optional[ExecutionResult]:
+        """
+        Claims a key for an operation, with a single primary key lookup when the key
+        is new.
+
+        An expired key is reclaimed with a conditional update, so that only one of
+        concurrent executions reclaiming it gets it.
+
+        Returns:
+            Optional[ExecutionResult]: The stored result when the operation was
+                already executed, None when the key is claimed for this execution.
+
+        Raises:
+            InvalidIdempotencyKeyError: If the key is too long or was used for a
+                different operation.
+            IdempotencyKeyInProgressError: If the key is claimed by an execution
+                that has not completed yet.
+        """
+        if not key or len(key) > self.max_key_length:
+            raise InvalidIdempotencyKeyError(
+                f"expected 1 to {self.max_key_length} characters"
+            )
+        now = datetime.now()
+        stored = session.get(IdempotencyKey, (requester, key))
+        if stored is None:
+            session.add(
+                IdempotencyKey(
+                    requester=requester,
+                    key=key,
+                    fingerprint=fingerprint,
+                    created_on=now,
+                )
+            )
+            try:
+                session.flush()
+            except IntegrityError:
+                # claimed concurrently by another execution
+                session.rollback()
+                raise IdempotencyKeyInProgressError(key)
+            return None
+        if stored.created_on < now - self.ttl:
+            reclaimed = session.execute(
+                update(IdempotencyKey)
+                .where(
+                    IdempotencyKey.requester == requester,
+                    IdempotencyKey.key == key,
+                    IdempotencyKey.created_on < now - self.ttl,
+                )
+                .values(fingerprint=fingerprint, response=None, created_on=now)
+                .execution_options(synchronize_session=False)
+            )
+            if reclaimed.rowcount == 0:
+                # reclaimed concurrently by another execution
+                session.rollback()
+                raise IdempotencyKeyInProgressError(key)
+            return None
+        if stored.fingerprint != fingerprint:
+            raise InvalidIdempotencyKeyError("already used for another operation")
+        if stored.response is not None:
+            return load_result(stored.response)
+        if stored.created_on < now - self.lease:
+            return applied_result(
+                "its response was lost", "IDEMPOTENT_RESPONSE_UNAVAILABLE"
+            )
+        raise IdempotencyKeyInProgressError(key)
+
+    def complete(
+        self, session: Session, requester: str, key: str, result: ExecutionResult
+    ) -> None:
+        """
+        Stores the result of the execution that claimed a key.
+
+        The claim is only kept if the mutation committed: when it did not write
+        anything, the key is released so that a retry executes the mutation again.
+        """
+        session.rollback()
+        response = dump_result(result)
+        size = len(json.dumps(response, separators=(",", ":"), default=default))
+        if size > self.max_response_bytes:
+            response = dump_result(
+                applied_result(
+                    "its response is too large to be replayed",
+                    "IDEMPOTENT_RESPONSE_TOO_LARGE",
+                )
+            )
+        session.execute(
+            update(IdempotencyKey)
+            .where(IdempotencyKey.requester == requester, IdempotencyKey.key == key)
+            .values(response=response)
+            .execution_options(synchronize_session=False)
+        )
+        session.commit()
@@ -22,3 +22,10 @@ class BookUpdateInput(InputAsDictMixin):
     publication_year: Optional[int] = strawberry.UNSET
     language: Optional[str] = strawberry.UNSET
     category: Optional[str] = strawberry.UNSET
+
+
+@strawberry.input
+class BookBulkUpdateInput(InputAsDictMixin):
+    publication_year: Optional[int] = strawberry.UNSET
+    language: Optional[str] = strawberry.UNSET
+    category: Optional[str] = strawberry.UNSET
@@ -0,0 +1,90 @@
+import json
+import logging
+from datetime import date
+from enum import Enum
+from functools import lru_cache
+from typing import Any
+
+from conf import get_settings
+
+logger = logging.getLogger(__name__)
+
+
+def default(obj: Any) -> Any:
+    """
+    Encodes the non-JSON types the way the fast encoders do natively.
+    """
+    if isinstance(obj, date):
+        return obj.isoformat()
+    if isinstance(obj, Enum):
+        return obj.value
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+class JSONEncoder:
+    """
+    Encodes GraphQL responses with the standard library.
+
+    Attributes:
+        name (str): The name of the encoder, as set in JSON_ENCODER.
+    """
+
+    name = "json"
+
+    def encode(self, data: object) -> str | bytes:
+        return json.dumps(data, separators=(",", ":"), default=default)
+
+
+class OrjsonEncoder(JSONEncoder):
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._dumps = orjson.dumps
+
+    def encode(self, data: object) -> bytes:
+        return self._dumps(data, default=default)
+
+
+class MsgspecEncoder(JSONEncoder):
+    name = "msgspec"
+
+    def __init__(self):
+        import msgspec
+
+        self._encoder = msgspec.json.Encoder(enc_hook=default)
+
+    def encode(self, data: object) -> bytes:
+        return self._encoder.encode(data)
+
+
+ENCODERS = {encoder.name: encoder for encoder in (OrjsonEncoder, MsgspecEncoder)}
+
+
+def load_json_encoder(name: str) -> JSONEncoder:
+    """
+    Returns the encoder configured by name, falling back to the standard library.
+
+    Args:
+        name (str): 'orjson', 'msgspec', 'json', or 'auto' for the first fast
+            encoder installed.
+
+    Returns:
+        JSONEncoder: The encoder instance.
+    """
+    candidates = list(ENCODERS) if name == "auto" else [name]
+    for candidate in candidates:
+        if candidate not in ENCODERS:
+            continue
+        try:
+            return ENCODERS[candidate]()
+        except ImportError:
+            if name != "auto":
+                logger.warning("%s is not installed, using json instead", candidate)
+    return JSONEncoder()
+
+
+@lru_cache()
+def get_json_encoder() -> JSONEncoder:
+    return load_json_encoder(get_settings().JSON_ENCODER)
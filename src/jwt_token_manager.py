@@ -1,12 +1,19 @@
-from typing import List
+import asyncio
+import json
+import logging
+import urllib.request
+from functools import lru_cache
+from typing import Any, Dict, FrozenSet, Optional
 
 import jwt
-from jwt.exceptions import DecodeError
-from pydantic import BaseModel, ValidationError
+from jwt.exceptions import InvalidTokenError, PyJWKError
+from pydantic import BaseModel, ConfigDict, ValidationError
 
 from conf import get_settings
 from exceptions import JWTTokenInvalidError
 
+logger = logging.getLogger(__name__)
+
 
 class Token(BaseModel):
     """
@@ -23,26 +30,131 @@ class RequesterData(BaseModel):
     """
     A model representing requester data.
 
+    Instances are immutable so that the object decoded once per operation can be
+    shared safely between all the permission checks of that operation.
+
     Attributes:
         name (str): The name of the requester.
-        groups (List[str]): A list of groups the requester belongs to.
+        groups (FrozenSet[str]): The groups the requester belongs to.
     """
 
+    model_config = ConfigDict(frozen=True)
+
     name: str
-    groups: List[str]
+    groups: FrozenSet[str]
+
+
+class JWKSCache:
+    """
+    An in-memory cache of the public keys of a JWKS document, indexed by `kid`.
+
+    Keys are looked up without any I/O; the document is (re)loaded at startup and by
+    a background task, which is woken up early when an unknown `kid` shows up, so
+    that a key rotation on the identity provider side is picked up quickly. Two
+    refreshes are at least `min_refresh_interval` apart, so that tokens with made-up
+    `kid`s cannot make the identity provider be polled continuously: they keep
+    being rejected meanwhile.
+
+    Attributes:
+        source (str): Path or URL of the JWKS document.
+        refresh_interval (int): Seconds between two background refreshes.
+        min_refresh_interval (int): Minimum seconds between two refreshes.
+    """
+
+    def __init__(self, source: str, refresh_interval: int, min_refresh_interval: int):
+        self.source = source
+        self.refresh_interval = refresh_interval
+        self.min_refresh_interval = min_refresh_interval
+        self._keys: Dict[str, Any] = {}
+        self._refresh_requested = asyncio.Event()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def _read(self) -> Dict:
+        if self.source.startswith(("http://", "https://")):
+            with urllib.request.urlopen(self.source, timeout=10) as response:
+                return json.load(response)
+        with open(self.source) as f:
+            return json.load(f)
+
+    def load(self) -> None:
+        """
+        Reads the JWKS document and atomically replaces the cached keys.
+
+        Raises:
+            PyJWKError: If the document does not contain any usable key.
+        """
+        key_set = jwt.PyJWKSet.from_dict(self._read())
+        self._keys = {key.key_id: key.key for key in key_set.keys}
+
+    def get_key(self, kid: Optional[str]) -> Any:
+        """
+        Returns the cached key with the given id.
+
+        Args:
+            kid (Optional[str]): The key id found in the token header.
+
+        Returns:
+            Any: The public key to verify the token signature with.
+
+        Raises:
+            JWTTokenInvalidError: If no cached key matches the id.
+        """
+        try:
+            return self._keys[kid]
+        except KeyError:
+            # tokens are also decoded in the threadpool, e.g. by the /changes endpoint
+            if self._loop is not None:
+                self._loop.call_soon_threadsafe(self._refresh_requested.set)
+            else:
+                self._refresh_requested.set()
+            raise JWTTokenInvalidError(f"Unknown signing key '{kid}'")
+
+    async def refresh_forever(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        while True:
+            try:
+                await asyncio.wait_for(
+                    self._refresh_requested.wait(), timeout=self.refresh_interval
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._refresh_requested.clear()
+            try:
+                await asyncio.to_thread(self.load)
+            except (OSError, ValueError, PyJWKError):
+                logger.exception("Could not refresh JWKS from '%s'", self.source)
+            # refreshes requested meanwhile are served by a single one afterwards
+            await asyncio.sleep(self.min_refresh_interval)
+
+
+@lru_cache()
+def get_key_set() -> Optional[JWKSCache]:
+    settings = get_settings()
+    source = settings.JWT_JWKS_FILE or settings.JWT_JWKS_URL
+    if not source:
+        return None
+    return JWKSCache(
+        source,
+        settings.JWT_JWKS_REFRESH_SECONDS,
+        settings.JWT_JWKS_MIN_REFRESH_SECONDS,
+    )
 
 
 class JWTToken:
     """
     A class for handling JWT token operations.
 
-    Attributes:
-        _SECRET (str): (class) The secret key used for encoding and decoding JWT tokens.
-        _ALGORITHM (str): (class) The algorithm used for encoding and decoding JWT tokens.
+    Tokens are verified with the key of the configured JWKS document matching their
+    `kid` header when one is configured (asymmetric algorithms such as RS256 or
+    ES256), and with `JWT_SECRET` otherwise.
     """
 
-    _SECRET = get_settings().JWT_SECRET
-    _ALGORITHM = get_settings().JWT_ALG
+    @staticmethod
+    def _get_key(token: str) -> Any:
+        key_set = get_key_set()
+        if key_set is None:
+            return get_settings().JWT_SECRET
+        return key_set.get_key(jwt.get_unverified_header(token).get("kid"))
 
     @classmethod
     def decode(cls, token: str) -> RequesterData:
@@ -59,10 +171,12 @@ class JWTToken:
             JWTTokenInvalidException: If the token is invalid or cannot be decoded.
         """
         try:
-            return RequesterData(**jwt.decode(token, cls._SECRET, [cls._ALGORITHM]))
+            key = cls._get_key(token)
+            algorithms = [get_settings().JWT_ALG]
+            return RequesterData(**jwt.decode(token, key, algorithms))
         except ValidationError as ve:
             fields = ", ".join(e["loc"][0] for e in ve.errors())
             error = f"Missing data or incorrect format: {fields}"
             raise JWTTokenInvalidError(error)
-        except DecodeError as e:
+        except InvalidTokenError as e:
             raise JWTTokenInvalidError(e)
@@ -0,0 +1,103 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from typing import Optional, Tuple
+
+from metrics import Counter, Histogram
+from operation_context import current_operation, current_resolver
+from utils import get_operation_label
+
+logger = logging.getLogger(__name__)
+
+loop_lag = Histogram(
+    "event_loop_lag_seconds",
+    "Delay of the event loop watchdog heartbeat over its schedule.",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+loop_blocks = Counter(
+    "event_loop_blocks_total",
+    "Times the event loop was blocked longer than the threshold.",
+)
+
+
+class LoopWatchdog:
+    """
+    Detects code blocking the event loop (sync DB calls, token decoding, etc.).
+
+    A heartbeat task measures the loop lag on every tick. A monitor thread checks
+    that the heartbeat keeps ticking and, when it stalls longer than the threshold,
+    captures the stack of the loop thread and the operation and resolver of the task
+    that was running, read from that task's context variables.
+
+    Attributes:
+        interval (float): Seconds between two heartbeats.
+        threshold (float): Stall duration, in seconds, reported as a block.
+    """
+
+    def __init__(self, interval_ms: int, threshold_ms: int):
+        self.interval = interval_ms / 1000
+        self.threshold = threshold_ms / 1000
+        self._stopped = threading.Event()
+        self._last_tick = time.monotonic()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._heartbeat: Optional[asyncio.Task] = None
+        self._monitor: Optional[threading.Thread] = None
+
+    def start(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread_id = threading.get_ident()
+        self._last_tick = time.monotonic()
+        self._heartbeat = self._loop.create_task(self._beat())
+        self._monitor = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._monitor.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+        if self._monitor is not None:
+            self._monitor.join()
+
+    async def _beat(self) -> None:
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            loop_lag.observe(max(0.0, now - expected))
+            self._last_tick = now
+
+    def _watch(self) -> None:
+        reported_tick = None
+        while not self._stopped.wait(self.interval):
+            last_tick = self._last_tick
+            blocked_for = time.monotonic() - last_tick - self.interval
+            if blocked_for > self.threshold and last_tick != reported_tick:
+                reported_tick = last_tick
+                self._report(blocked_for)
+
+    def _get_running_operation(self) -> Tuple[Optional[str], Optional[str]]:
+        task = asyncio.current_task(self._loop)
+        get_context = getattr(task, "get_context", None)
+        if get_context is None:
+            return None, None
+        context = get_context()
+        return context.get(current_operation), context.get(current_resolver)
+
+    def _report(self, blocked_for: float) -> None:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        stack = "".join(traceback.format_stack(frame)) if frame else ""
+        operation, resolver = self._get_running_operation()
+        loop_blocks.inc(operation=get_operation_label(operation))
+        logger.warning(
+            "Event loop blocked for more than %.0f ms (operation: %s, resolver: %s)"
+            "\n%s",
+            blocked_for * 1000,
+            operation,
+            resolver,
+            stack,
+        )
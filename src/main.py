@@ -1,33 +1,167 @@
+import asyncio
+import hmac
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from strawberry import Schema
-from strawberry.fastapi import GraphQLRouter
+from strawberry.schema.config import StrawberryConfig
 from strawberry.tools import merge_types
 
-from database.db_conf import engine
+import metrics
+from change_feed import stream_changes
+from conf import get_settings
+from database.db_conf import engine, slow_query_log
 from database.models import Base
-from extensions import SQLAlchemySession
+from database.orphan_sweeper import OrphanSweeper
+from database.purger import Purger
+from exceptions import JWTTokenInvalidError
+from extensions import (
+    AdmissionControl,
+    Coalescing,
+    HTTPCaching,
+    Idempotency,
+    JWTAuthentication,
+    MemoryAccounting,
+    OperationContext,
+    Profiling,
+    RateLimiting,
+    SQLAlchemySession,
+    Tracing,
+)
+from http_compression import CompressionMiddleware
+from jwt_token_manager import JWTToken, get_key_set
+from loop_watchdog import LoopWatchdog
+from permissions import HasAdminGroup
+from router import BatchGraphQLRouter
 from schema.admin import Mutation
 from schema.admin import Query as QueryAdmin
 from schema.basic import Query as QueryBasic
+from tracing import TracingMiddleware, get_tracer
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Base.metadata.create_all(bind=engine)
     print("Database connected on startup")
+    key_set = get_key_set()
+    if key_set is not None:
+        key_set.load()
+        key_set_refresh = asyncio.create_task(key_set.refresh_forever())
+    settings = get_settings()
+    if settings.ORPHAN_SWEEP_INTERVAL_SECONDS:
+        sweeper = OrphanSweeper(
+            engine,
+            settings.ORPHAN_SWEEP_BATCH_SIZE,
+            settings.ORPHAN_SWEEP_INTERVAL_SECONDS,
+        )
+        orphan_sweep = asyncio.create_task(sweeper.run_forever())
+    purger = Purger(
+        engine,
+        settings.PURGE_BATCH_SIZE,
+        settings.PURGE_GRACE_SECONDS,
+        settings.PURGE_INTERVAL_SECONDS,
+        is_quiet=AdmissionControl.get_controller().is_idle,
+        key_ttl_seconds=settings.IDEMPOTENCY_KEY_TTL_SECONDS,
+        purge_soft_deleted=settings.SOFT_DELETE_ENABLED,
+    )
+    purge = asyncio.create_task(purger.run_forever())
+    if settings.LOOP_WATCHDOG_ENABLED:
+        watchdog = LoopWatchdog(
+            settings.LOOP_WATCHDOG_INTERVAL_MS, settings.LOOP_BLOCK_THRESHOLD_MS
+        )
+        watchdog.start()
     yield
+    if settings.LOOP_WATCHDOG_ENABLED:
+        watchdog.stop()
+    if settings.ORPHAN_SWEEP_INTERVAL_SECONDS:
+        orphan_sweep.cancel()
+    purge.cancel()
+    if key_set is not None:
+        key_set_refresh.cancel()
+    slow_query_log.remove()
+    get_tracer().exporter.shutdown()
     engine.dispose()
     print("Database disconnected on shutdown")
 
 
 Query = merge_types("Query", (QueryBasic, QueryAdmin))
 
-schema = Schema(query=Query, mutation=Mutation, extensions=[SQLAlchemySession])
+extensions = [
+    Tracing,
+    JWTAuthentication,
+    HTTPCaching,
+    *([RateLimiting] if get_settings().RATE_LIMIT_ENABLED else []),
+    *([Coalescing] if get_settings().COALESCING_ENABLED else []),
+    AdmissionControl,
+    SQLAlchemySession,
+    Idempotency,
+    OperationContext,
+    MemoryAccounting,
+]
+if get_settings().PROFILING_ENABLED:
+    extensions.append(Profiling)
 
-router = GraphQLRouter(schema)
+schema = Schema(
+    query=Query,
+    mutation=Mutation,
+    extensions=extensions,
+    config=StrawberryConfig(
+        batching_config={"max_operations": get_settings().GRAPHQL_MAX_BATCH_OPERATIONS}
+    ),
+)
+
+router = BatchGraphQLRouter(schema, allow_queries_via_get=True)
 
 app = FastAPI(lifespan=lifespan)
 
+app.add_middleware(TracingMiddleware)
+app.add_middleware(
+    CompressionMiddleware,
+    minimum_size=get_settings().COMPRESSION_MINIMUM_SIZE,
+    gzip_level=get_settings().COMPRESSION_GZIP_LEVEL,
+    brotli_quality=get_settings().COMPRESSION_BROTLI_QUALITY,
+)
+
 app.include_router(router, prefix="/graphql")
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics(request: Request) -> str:
+    """
+    Renders the metrics to scrapers sending METRICS_TOKEN as a bearer token. The
+    endpoint is not exposed when no token is configured.
+    """
+    token = get_settings().METRICS_TOKEN
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    authorization = request.headers.get("authorization", "")
+    if not hmac.compare_digest(authorization.encode(), f"Bearer {token}".encode()):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return metrics.render()
+
+
+@app.get("/changes")
+def get_changes(request: Request, cursor: int = 0) -> StreamingResponse:
+    """
+    Streams the change feed to admin requesters (see `change_feed.stream_changes`).
+    """
+    authentication = request.headers.get("authentication")
+    try:
+        requester = JWTToken.decode(authentication.split()[-1])
+    except (AttributeError, IndexError, JWTTokenInvalidError):
+        raise HTTPException(status_code=401, detail="User is not authenticated")
+    if not HasAdminGroup.is_admin(requester):
+        raise HTTPException(status_code=403, detail="User is not admin")
+    settings = get_settings()
+    changes = stream_changes(
+        cursor,
+        settings.CHANGE_FEED_PAGE_SIZE,
+        settings.CHANGE_FEED_POLL_INTERVAL_MS,
+        settings.CHANGE_FEED_SETTLE_MS,
+    )
+    return StreamingResponse(
+        changes,
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Accel-Buffering": "no"},
+    )
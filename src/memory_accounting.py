@@ -0,0 +1,66 @@
+import threading
+import tracemalloc
+from dataclasses import dataclass
+from typing import List, Optional
+
+from metrics import BYTES_BUCKETS, Histogram
+
+peak_memory = Histogram(
+    "graphql_operation_peak_memory_bytes",
+    "Peak traced memory of sampled GraphQL operations.",
+    buckets=BYTES_BUCKETS,
+)
+allocation_count = Histogram(
+    "graphql_operation_allocations",
+    "Number of live allocations at the end of sampled GraphQL operations.",
+    buckets=tuple(10**exp for exp in range(2, 8)),
+)
+
+
+@dataclass
+class MemoryReport:
+    peak: int
+    allocations: int
+    top_sites: List[str]
+
+
+class AllocationTracker:
+    """
+    Traces the allocations of one operation at a time with tracemalloc.
+
+    tracemalloc is process-wide, so only one operation is traced at once: a sampled
+    operation starting while another one is traced is simply not traced, which also
+    bounds the overhead. Allocations made meanwhile by concurrent operations on the
+    event loop are counted too, so figures are upper bounds.
+
+    Attributes:
+        nframes (int): Frames stored per allocation, the depth of the reported sites.
+        top (int): How many allocation sites to report.
+    """
+
+    def __init__(self, nframes: int = 1, top: int = 5):
+        self.nframes = nframes
+        self.top = top
+        self._lock = threading.Lock()
+
+    def start(self) -> bool:
+        if tracemalloc.is_tracing() or not self._lock.acquire(blocking=False):
+            return False
+        tracemalloc.start(self.nframes)
+        return True
+
+    def stop(self) -> Optional[MemoryReport]:
+        try:
+            _, peak = tracemalloc.get_traced_memory()
+            snapshot = tracemalloc.take_snapshot().filter_traces(
+                (tracemalloc.Filter(False, tracemalloc.__file__),)
+            )
+        finally:
+            tracemalloc.stop()
+            self._lock.release()
+        statistics = snapshot.statistics("lineno")
+        return MemoryReport(
+            peak=peak,
+            allocations=sum(stat.count for stat in statistics),
+            top_sites=[str(stat) for stat in statistics[: self.top]],
+        )
@@ -0,0 +1,110 @@
+import bisect
+import threading
+from collections import defaultdict
+from typing import Dict, List, Sequence, Tuple
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+BYTES_BUCKETS = tuple(2**exp for exp in range(16, 31, 2))
+
+REGISTRY: Dict[str, "Metric"] = {}
+
+
+def _escape(value: object) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(labels: Tuple[Tuple[str, object], ...]) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels) + "}"
+
+
+class Metric:
+    """
+    Base class of the in-process metrics, rendered in Prometheus text format.
+
+    Attributes:
+        name (str): The metric name.
+        documentation (str): The help text of the metric.
+    """
+
+    TYPE = ""
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+        REGISTRY[name] = self
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.TYPE}",
+        ]
+        with self._lock:
+            return "\n".join(header + self._samples())
+
+
+class Counter(Metric):
+    TYPE = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self.values = defaultdict(float)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        with self._lock:
+            self.values[tuple(sorted(labels.items()))] += amount
+
+    def _samples(self) -> List[str]:
+        return [f"{self.name}{_format_labels(k)} {v}" for k, v in self.values.items()]
+
+
+class Gauge(Counter):
+    TYPE = "gauge"
+
+    def set(self, value: float, **labels: str) -> None:
+        with self._lock:
+            self.values[tuple(sorted(labels.items()))] = value
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+
+class Histogram(Metric):
+    TYPE = "histogram"
+
+    def __init__(
+        self, name: str, documentation: str, buckets: Sequence[float] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        self.counts = defaultdict(lambda: [0] * (len(self.buckets) + 1))
+        self.sums = defaultdict(float)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self.counts[key][bisect.bisect_left(self.buckets, value)] += 1
+            self.sums[key] += value
+
+    def _samples(self) -> List[str]:
+        samples = []
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else bound
+                labels = _format_labels(key + (("le", le),))
+                samples.append(f"{self.name}_bucket{labels} {cumulative}")
+            samples.append(f"{self.name}_sum{_format_labels(key)} {self.sums[key]}")
+            samples.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return samples
+
+
+def render() -> str:
+    return "\n".join(metric.render() for metric in REGISTRY.values()) + "\n"
@@ -0,0 +1,71 @@
+import cProfile
+import os
+import pstats
+import re
+import time
+from typing import Any, Dict
+
+PROFILE_HEADER = "x-profile"
+
+SQL_FUNCTIONS = {"do_execute", "do_execute_no_params", "do_executemany"}
+
+
+def _format_function(func: tuple) -> str:
+    filename, lineno, name = func
+    if filename == "~":
+        return name
+    return f"{os.path.basename(filename)}:{lineno}({name})"
+
+
+def summarize(profile: cProfile.Profile, limit: int = 20) -> Dict[str, Any]:
+    """
+    Builds the call-tree summary of a profiled operation.
+
+    SQL time is the cumulative time spent in the SQLAlchemy dialect `do_execute*`
+    methods, which wrap the DBAPI cursor calls whatever the driver.
+
+    Args:
+        profile (cProfile.Profile): The disabled profiler of the operation.
+        limit (int): How many functions to report, by cumulative time.
+
+    Returns:
+        Dict[str, Any]: Total, SQL and Python times (ms) and the top functions.
+    """
+    stats = pstats.Stats(profile)
+    entries = stats.stats.items()
+    sql_time = sum(
+        cumtime
+        for (filename, _, name), (_, _, _, cumtime, _) in entries
+        if name in SQL_FUNCTIONS
+        and filename.endswith(os.path.join("engine", "default.py"))
+    )
+    top = sorted(entries, key=lambda entry: entry[1][3], reverse=True)[:limit]
+    return {
+        "totalMs": round(stats.total_tt * 1000, 3),
+        "sqlMs": round(sql_time * 1000, 3),
+        "pythonMs": round((stats.total_tt - sql_time) * 1000, 3),
+        "top": [
+            {
+                "function": _format_function(func),
+                "calls": calls,
+                "totalMs": round(tottime * 1000, 3),
+                "cumulativeMs": round(cumtime * 1000, 3),
+            }
+            for func, (_, calls, tottime, cumtime, _) in top
+        ],
+    }
+
+
+def dump(profile: cProfile.Profile, directory: str, operation_name: str) -> str:
+    """
+    Writes the profile in pstats format, readable by flameprof, snakeviz, etc.
+
+    The operation name is sent by the client: it is reduced to a safe file name.
+
+    Returns:
+        str: The path of the written file.
+    """
+    name = re.sub(r"[^A-Za-z0-9_-]", "_", operation_name)[:64]
+    path = os.path.join(directory, f"{name}-{time.time_ns()}.prof")
+    profile.dump_stats(path)
+    return path
@@ -0,0 +1,9 @@
+from contextvars import ContextVar
+from typing import Optional
+
+current_operation: ContextVar[Optional[str]] = ContextVar(
+    "current_operation", default=None
+)
+current_resolver: ContextVar[Optional[str]] = ContextVar(
+    "current_resolver", default=None
+)
@@ -1,29 +1,26 @@
-from typing import Any
+from typing import Any, Optional
 
 from strawberry import Info
 from strawberry.permission import BasePermission
 
-from jwt_token_manager import JWTToken
+from jwt_token_manager import RequesterData
 
 
 class IsAuthenticated(BasePermission):
     message = "User is not authenticated"
 
     async def has_permission(self, source: Any, info: Info, **kwargs) -> bool:
-        request = info.context["request"]
-        authentication = request.headers.get("authentication")
-        if authentication:
-            token = authentication.split()[-1]
-            auth_result = JWTToken.decode(token)
-            info.context["requester_data"] = auth_result.model_dump()
-            return True
-        return False
+        if info.context["authentication_error"]:
+            raise info.context["authentication_error"]
+        return info.context["requester"] is not None
 
 
 class HasAdminGroup(BasePermission):
     message = "User is not admin"
 
+    @staticmethod
+    def is_admin(requester: Optional[RequesterData]) -> bool:
+        return requester is not None and "admin" in requester.groups
+
     async def has_permission(self, source: Any, info: Info, **kwargs: Any) -> bool:
-        if "admin" in info.context["requester_data"]["groups"]:
-            return True
-        return False
+        return self.is_admin(info.context["requester"])
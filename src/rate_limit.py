@@ -0,0 +1,213 @@
+import importlib
+import math
+import time
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+from jwt_token_manager import RequesterData
+from metrics import Counter
+from permissions import HasAdminGroup
+
+rate_limited = Counter(
+    "rate_limited_operations_total", "Operations rejected by the rate limiter."
+)
+
+REDIS_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local time = redis.call('TIME')
+local now = tonumber(time[1]) + tonumber(time[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(state[1]) or capacity
+local updated = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return {allowed, tostring(tokens)}
+"""
+
+
+@dataclass(frozen=True)
+class RateLimitDecision:
+    """
+    The outcome of taking tokens from a bucket.
+
+    Attributes:
+        allowed (bool): Whether the tokens were taken.
+        limit (int): The bucket capacity.
+        remaining (int): Whole tokens left in the bucket.
+        reset (int): Seconds until the bucket is full again.
+        retry_after (int): Seconds until the cost can be paid, 0 when allowed.
+    """
+
+    allowed: bool
+    limit: int
+    remaining: int
+    reset: int
+    retry_after: int
+
+    @classmethod
+    def from_tokens(
+        cls, allowed: bool, tokens: float, cost: int, capacity: int, rate: float
+    ) -> "RateLimitDecision":
+        return cls(
+            allowed=allowed,
+            limit=capacity,
+            remaining=math.floor(tokens),
+            reset=math.ceil((capacity - tokens) / rate),
+            retry_after=0 if allowed else math.ceil((cost - tokens) / rate),
+        )
+
+
+class RateLimitBackend:
+    """
+    Stores token buckets. Implementations must take tokens atomically.
+    """
+
+    async def take(
+        self, key: str, cost: int, capacity: int, rate: float
+    ) -> RateLimitDecision:
+        raise NotImplementedError
+
+
+class InMemoryBackend(RateLimitBackend):
+    """
+    Token buckets of the current process; each worker enforces its own quotas.
+
+    Attributes:
+        max_keys (int): Bucket count above which full buckets are dropped.
+    """
+
+    def __init__(self, max_keys: int = 10_000):
+        self.max_keys = max_keys
+        self._buckets: Dict[str, Tuple[float, float, int, float]] = {}
+
+    def _refill(self, key: str, now: float) -> Tuple[float, int, float]:
+        tokens, updated, capacity, rate = self._buckets[key]
+        return min(capacity, tokens + (now - updated) * rate), capacity, rate
+
+    def _prune(self, now: float) -> None:
+        for key in list(self._buckets):
+            tokens, capacity, _ = self._refill(key, now)
+            if tokens >= capacity:
+                del self._buckets[key]
+
+    async def take(
+        self, key: str, cost: int, capacity: int, rate: float
+    ) -> RateLimitDecision:
+        now = time.monotonic()
+        tokens = self._refill(key, now)[0] if key in self._buckets else capacity
+        allowed = tokens >= cost
+        if allowed:
+            tokens -= cost
+        if key not in self._buckets and len(self._buckets) >= self.max_keys:
+            self._prune(now)
+        self._buckets[key] = (tokens, now, capacity, rate)
+        return RateLimitDecision.from_tokens(allowed, tokens, cost, capacity, rate)
+
+
+class RedisBackend(RateLimitBackend):
+    """
+    Token buckets shared by all the workers, taken with a single Lua script call.
+
+    Requires the optional `redis` package (`rate-limit-redis` extra).
+
+    Attributes:
+        url (str): The Redis connection URL.
+    """
+
+    def __init__(self, url: str):
+        try:
+            from redis.asyncio import Redis
+        except ImportError as e:
+            raise RuntimeError(
+                "The 'redis' rate limit backend requires the rate-limit-redis extra"
+            ) from e
+        self.url = url
+        self._redis = Redis.from_url(url)
+        self._script = self._redis.register_script(REDIS_TAKE_SCRIPT)
+
+    async def take(
+        self, key: str, cost: int, capacity: int, rate: float
+    ) -> RateLimitDecision:
+        allowed, tokens = await self._script(
+            keys=[f"rate_limit:{key}"], args=[capacity, rate, cost]
+        )
+        return RateLimitDecision.from_tokens(
+            bool(allowed), float(tokens), cost, capacity, rate
+        )
+
+
+def load_backend(name: str, url: str = "") -> RateLimitBackend:
+    """
+    Returns the rate limit backend configured by name.
+
+    Args:
+        name (str): Empty for in-process buckets, 'redis', or a 'module:ClassName'
+            import path of a RateLimitBackend subclass taking no argument.
+        url (str): The connection URL of the 'redis' backend.
+
+    Returns:
+        RateLimitBackend: The backend instance.
+    """
+    match name:
+        case "":
+            return InMemoryBackend()
+        case "redis":
+            return RedisBackend(url)
+    module, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module), class_name)()
+
+
+class RateLimiter:
+    """
+    Limits the operations of each requester with a token bucket per requester name.
+
+    The bucket capacity is the quota of the requester group, refilled continuously
+    over the window, so that a requester can burst up to its quota and then keeps
+    a steady rate of quota / window tokens per second.
+
+    Attributes:
+        backend (RateLimitBackend): Stores the buckets.
+        quotas (Dict[str, int]): Tokens per window, by group ('basic', 'admin').
+        window (int): Seconds to refill an empty bucket.
+    """
+
+    def __init__(self, backend: RateLimitBackend, quotas: Dict[str, int], window: int):
+        self.backend = backend
+        self.quotas = quotas
+        self.window = window
+
+    @staticmethod
+    def get_group(requester: RequesterData) -> str:
+        return "admin" if HasAdminGroup.is_admin(requester) else "basic"
+
+    def get_policy(self, group: str) -> str:
+        return f"{self.quotas[group]};w={self.window}"
+
+    async def take(
+        self, requester: Optional[RequesterData], cost: int
+    ) -> Optional[RateLimitDecision]:
+        """
+        Takes `cost` tokens from the bucket of the requester.
+
+        Returns:
+            Optional[RateLimitDecision]: The decision, None for anonymous requesters
+                which are rejected by the permission classes anyway.
+        """
+        if requester is None:
+            return None
+        group = self.get_group(requester)
+        capacity = self.quotas[group]
+        decision = await self.backend.take(
+            requester.name, cost, capacity, capacity / self.window
+        )
+        if not decision.allowed:
+            rate_limited.inc(group=group)
+        return decision
@@ -0,0 +1,90 @@
+import asyncio
+import contextlib
+from typing import Any, List
+
+from graphql import GraphQLError, OperationType, get_operation_ast, parse
+from starlette.requests import Request
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.types.unset import UNSET
+
+from database.db_conf import new_session
+from http_caching import with_etag
+from json_encoding import get_json_encoder
+
+
+def is_mutation(data: GraphQLRequestData) -> bool:
+    """
+    Tells whether the operation of a request is a mutation, False when it cannot be
+    parsed: its execution reports the error.
+    """
+    try:
+        operation = get_operation_ast(parse(data.query or ""), data.operation_name)
+    except GraphQLError:
+        return False
+    return operation is not None and operation.operation == OperationType.MUTATION
+
+
+class BatchGraphQLRouter(GraphQLRouter):
+    """
+    A GraphQL router executing the operations of a batched request concurrently.
+
+    Each operation gets its own shallow copy of the request context, so that keys set
+    per operation (e.g. `db`) do not leak between operations, while the query
+    operations all read through the one session stored in `context["batch_db"]`
+    and thus never hold more than one pooled connection at a time. Mutations each
+    need their own session, so they run one after the other, in request order: a
+    batch never holds more than two pooled connections.
+
+    Responses are encoded with the configured JSON encoder (see JSON_ENCODER), and
+    those of queries get a strong ETag so that `If-None-Match` is answered with 304.
+    Queries are also accepted over GET, which lets HTTP caches serve repeat reads.
+    """
+
+    async def run(self, request: Any, context: Any = UNSET, root_value: Any = UNSET):
+        response = await super().run(request, context=context, root_value=root_value)
+        if isinstance(request, Request):
+            return with_etag(request, response)
+        return response
+
+    def encode_json(self, data: object) -> str | bytes:
+        return get_json_encoder().encode(data)
+
+    async def execute_operation(
+        self,
+        request: Any,
+        request_adapter: Any,
+        request_data: GraphQLRequestData | List[GraphQLRequestData],
+        context: Any,
+        root_value: Any,
+        sub_response: Any,
+    ) -> Any:
+        execute = super().execute_operation
+        if not isinstance(request_data, list):
+            return await execute(
+                request,
+                request_adapter,
+                request_data,
+                context,
+                root_value,
+                sub_response,
+            )
+        mutation_lock = asyncio.Lock()
+
+        async def execute_one(data: GraphQLRequestData) -> Any:
+            lock = mutation_lock if is_mutation(data) else contextlib.nullcontext()
+            async with lock:
+                return await execute(
+                    request,
+                    request_adapter,
+                    data,
+                    dict(context),
+                    root_value,
+                    sub_response,
+                )
+
+        context["batch_db"] = new_session("query")
+        try:
+            return await asyncio.gather(*[execute_one(data) for data in request_data])
+        finally:
+            context["batch_db"].close()
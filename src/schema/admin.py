@@ -3,15 +3,24 @@ from typing import List, Optional
 import strawberry
 from strawberry import Info
 
+from conf import get_settings
 from database.crud_factory import AuthorSQLCrud, BookSQLCrud
+from database.outbox import CREATE, DELETE, UPDATE, get_changes_since
 from database.validators.author import AuthorCreateValidator, AuthorUpdateValidator
-from database.validators.book import BookCreateValidator, BookUpdateValidator
+from database.validators.book import (
+    BookBulkUpdateValidator,
+    BookCreateValidator,
+    BookUpdateValidator,
+)
 from definitions.author import AuthorAdmin
 from definitions.book import BookAdmin
+from definitions.bulk import BulkOperationResult
+from definitions.change import ChangePage
 from filters.author import AuthorAdminFilter
 from filters.book import BookAdminFilter
+from filters.ordering import AuthorOrder, BookOrder
 from inputs.author import AuthorCreationInput, AuthorUpdateInput
-from inputs.book import BookCreationInput, BookUpdateInput
+from inputs.book import BookBulkUpdateInput, BookCreationInput, BookUpdateInput
 from permissions import HasAdminGroup, IsAuthenticated
 from utils import get_requester
 
@@ -20,11 +29,16 @@ from utils import get_requester
 class Query:
     @strawberry.field(permission_classes=[IsAuthenticated, HasAdminGroup])
     async def author_list_admin(
-        self, info: Info, f: Optional[AuthorAdminFilter] = None
+        self,
+        info: Info,
+        f: Optional[AuthorAdminFilter] = None,
+        order_by: Optional[List[AuthorOrder]] = None,
     ) -> List[AuthorAdmin]:
         db = info.context["db"]
         required_fields = info.selected_fields[0].selections
-        author_objs = AuthorSQLCrud.get_many_by_values(db, required_fields, q_filter=f)
+        author_objs = AuthorSQLCrud.get_many_by_values(
+            db, required_fields, q_filter=f, order_by=order_by
+        )
         return author_objs
 
     @strawberry.field(permission_classes=[IsAuthenticated, HasAdminGroup])
@@ -36,11 +50,16 @@ class Query:
 
     @strawberry.field(permission_classes=[IsAuthenticated, HasAdminGroup])
     async def book_list_admin(
-        self, info: Info, f: Optional[BookAdminFilter] = None
+        self,
+        info: Info,
+        f: Optional[BookAdminFilter] = None,
+        order_by: Optional[List[BookOrder]] = None,
     ) -> List[BookAdmin]:
         db = info.context["db"]
         required_fields = info.selected_fields[0].selections
-        book_objs = BookSQLCrud.get_many_by_values(db, required_fields, q_filter=f)
+        book_objs = BookSQLCrud.get_many_by_values(
+            db, required_fields, q_filter=f, order_by=order_by
+        )
         return book_objs
 
     @strawberry.field(permission_classes=[IsAuthenticated])
@@ -50,6 +69,15 @@ class Query:
         book_obj = BookSQLCrud.get_one_by_id(db, book_id, fields=required_fields)
         return book_obj
 
+    @strawberry.field(permission_classes=[IsAuthenticated, HasAdminGroup])
+    async def changes_since(self, info: Info, cursor: int = 0) -> ChangePage:
+        db = info.context["db"]
+        settings = get_settings()
+        changes = get_changes_since(
+            db, cursor, settings.CHANGE_FEED_PAGE_SIZE, settings.CHANGE_FEED_SETTLE_MS
+        )
+        return ChangePage(changes=changes, cursor=changes[-1].id if changes else cursor)
+
 
 @strawberry.type
 class Mutation:
@@ -60,12 +88,23 @@ class Mutation:
         data_dict = data.asdict() | {"created_by": requester}
         validated_data = AuthorCreateValidator(**data_dict)
         author_obj = AuthorSQLCrud.create(db, validated_data)
+        db.flush()
+        AuthorSQLCrud.record_changes(
+            db,
+            CREATE,
+            [(author_obj.id, author_obj.version)],
+            validated_data.model_dump(),
+        )
         db.commit()
         return author_obj
 
     @strawberry.mutation(permission_classes=[IsAuthenticated, HasAdminGroup])
     async def modify_author(
-        self, info: Info, author_id: int, data: AuthorUpdateInput
+        self,
+        info: Info,
+        author_id: int,
+        data: AuthorUpdateInput,
+        expected_version: Optional[int] = None,
     ) -> AuthorAdmin:
         db = info.context["db"]
         requester = get_requester(info)
@@ -73,7 +112,17 @@ class Mutation:
         data_dict = data.asdict() | {"last_updated_by": requester}
         validated_data = AuthorUpdateValidator(**data_dict)
         author_obj = AuthorSQLCrud.update_by_id(
-            db, validated_data, author_id, required_fields
+            db,
+            validated_data,
+            author_id,
+            required_fields,
+            expected_version=expected_version,
+        )
+        AuthorSQLCrud.record_changes(
+            db,
+            UPDATE,
+            [(author_obj.id, author_obj.version)],
+            validated_data.model_dump(exclude_unset=True),
         )
         db.commit()
         return author_obj
@@ -82,6 +131,7 @@ class Mutation:
     async def remove_author(self, info: Info, author_id: int) -> bool:
         db = info.context["db"]
         result = AuthorSQLCrud.remove_by_id(db, author_id)
+        AuthorSQLCrud.record_changes(db, DELETE, [result] if result else [])
         db.commit()
         return bool(result)
 
@@ -93,26 +143,62 @@ class Mutation:
         validated_data = BookCreateValidator(**data_dict)
         book_obj = BookSQLCrud.create(db, validated_data)
         AuthorSQLCrud.create_relation(db, book_obj, validated_data.authors)
+        db.flush()
+        BookSQLCrud.record_changes(
+            db,
+            CREATE,
+            [(book_obj.id, book_obj.version)],
+            [*validated_data.model_dump(), "authors"],
+        )
         db.commit()
         return book_obj
 
     @strawberry.mutation(permission_classes=[IsAuthenticated, HasAdminGroup])
     async def modify_book(
-        self, info: Info, book_id: int, data: BookUpdateInput
+        self,
+        info: Info,
+        book_id: int,
+        data: BookUpdateInput,
+        expected_version: Optional[int] = None,
     ) -> BookAdmin:
         db = info.context["db"]
         requester = get_requester(info)
         required_fields = info.selected_fields[0].selections
         data_dict = data.asdict() | {"last_updated_by": requester}
-        author_count = len(BookSQLCrud.get_one_by_id(db, book_id).authors)
+        changes = BookSQLCrud.get_author_changes(
+            db,
+            book_id,
+            data_dict.get("add_authors") or [],
+            data_dict.get("remove_authors") or [],
+        )
         validated_data = BookUpdateValidator(
-            id_=book_id, author_count=author_count, **data_dict
+            **data_dict
+            | {
+                "author_count": changes.author_count,
+                "add_authors": changes.add,
+                "remove_authors": changes.remove,
+            }
         )
         book_obj = BookSQLCrud.update_by_id(
-            db, validated_data, book_id, required_fields
+            db,
+            validated_data,
+            book_id,
+            required_fields,
+            expected_version=expected_version,
+        )
+        BookSQLCrud.change_authors(
+            db, book_id, validated_data.add_authors, validated_data.remove_authors
+        )
+        authors_changed = validated_data.add_authors or validated_data.remove_authors
+        BookSQLCrud.record_changes(
+            db,
+            UPDATE,
+            [(book_obj.id, book_obj.version)],
+            [
+                *validated_data.model_dump(exclude_unset=True),
+                *(["authors"] if authors_changed else []),
+            ],
         )
-        AuthorSQLCrud.create_relation(db, book_obj, validated_data.add_authors)
-        AuthorSQLCrud.remove_relation(db, book_obj, validated_data.remove_authors)
         db.commit()
         return book_obj
 
@@ -120,4 +206,41 @@ class Mutation:
     async def remove_book(self, info: Info, book_id: int) -> bool:
         db = info.context["db"]
         result = BookSQLCrud.remove_by_id(db, book_id)
+        BookSQLCrud.record_changes(db, DELETE, [result] if result else [])
+        db.commit()
         return bool(result)
+
+    @strawberry.mutation(permission_classes=[IsAuthenticated, HasAdminGroup])
+    async def update_books(
+        self,
+        info: Info,
+        f: BookAdminFilter,
+        data: BookBulkUpdateInput,
+        dry_run: bool = False,
+    ) -> BulkOperationResult:
+        db = info.context["db"]
+        requester = get_requester(info)
+        data_dict = data.asdict() | {"last_updated_by": requester}
+        validated_data = BookBulkUpdateValidator(**data_dict)
+        if dry_run:
+            affected = BookSQLCrud.count_by_filter(db, f)
+            return BulkOperationResult(affected=affected, dry_run=dry_run)
+        rows = BookSQLCrud.update_by_filter(db, f, validated_data)
+        BookSQLCrud.record_changes(
+            db, UPDATE, rows, validated_data.model_dump(exclude_unset=True)
+        )
+        db.commit()
+        return BulkOperationResult(affected=len(rows), dry_run=dry_run)
+
+    @strawberry.mutation(permission_classes=[IsAuthenticated, HasAdminGroup])
+    async def remove_books(
+        self, info: Info, f: BookAdminFilter, dry_run: bool = False
+    ) -> BulkOperationResult:
+        db = info.context["db"]
+        if dry_run:
+            affected = BookSQLCrud.count_by_filter(db, f)
+            return BulkOperationResult(affected=affected, dry_run=dry_run)
+        rows = BookSQLCrud.remove_by_filter(db, f)
+        BookSQLCrud.record_changes(db, DELETE, rows)
+        db.commit()
+        return BulkOperationResult(affected=len(rows), dry_run=dry_run)
@@ -8,6 +8,7 @@ from definitions.author import AuthorBasic
 from definitions.book import BookBasic
 from filters.author import AuthorBasicFilter
 from filters.book import BookBasicFilter
+from filters.ordering import AuthorOrder, BookOrder
 from permissions import IsAuthenticated
 
 
@@ -15,11 +16,16 @@ from permissions import IsAuthenticated
 class Query:
     @strawberry.field(permission_classes=[IsAuthenticated])
     async def author_list(
-        self, info: Info, f: Optional[AuthorBasicFilter] = None
+        self,
+        info: Info,
+        f: Optional[AuthorBasicFilter] = None,
+        order_by: Optional[List[AuthorOrder]] = None,
     ) -> List[AuthorBasic]:
         db = info.context["db"]
         required_fields = info.selected_fields[0].selections
-        author_objs = AuthorSQLCrud.get_many_by_values(db, required_fields, q_filter=f)
+        author_objs = AuthorSQLCrud.get_many_by_values(
+            db, required_fields, q_filter=f, order_by=order_by
+        )
         return author_objs
 
     @strawberry.field(permission_classes=[IsAuthenticated])
@@ -31,11 +37,16 @@ class Query:
 
     @strawberry.field(permission_classes=[IsAuthenticated])
     async def book_list(
-        self, info: Info, f: Optional[BookBasicFilter] = None
+        self,
+        info: Info,
+        f: Optional[BookBasicFilter] = None,
+        order_by: Optional[List[BookOrder]] = None,
     ) -> List[BookBasic]:
         db = info.context["db"]
         required_fields = info.selected_fields[0].selections
-        book_objs = BookSQLCrud.get_many_by_values(db, required_fields, q_filter=f)
+        book_objs = BookSQLCrud.get_many_by_values(
+            db, required_fields, q_filter=f, order_by=order_by
+        )
         return book_objs
 
     @strawberry.field(permission_classes=[IsAuthenticated])
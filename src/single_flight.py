@@ -0,0 +1,73 @@
+import asyncio
+import json
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+from graphql import print_ast
+from strawberry.types import ExecutionContext
+
+from json_encoding import default
+from metrics import Counter, Gauge
+
+coalesced_operations = Counter(
+    "coalesced_operations_total",
+    "Operations answered with the result of an identical operation in flight.",
+)
+operations_in_flight = Gauge(
+    "single_flight_operations", "Operations in flight that identical ones can join."
+)
+
+
+def get_flight_key(execution_context: ExecutionContext, role: str) -> Tuple:
+    """
+    Identifies the operations that always have the same result: the same document,
+    whatever its formatting, operation name and variables, sent with the same role.
+    """
+    return (
+        role,
+        print_ast(execution_context.graphql_document),
+        execution_context.operation_name,
+        json.dumps(execution_context.variables, sort_keys=True, default=default),
+    )
+
+
+class SingleFlight:
+    """
+    Lets concurrent identical operations share one execution.
+
+    The first operation of a key leads the flight and executes; the ones with the
+    same key that start before it has finished wait for its result instead of
+    executing.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Hashable, asyncio.Future] = {}
+
+    def join(self, key: Hashable) -> Optional[asyncio.Future]:
+        """
+        Returns:
+            Optional[asyncio.Future]: The result of the flight in progress for the
+                key, None when there is none and the caller leads a new one, which
+                it must `land` once executed.
+        """
+        flight = self._flights.get(key)
+        if flight is None:
+            new_flight = self._flights[key] = asyncio.get_running_loop().create_future()
+            operations_in_flight.inc()
+            # the leading task may end without landing, e.g. when it is cancelled
+            # before all the extensions are entered, which are then never exited
+            asyncio.current_task().add_done_callback(
+                lambda _: self._abandon(key, new_flight)
+            )
+        return flight
+
+    def _abandon(self, key: Hashable, flight: asyncio.Future) -> None:
+        if self._flights.get(key) is flight:
+            self.land(key, None)
+
+    def land(self, key: Hashable, result: Any) -> None:
+        """
+        Hands the result of a flight over to the operations waiting for it, None if
+        the execution failed or was cancelled and they must execute on their own.
+        """
+        self._flights.pop(key).set_result(result)
+        operations_in_flight.dec()
@@ -0,0 +1,325 @@
+import importlib
+import json
+import random
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional, TextIO
+
+from sqlalchemy import Engine, event
+
+from conf import get_settings
+
+TRACEPARENT_RE = re.compile(r"^00-([0-9a-f]{32})-([0-9a-f]{16})-([0-9a-f]{2})$")
+
+
+@dataclass(frozen=True)
+class SpanContext:
+    trace_id: str
+    span_id: str
+    sampled: bool
+
+    @property
+    def traceparent(self) -> str:
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+def parse_traceparent(header: Optional[str]) -> Optional[SpanContext]:
+    """
+    Parses a W3C trace-context `traceparent` header.
+
+    Args:
+        header (Optional[str]): The header value, e.g. '00-<trace id>-<span id>-01'.
+
+    Returns:
+        Optional[SpanContext]: The remote parent context, None if missing or invalid.
+    """
+    match = TRACEPARENT_RE.match((header or "").strip().lower())
+    if not match or set(match.group(1)) == {"0"} or set(match.group(2)) == {"0"}:
+        return None
+    trace_id, span_id, flags = match.groups()
+    return SpanContext(trace_id, span_id, sampled=bool(int(flags, 16) & 1))
+
+
+class Span:
+    """
+    A unit of traced work, exported with OTLP/JSON field names once ended.
+
+    Spans of unsampled traces are not recording: they only carry their context so
+    that the sampling decision is propagated to children and downstream services.
+    """
+
+    __slots__ = (
+        "tracer",
+        "name",
+        "context",
+        "parent_span_id",
+        "kind",
+        "attributes",
+        "start_time",
+        "end_time",
+        "status",
+    )
+
+    def __init__(
+        self,
+        tracer: "Tracer",
+        name: str,
+        context: SpanContext,
+        parent_span_id: Optional[str] = None,
+        kind: str = "INTERNAL",
+        attributes: Optional[Dict[str, Any]] = None,
+    ):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_span_id = parent_span_id
+        self.kind = kind
+        self.attributes = attributes or {}
+        self.start_time = time.time_ns()
+        self.end_time = None
+        self.status = "UNSET"
+
+    @property
+    def is_recording(self) -> bool:
+        return self.context.sampled
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        if self.is_recording:
+            self.attributes[key] = value
+
+    def record_error(self, error: BaseException) -> None:
+        if self.is_recording:
+            self.status = "ERROR"
+            self.attributes["exception.type"] = type(error).__name__
+            self.attributes["exception.message"] = str(error)
+
+    def end(self) -> None:
+        if self.is_recording and self.end_time is None:
+            self.end_time = time.time_ns()
+            self.tracer.exporter.export([self.to_dict()])
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "traceId": self.context.trace_id,
+            "spanId": self.context.span_id,
+            "parentSpanId": self.parent_span_id or "",
+            "name": self.name,
+            "kind": f"SPAN_KIND_{self.kind}",
+            "startTimeUnixNano": self.start_time,
+            "endTimeUnixNano": self.end_time,
+            "attributes": self.attributes,
+            "status": {"code": f"STATUS_CODE_{self.status}"},
+        }
+
+
+current_span: ContextVar[Optional[Span]] = ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        pass
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ConsoleSpanExporter(SpanExporter):
+    """
+    Writes spans as JSON lines, to stdout by default.
+    """
+
+    def __init__(self, stream: TextIO = sys.stdout):
+        self.stream = stream
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Dict[str, Any]]) -> None:
+        lines = "".join(json.dumps(span, default=str) + "\n" for span in spans)
+        with self._lock:
+            self.stream.write(lines)
+            self.stream.flush()
+
+
+class FileSpanExporter(ConsoleSpanExporter):
+    def __init__(self, path: str):
+        super().__init__(open(path, "a", buffering=1))
+
+    def shutdown(self) -> None:
+        self.stream.close()
+
+
+class Tracer:
+    """
+    Creates spans and takes the sampling decision for new traces.
+
+    The decision follows the remote parent when there is one (parent-based) and is
+    otherwise a random draw against `sample_rate`. Within an unsampled trace no new
+    span is created at all, which keeps the cost of instrumentation negligible.
+
+    Attributes:
+        exporter (SpanExporter): Receives every ended recording span.
+        sample_rate (float): Fraction of new traces to record.
+    """
+
+    def __init__(self, exporter: SpanExporter, sample_rate: float):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+
+    def start(
+        self,
+        name: str,
+        *,
+        parent: Optional[SpanContext] = None,
+        kind: str = "INTERNAL",
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Span:
+        if parent is None and (parent_span := current_span.get()) is not None:
+            parent = parent_span.context
+        if parent is None:
+            trace_id = random.getrandbits(128).to_bytes(16, "big").hex()
+            sampled = random.random() < self.sample_rate
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+        span_id = random.getrandbits(64).to_bytes(8, "big").hex()
+        context = SpanContext(trace_id, span_id, sampled)
+        if not sampled:
+            attributes = None
+        return Span(
+            self,
+            name,
+            context,
+            parent.span_id if parent else None,
+            kind,
+            attributes,
+        )
+
+    @contextmanager
+    def start_span(
+        self,
+        name: str,
+        *,
+        parent: Optional[SpanContext] = None,
+        kind: str = "INTERNAL",
+        attributes: Optional[Dict[str, Any]] = None,
+    ) -> Iterator[Span]:
+        active = current_span.get()
+        if parent is None and active is not None and not active.is_recording:
+            yield active
+            return
+        span = self.start(name, parent=parent, kind=kind, attributes=attributes)
+        token = current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_error(e)
+            raise
+        finally:
+            current_span.reset(token)
+            span.end()
+
+
+def load_exporter(name: str, path: str = "") -> SpanExporter:
+    """
+    Returns the exporter configured by name.
+
+    Args:
+        name (str): 'console', 'file', or a 'module:ClassName' import path of a
+            SpanExporter subclass taking no argument; empty disables exporting.
+        path (str): The output file of the 'file' exporter.
+
+    Returns:
+        SpanExporter: The exporter instance.
+    """
+    match name:
+        case "":
+            return SpanExporter()
+        case "console":
+            return ConsoleSpanExporter()
+        case "file":
+            return FileSpanExporter(path)
+    module, _, class_name = name.partition(":")
+    return getattr(importlib.import_module(module), class_name)()
+
+
+@lru_cache()
+def get_tracer() -> Tracer:
+    settings = get_settings()
+    exporter = load_exporter(settings.TRACING_EXPORTER, settings.TRACING_FILE)
+    sample_rate = settings.TRACING_SAMPLE_RATE if settings.TRACING_EXPORTER else 0
+    return Tracer(exporter, sample_rate)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware opening the server span of each HTTP request.
+
+    The span continues the trace of an incoming `traceparent` header, and the
+    `traceparent` of the server span is sent back in the response headers.
+    """
+
+    def __init__(self, app, tracer: Optional[Tracer] = None):
+        self.app = app
+        self.tracer = tracer or get_tracer()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        headers = dict(scope["headers"])
+        parent = parse_traceparent(headers.get(b"traceparent", b"").decode("latin-1"))
+        name = f"{scope['method']} {scope['path']}"
+        attributes = {"http.method": scope["method"], "http.target": scope["path"]}
+        with self.tracer.start_span(
+            name, parent=parent, kind="SERVER", attributes=attributes
+        ) as span:
+
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    message["headers"] = list(message.get("headers", [])) + [
+                        (b"traceparent", span.context.traceparent.encode())
+                    ]
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
+
+
+def instrument_engine(engine: Engine, tracer: Optional[Tracer] = None) -> None:
+    """
+    Opens a client span around every statement executed by the engine.
+    """
+    tracer = tracer or get_tracer()
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_statement_span(conn, cursor, statement, parameters, context, many):
+        active = current_span.get()
+        if active is None or not active.is_recording:
+            return
+        span = tracer.start(
+            "db.statement",
+            kind="CLIENT",
+            attributes={
+                "db.system": engine.dialect.name,
+                "db.statement": statement,
+            },
+        )
+        conn.info.setdefault("trace_spans", []).append(span)
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def end_statement_span(conn, cursor, statement, parameters, context, many):
+        spans = conn.info.get("trace_spans")
+        if spans:
+            spans.pop().end()
+
+    @event.listens_for(engine, "handle_error")
+    def end_failed_statement_span(exception_context):
+        conn = exception_context.connection
+        spans = conn.info.get("trace_spans") if conn is not None else None
+        if spans:
+            span = spans.pop()
+            span.record_error(exception_context.original_exception)
+            span.end()
@@ -1,5 +1,53 @@
+from typing import List, Optional
+
+from graphql import FieldNode
 from strawberry import Info
+from strawberry.types import ExecutionContext
+from strawberry.utils.operation import get_first_operation
+
+from conf import get_settings
 
 
 def get_requester(info: Info) -> str:
-    return info.context["requester_data"]["name"]
+    return info.context["requester"].name
+
+
+def get_operation_name(execution_context: ExecutionContext) -> str:
+    if execution_context.operation_name:
+        return execution_context.operation_name
+    operation = get_first_operation(execution_context.graphql_document)
+    if operation is not None and operation.name is not None:
+        return operation.name.value
+    return "anonymous"
+
+
+def get_operation_label(operation_name: Optional[str]) -> str:
+    """
+    Returns the metric label of an operation.
+
+    Operation names are chosen by clients: only those listed in
+    METRICS_OPERATION_NAMES get their own series, the others are counted as
+    'other' so that the number of series stays bounded.
+    """
+    if not operation_name:
+        return ""
+    if operation_name in get_settings().METRICS_OPERATION_NAMES:
+        return operation_name
+    return "other"
+
+
+def get_root_fields(execution_context: ExecutionContext) -> List[str]:
+    """
+    Describes the root fields of an operation with their argument names.
+
+    Returns:
+        List[str]: e.g. ['bookList(f, orderBy)', 'authorDetails(authorId)'].
+    """
+    operation = get_first_operation(execution_context.graphql_document)
+    if operation is None:
+        return []
+    return [
+        f"{node.name.value}({', '.join(arg.name.value for arg in node.arguments or ())})"
+        for node in operation.selection_set.selections
+        if isinstance(node, FieldNode)
+    ]
@@ -1,12 +1,19 @@
+from datetime import date
+
 import pytest
-from sqlalchemy import create_engine
+from freezegun import freeze_time
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import Session
 from starlette.datastructures import Headers
 from starlette.requests import Request
 from strawberry.extensions import SchemaExtension
 
-from database.models import Base
+from database.db_conf import enable_sqlite_foreign_keys
+from database.models import Base, LanguageChoices
+from database.validators.author import AuthorCreateValidator
+from database.validators.book import BookCreateValidator
 from jwt_token_manager import RequesterData
+from src.database.crud_factory import AuthorSQLCrud, BookSQLCrud
 from src.permissions import HasAdminGroup
 
 
@@ -28,7 +35,9 @@ def db_url(request):
 @pytest.fixture(scope="function")
 def engine(db_url):
     """Create engine for tests"""
-    return create_engine(db_url)
+    engine = create_engine(db_url)
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
+    return engine
 
 
 @pytest.fixture(scope="function")
@@ -95,14 +104,76 @@ def admin_request_headers():
 
 @pytest.fixture
 def mock_decode_jwt_basic(mocker, request_headers):
-    mocker.patch("permissions.JWTToken.decode", return_value=request_headers)
+    return mocker.patch("extensions.JWTToken.decode", return_value=request_headers)
 
 
 @pytest.fixture
 def mock_decode_jwt_admin(mocker, admin_request_headers):
-    mocker.patch("permissions.JWTToken.decode", return_value=admin_request_headers)
+    return mocker.patch(
+        "extensions.JWTToken.decode", return_value=admin_request_headers
+    )
 
 
 @pytest.fixture(scope="session")
 def no_admin_permission_error():
     return HasAdminGroup.message
+
+
+@pytest.fixture(scope="function")
+def author_validated_data_list():
+    return [
+        AuthorCreateValidator(
+            first_name="Bram", last_name="Stoker", created_by="test_admin"
+        ),
+        AuthorCreateValidator(
+            first_name="Louis-Ferdinand", last_name="Céline", created_by="test_admin"
+        ),
+        AuthorCreateValidator(
+            first_name="John",
+            middle_name="Ronald Reuel",
+            last_name="Tolkien",
+            created_by="test_admin",
+        ),
+    ]
+
+
+@pytest.fixture(scope="function")
+def book_data_list(db_session):
+    return [
+        {
+            "title": "Dracula",
+            "authors": [1],
+            "publication_year": 1897,
+            "language": LanguageChoices.EN,
+            "category": "Horror",
+            "created_by": "test_admin",
+        },
+        {
+            "title": "Voyage au bout de la nuit",
+            "authors": [2],
+            "publication_year": 1932,
+            "language": LanguageChoices.FR,
+            "category": "Novel",
+            "created_by": "test_admin",
+        },
+        {
+            "title": "The Hobbit",
+            "authors": [3],
+            "publication_year": 1937,
+            "language": LanguageChoices.EN,
+            "category": "Fantasy",
+            "created_by": "test_admin",
+        },
+    ]
+
+
+@pytest.fixture(scope="function")
+def populate_db(db_session, author_validated_data_list, book_data_list):
+    dates = (date(2024, month, 1) for month in range(1, 7))
+    for author, book in zip(author_validated_data_list, book_data_list):
+        with freeze_time(dates):
+            author_obj = AuthorSQLCrud.create(db_session, author)
+            book_validated_data = BookCreateValidator(**book)
+            book_obj = BookSQLCrud.create(db_session, book_validated_data)
+            book_obj.authors.append(author_obj)
+            db_session.commit()
@@ -0,0 +1,149 @@
+import asyncio
+
+import pytest
+from starlette.responses import Response
+from strawberry import Schema
+
+from admission import AdmissionController, share_pool
+from conf import get_settings
+from exceptions import ServiceOverloadedError
+from extensions import AdmissionControl, JWTAuthentication
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def controller(monkeypatch):
+    controller = AdmissionController(
+        {"query:basic": 1, "query:admin": 1}, max_queue=1, max_wait_ms=50
+    )
+    monkeypatch.setattr(AdmissionControl, "controller", controller)
+    return controller
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[JWTAuthentication, AdmissionControl, override_sqlalchemy_session],
+    )
+
+
+async def test_operation_is_rejected_when_lane_is_saturated(
+    populate_db, request_obj, test_schema, controller, mock_decode_jwt_basic
+):
+    lane = controller.lanes["query:basic"]
+    await lane.acquire()
+    response = Response()
+    try:
+        result = await test_schema.execute(
+            "query { bookList { id } }",
+            context_value={"request": request_obj, "response": response},
+        )
+    finally:
+        lane.release()
+    assert result.errors[0].extensions == {"code": "SERVICE_OVERLOADED"}
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+async def test_operation_is_rejected_right_away_when_queue_is_full(
+    request_obj, test_schema, controller, mock_decode_jwt_basic
+):
+    lane = controller.lanes["query:basic"]
+    await lane.acquire()
+    waiter = asyncio.create_task(lane.acquire())
+    await asyncio.sleep(0)
+    try:
+        result = await asyncio.wait_for(
+            test_schema.execute(
+                "query { bookList { id } }", context_value={"request": request_obj}
+            ),
+            0.01,
+        )
+    finally:
+        with pytest.raises(ServiceOverloadedError):
+            await waiter
+        lane.release()
+    assert result.errors[0].extensions == {"code": "SERVICE_OVERLOADED"}
+
+
+async def test_admin_lane_is_not_affected_by_saturated_basic_lane(
+    populate_db, request_obj, test_schema, controller, mock_decode_jwt_admin
+):
+    lane = controller.lanes["query:basic"]
+    await lane.acquire()
+    try:
+        result = await test_schema.execute(
+            "query { bookList { id } }", context_value={"request": request_obj}
+        )
+    finally:
+        lane.release()
+    assert not result.errors
+
+
+@pytest.mark.parametrize(
+    "pool_size, expected",
+    [
+        (
+            10,
+            {
+                "query:basic": 5,
+                "query:admin": 2,
+                "mutation:basic": 1,
+                "mutation:admin": 2,
+            },
+        ),
+        (
+            7,
+            {
+                "query:basic": 4,
+                "query:admin": 1,
+                "mutation:basic": 1,
+                "mutation:admin": 1,
+            },
+        ),
+        (
+            4,
+            {
+                "query:basic": 1,
+                "query:admin": 1,
+                "mutation:basic": 1,
+                "mutation:admin": 1,
+            },
+        ),
+        (
+            13,
+            {
+                "query:basic": 6,
+                "query:admin": 3,
+                "mutation:basic": 1,
+                "mutation:admin": 3,
+            },
+        ),
+    ],
+)
+def test_pool_is_shared_between_lanes_without_exceeding_it(pool_size, expected):
+    shares = {
+        "query:basic": 5,
+        "query:admin": 2,
+        "mutation:basic": 1,
+        "mutation:admin": 2,
+    }
+    assert share_pool(shares, pool_size) == expected
+
+
+def test_pool_smaller_than_the_number_of_lanes_is_rejected():
+    with pytest.raises(ValueError):
+        share_pool({"query:basic": 5, "query:admin": 2}, 1)
+
+
+def test_lanes_leave_headroom_in_the_pool(monkeypatch):
+    monkeypatch.setenv("DB_CONNECTION_BUDGET", "10")
+    monkeypatch.setenv("DB_POOL_HEADROOM", "3")
+    monkeypatch.setattr(AdmissionControl, "controller", None)
+    get_settings.cache_clear()
+    try:
+        lanes = AdmissionControl.get_controller().lanes.values()
+        assert sum(lane.capacity for lane in lanes) == 7
+    finally:
+        get_settings.cache_clear()
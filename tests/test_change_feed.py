@@ -0,0 +1,25 @@
+import asyncio
+import json
+
+import change_feed
+
+
+def test_stream_changes_resumes_from_the_last_change_sent(mocker):
+    pages = [[{"id": 1}, {"id": 2}], [{"id": 3}], []]
+    read_changes = mocker.patch(
+        "change_feed.read_changes", side_effect=lambda *args: pages.pop(0)
+    )
+
+    async def take(count):
+        stream = change_feed.stream_changes(
+            0, page_size=2, poll_interval_ms=0, settle_ms=0
+        )
+        return [await anext(stream) for _ in range(count)]
+
+    chunks = asyncio.run(take(2))
+    assert [json.loads(line) for line in b"".join(chunks).splitlines()] == [
+        {"id": 1},
+        {"id": 2},
+        {"id": 3},
+    ]
+    assert [call.args[0] for call in read_changes.call_args_list] == [0, 2]
@@ -0,0 +1,164 @@
+import asyncio
+
+import pytest
+from sqlalchemy import event
+from strawberry import Schema
+
+from admission import AdmissionController
+from database.crud_factory import BookSQLCrud
+from extensions import AdmissionControl, Coalescing, JWTAuthentication
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def controller(monkeypatch):
+    controller = AdmissionController(
+        {"query:basic": 1, "query:admin": 1}, max_queue=10, max_wait_ms=1000
+    )
+    monkeypatch.setattr(AdmissionControl, "controller", controller)
+    return controller
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[
+            JWTAuthentication,
+            Coalescing,
+            AdmissionControl,
+            override_sqlalchemy_session,
+        ],
+    )
+
+
+@pytest.fixture(scope="function")
+def statements(engine):
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    yield statements
+    event.remove(engine, "before_cursor_execute", listener)
+
+
+async def execute_queued(test_schema, controller, request_obj, queries):
+    # the queries wait for the saturated lane, as they do during a traffic spike
+    lane = controller.lanes["query:basic"]
+    await lane.acquire()
+    operations = [
+        asyncio.create_task(
+            test_schema.execute(query, context_value={"request": request_obj})
+        )
+        for query in queries
+    ]
+    await asyncio.sleep(0.01)
+    lane.release()
+    return await asyncio.gather(*operations)
+
+
+async def test_identical_queries_share_one_execution(
+    populate_db,
+    request_obj,
+    test_schema,
+    controller,
+    statements,
+    mock_decode_jwt_basic,
+):
+    results = await execute_queued(
+        test_schema,
+        controller,
+        request_obj,
+        ["query { bookDetails(bookId: 1) { title } }"]
+        + ["query {\n  bookDetails(bookId: 1) {\n    title\n  }\n}"] * 2,
+    )
+    assert [result.data for result in results] == [
+        {"bookDetails": {"title": "Dracula"}}
+    ] * 3
+    assert len(statements) == 1
+    # each operation gets its own copy of the shared result
+    assert results[1].data is not results[2].data
+
+
+async def test_queries_with_different_arguments_are_executed_separately(
+    populate_db,
+    request_obj,
+    test_schema,
+    controller,
+    statements,
+    mock_decode_jwt_basic,
+):
+    results = await execute_queued(
+        test_schema,
+        controller,
+        request_obj,
+        [f"query {{ bookDetails(bookId: {id_}) {{ title }} }}" for id_ in (1, 2)],
+    )
+    assert [result.data["bookDetails"]["title"] for result in results] == [
+        "Dracula",
+        "Voyage au bout de la nuit",
+    ]
+    assert len(statements) == 2
+
+
+async def test_queries_execute_on_their_own_when_the_leading_one_fails(
+    populate_db,
+    request_obj,
+    test_schema,
+    controller,
+    statements,
+    mock_decode_jwt_basic,
+    mocker,
+):
+    get_one_by_id = BookSQLCrud.get_one_by_id
+    calls = []
+
+    def fail_first_call(*args, **kwargs):
+        calls.append(args)
+        if len(calls) == 1:
+            raise RuntimeError("transient failure")
+        return get_one_by_id(*args, **kwargs)
+
+    mocker.patch.object(BookSQLCrud, "get_one_by_id", side_effect=fail_first_call)
+    results = await execute_queued(
+        test_schema,
+        controller,
+        request_obj,
+        ["query { bookDetails(bookId: 1) { title } }"] * 3,
+    )
+    assert results[0].errors
+    assert [result.data for result in results[1:]] == [
+        {"bookDetails": {"title": "Dracula"}}
+    ] * 2
+    assert len(statements) == 2
+
+
+async def test_queries_execute_on_their_own_when_the_leading_one_is_cancelled(
+    populate_db,
+    request_obj,
+    test_schema,
+    controller,
+    statements,
+    mock_decode_jwt_basic,
+):
+    lane = controller.lanes["query:basic"]
+    await lane.acquire()
+    operations = [
+        asyncio.create_task(
+            test_schema.execute(
+                "query { bookDetails(bookId: 1) { title } }",
+                context_value={"request": request_obj},
+            )
+        )
+        for _ in range(3)
+    ]
+    await asyncio.sleep(0.01)
+    operations[0].cancel()
+    lane.release()
+    results = await asyncio.gather(*operations[1:])
+    assert [result.data for result in results] == [
+        {"bookDetails": {"title": "Dracula"}}
+    ] * 2
+    assert len(statements) == 2
@@ -0,0 +1,83 @@
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from http_compression import CompressionMiddleware, choose_coding
+
+BODY = {"data": {"bookList": [{"id": i, "title": "Dune"} for i in range(100)]}}
+
+
+def large(request):
+    return JSONResponse(BODY, headers={"ETag": '"abc"'})
+
+
+def small(request):
+    return JSONResponse({"data": None})
+
+
+def streamed(request):
+    return StreamingResponse(iter([b"a" * 2000, b"b"]), media_type="text/plain")
+
+
+@pytest.fixture(scope="module")
+def client():
+    app = Starlette(
+        routes=[
+            Route("/large", large),
+            Route("/small", small),
+            Route("/stream", streamed),
+        ]
+    )
+    app.add_middleware(CompressionMiddleware, minimum_size=500)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ("gzip, deflate", "gzip"),
+        ("br;q=0.5, gzip", "gzip"),
+        ("br, gzip;q=0.8", "br"),
+        ("*", "br"),
+        ("gzip;q=0, identity", None),
+        ("", None),
+    ],
+)
+def test_choose_coding(header, expected):
+    assert choose_coding(header, ("br", "gzip")) == expected
+
+
+def test_large_response_is_compressed_with_coding_specific_etag(client):
+    response = client.get("/large", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["etag"] == '"abc-gzip"'
+    assert response.headers["vary"] == "Accept-Encoding"
+    assert response.json() == BODY
+
+
+def test_response_is_not_compressed_when_not_accepted(client):
+    response = client.get("/large", headers={"Accept-Encoding": "identity"})
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+
+
+def test_small_response_is_not_compressed(client):
+    response = client.get("/small", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+
+
+def test_streamed_response_is_passed_through(client):
+    response = client.get("/stream", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert response.content == b"a" * 2000 + b"b"
+
+
+def test_gzip_output_is_deterministic():
+    middleware = CompressionMiddleware(None)
+    body = b"x" * 2000
+    assert middleware.compress(body, "gzip") == middleware.compress(body, "gzip")
+    assert gzip.decompress(middleware.compress(body, "gzip")) == body
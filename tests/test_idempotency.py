@@ -0,0 +1,172 @@
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.orm import Session
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from starlette.responses import Response
+from strawberry import Schema
+
+from database.models import Base, Book, IdempotencyKey
+from exceptions import IdempotencyKeyInProgressError
+from extensions import Idempotency, JWTAuthentication
+from idempotency import IdempotencyStore, dump_result
+from schema.admin import Mutation, Query
+
+NEW_BOOK_MUTATION = """mutation {
+  newBook(data: {title: "Carrie", authors: [1], publicationYear: 1974}) {
+    id
+    title
+  }
+}"""
+
+
+@pytest.fixture(scope="function")
+def db_session(tmp_path):
+    # a session that really commits, as the key is released with a rollback
+    engine = create_engine(f"sqlite:///{tmp_path}/idempotency.sqlite3")
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        yield session
+    engine.dispose()
+
+
+@pytest.fixture(scope="function")
+def store(monkeypatch):
+    store = IdempotencyStore(
+        3600, lease_seconds=60, max_key_length=16, max_response_bytes=1024
+    )
+    monkeypatch.setattr(Idempotency, "store", store)
+    return store
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session, store):
+    return Schema(
+        query=Query,
+        mutation=Mutation,
+        extensions=[JWTAuthentication, override_sqlalchemy_session, Idempotency],
+    )
+
+
+def make_request(key):
+    headers = {"authentication": "Bearer fake_secret", "idempotency-key": key}
+    return Request({"type": "http", "headers": Headers(headers).raw})
+
+
+def count_books(db_session):
+    return db_session.scalar(select(func.count()).select_from(Book))
+
+
+async def test_retried_mutation_returns_the_original_response(
+    populate_db, test_schema, db_session, mock_decode_jwt_admin
+):
+    first = await test_schema.execute(
+        NEW_BOOK_MUTATION, context_value={"request": make_request("retry-1")}
+    )
+    statements = []
+    event.listen(
+        db_session.get_bind(),
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    retry = await test_schema.execute(
+        NEW_BOOK_MUTATION, context_value={"request": make_request("retry-1")}
+    )
+    assert not first.errors
+    assert retry.data == first.data == {"newBook": {"id": 4, "title": "Carrie"}}
+    assert count_books(db_session) == 4
+    assert not [s for s in statements if s.startswith("INSERT")]
+
+
+async def test_key_reused_for_another_operation_is_rejected(
+    populate_db, test_schema, db_session, mock_decode_jwt_admin
+):
+    await test_schema.execute(
+        NEW_BOOK_MUTATION, context_value={"request": make_request("reused")}
+    )
+    response = Response()
+    result = await test_schema.execute(
+        "mutation { removeBook(bookId: 1) }",
+        context_value={"request": make_request("reused"), "response": response},
+    )
+    assert result.errors[0].extensions == {"code": "INVALID_IDEMPOTENCY_KEY"}
+    assert response.status_code == 422
+    assert count_books(db_session) == 4
+
+
+async def test_key_of_a_mutation_that_wrote_nothing_is_released(
+    populate_db, test_schema, db_session, mock_decode_jwt_admin
+):
+    result = await test_schema.execute(
+        NEW_BOOK_MUTATION.replace("[1]", "[42]"),
+        context_value={"request": make_request("failed")},
+    )
+    assert result.errors
+    assert db_session.scalar(select(func.count()).select_from(IdempotencyKey)) == 0
+
+
+async def test_key_can_be_sent_in_the_request_extensions(
+    populate_db, test_schema, db_session, mock_decode_jwt_admin, request_obj
+):
+    for _ in range(2):
+        result = await test_schema.execute(
+            NEW_BOOK_MUTATION,
+            context_value={"request": request_obj},
+            operation_extensions={"idempotencyKey": "extension"},
+        )
+        assert not result.errors
+    assert count_books(db_session) == 4
+
+
+def add_key(db_session, key, created_on, fingerprint="other", response=None):
+    db_session.add(
+        IdempotencyKey(
+            requester="test_admin",
+            key=key,
+            fingerprint=fingerprint,
+            response=response,
+            created_on=created_on,
+        )
+    )
+    db_session.commit()
+
+
+async def test_expired_key_is_reclaimed_for_the_new_operation(
+    populate_db, test_schema, db_session, mock_decode_jwt_admin
+):
+    stale = {"data": {"removeBook": True}}
+    add_key(db_session, "expired", datetime.now() - timedelta(hours=2), response=stale)
+    result = await test_schema.execute(
+        NEW_BOOK_MUTATION, context_value={"request": make_request("expired")}
+    )
+    assert result.data == {"newBook": {"id": 4, "title": "Carrie"}}
+    stored = db_session.get(IdempotencyKey, ("test_admin", "expired"))
+    db_session.refresh(stored)
+    assert stored.response == dump_result(result)
+    assert count_books(db_session) == 4
+
+
+def test_expired_key_reclaimed_concurrently_is_in_progress(db_session, store):
+    add_key(db_session, "expired", datetime.now() - timedelta(hours=2))
+    # loaded by this execution before a concurrent one reclaims the key
+    db_session.get(IdempotencyKey, ("test_admin", "expired"))
+    with Session(db_session.get_bind()) as concurrent:
+        assert store.claim(concurrent, "test_admin", "expired", "fingerprint") is None
+        concurrent.commit()
+    with pytest.raises(IdempotencyKeyInProgressError):
+        store.claim(db_session, "test_admin", "expired", "fingerprint")
+
+
+def test_key_claimed_by_a_running_execution_is_in_progress(db_session, store):
+    add_key(db_session, "running", datetime.now())
+    with pytest.raises(IdempotencyKeyInProgressError):
+        store.claim(db_session, "test_admin", "running", "other")
+
+
+def test_key_without_response_after_its_lease_is_answered_as_applied(db_session, store):
+    add_key(db_session, "lost", datetime.now() - timedelta(minutes=5))
+    result = store.claim(db_session, "test_admin", "lost", "other")
+    assert result.data is None
+    assert result.errors[0].extensions == {"code": "IDEMPOTENT_RESPONSE_UNAVAILABLE"}
@@ -0,0 +1,37 @@
+import json
+import sys
+from datetime import date
+
+import pytest
+
+from database.models import LanguageChoices
+from json_encoding import JSONEncoder, OrjsonEncoder, load_json_encoder
+
+DATA = {
+    "data": {"bookList": [{"id": 1, "title": "Dune", "publicationYear": 1965}]},
+    "extensions": {"createdOn": date(2024, 5, 1), "language": LanguageChoices.FR},
+}
+EXPECTED = {
+    "data": {"bookList": [{"id": 1, "title": "Dune", "publicationYear": 1965}]},
+    "extensions": {"createdOn": "2024-05-01", "language": "French"},
+}
+
+
+@pytest.mark.parametrize("name", ["json", "orjson", "msgspec"])
+def test_encoders_produce_the_same_json(name):
+    encoder = load_json_encoder(name)
+    if encoder.name != name:
+        pytest.skip(f"{name} is not installed")
+    assert json.loads(encoder.encode(DATA)) == EXPECTED
+
+
+def test_auto_encoder_prefers_a_fast_encoder():
+    pytest.importorskip("orjson")
+    assert isinstance(load_json_encoder("auto"), OrjsonEncoder)
+
+
+def test_encoder_falls_back_to_json_when_not_installed(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+    monkeypatch.setitem(sys.modules, "msgspec", None)
+    assert type(load_json_encoder("auto")) is JSONEncoder
+    assert type(load_json_encoder("orjson")) is JSONEncoder
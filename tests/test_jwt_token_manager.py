@@ -0,0 +1,103 @@
+import asyncio
+import contextlib
+import json
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives.asymmetric import rsa
+from jwt.algorithms import RSAAlgorithm
+from pydantic import ValidationError
+
+from conf import Settings, get_settings
+from exceptions import JWTTokenInvalidError
+from jwt_token_manager import JWKSCache, JWTToken, get_key_set
+
+
+def clear_caches():
+    get_settings.cache_clear()
+    get_key_set.cache_clear()
+
+
+@pytest.fixture(scope="module")
+def private_key():
+    return rsa.generate_private_key(public_exponent=65537, key_size=2048)
+
+
+@pytest.fixture(scope="function")
+def jwks_file(tmp_path, private_key):
+    jwk = json.loads(RSAAlgorithm.to_jwk(private_key.public_key()))
+    path = tmp_path / "jwks.json"
+    path.write_text(json.dumps({"keys": [jwk | {"kid": "key-1", "use": "sig"}]}))
+    return path
+
+
+@pytest.fixture(scope="function")
+def jwks_settings(monkeypatch, jwks_file):
+    monkeypatch.setenv("JWT_ALG", "RS256")
+    monkeypatch.setenv("JWT_JWKS_FILE", str(jwks_file))
+    clear_caches()
+    get_key_set().load()
+    yield
+    clear_caches()
+
+
+def sign(private_key, kid):
+    payload = {"name": "test_user", "groups": ["basic"]}
+    return jwt.encode(payload, private_key, "RS256", headers={"kid": kid})
+
+
+def test_decode_token_signed_with_key_from_jwks(jwks_settings, private_key):
+    requester = JWTToken.decode(sign(private_key, "key-1"))
+    assert requester.name == "test_user"
+    assert requester.groups == frozenset({"basic"})
+
+
+def test_decode_token_with_unknown_kid_requests_refresh(jwks_settings, private_key):
+    with pytest.raises(JWTTokenInvalidError):
+        JWTToken.decode(sign(private_key, "key-2"))
+    assert get_key_set()._refresh_requested.is_set()
+
+
+async def test_unknown_kids_do_not_refresh_more_than_once_per_interval(
+    jwks_file, mocker
+):
+    key_set = JWKSCache(str(jwks_file), refresh_interval=3600, min_refresh_interval=60)
+    load = mocker.patch.object(key_set, "load")
+    task = asyncio.create_task(key_set.refresh_forever())
+    try:
+        for kid in ("key-2", "key-3", "key-4"):
+            with pytest.raises(JWTTokenInvalidError):
+                key_set.get_key(kid)
+            await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    assert load.call_count == 1
+
+
+def test_decode_token_with_shared_secret_when_no_jwks_is_configured():
+    token = jwt.encode({"name": "test_user", "groups": []}, "test_secret", "HS256")
+    assert JWTToken.decode(token).name == "test_user"
+
+
+async def test_unknown_kid_from_a_worker_thread_wakes_the_refresh(jwks_file, mocker):
+    key_set = JWKSCache(str(jwks_file), refresh_interval=3600, min_refresh_interval=60)
+    load = mocker.patch.object(key_set, "load")
+    task = asyncio.create_task(key_set.refresh_forever())
+    try:
+        await asyncio.sleep(0)
+        with pytest.raises(JWTTokenInvalidError):
+            await asyncio.to_thread(key_set.get_key, "key-2")
+        await asyncio.sleep(0.05)
+    finally:
+        task.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await task
+    assert load.call_count == 1
+
+
+def test_settings_require_a_secret_without_jwks(monkeypatch):
+    monkeypatch.delenv("JWT_SECRET")
+    with pytest.raises(ValidationError, match="JWT_SECRET is required"):
+        Settings()
@@ -0,0 +1,75 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.orm import sessionmaker
+from strawberry import Schema
+
+from database.lazy_session import LazySession
+from database.models import Base, Book
+from database.pool_metrics import instrument_pool, pool_checkouts
+from extensions import JWTAuthentication, SQLAlchemySession
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/lazy.sqlite3")
+    Base.metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Book),
+            [
+                {
+                    "title": "T",
+                    "publication_year": 2000,
+                    "language": "EN",
+                    "created_by": "t",
+                    "created_on": date(2024, 1, 1),
+                }
+            ],
+        )
+    instrument_pool(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_session_is_created_on_first_use(mocker, engine):
+    factory = mocker.Mock(side_effect=sessionmaker(engine))
+    session = LazySession(factory, "query")
+    session.close()
+    assert not session.is_materialized
+    assert session.scalar(select(Book.title)) == "T"
+    factory.assert_called_once_with()
+    session.close()
+
+
+def test_release_returns_the_connection_and_keeps_objects_loaded(engine):
+    session = LazySession(sessionmaker(engine), "query", expire_on_commit=False)
+    book = session.scalars(select(Book)).one()
+    assert engine.pool.checkedout() == 1
+    session.release()
+    assert engine.pool.checkedout() == 0
+    # reading the loaded object does not check out a connection again
+    assert book.title == "T"
+    assert engine.pool.checkedout() == 0
+    session.close()
+
+
+async def test_operations_not_touching_the_db_check_out_no_connection(
+    mocker, engine, request_obj, mock_decode_jwt_basic
+):
+    mocker.patch("database.db_conf.SessionLocal", sessionmaker(engine))
+    schema = Schema(query=Query, extensions=[JWTAuthentication, SQLAlchemySession])
+    checkouts = sum(pool_checkouts.values.values())
+    result = await schema.execute(
+        "query { __typename }", context_value={"request": request_obj}
+    )
+    assert not result.errors
+    assert sum(pool_checkouts.values.values()) == checkouts
+    result = await schema.execute(
+        "query { bookList { title } }", context_value={"request": request_obj}
+    )
+    assert result.data == {"bookList": [{"title": "T"}]}
+    assert sum(pool_checkouts.values.values()) == checkouts + 1
+    assert engine.pool.checkedout() == 0
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+import sys
+import time
+
+import pytest
+
+import metrics
+from loop_watchdog import LoopWatchdog
+from operation_context import current_operation, current_resolver
+
+
+def block_the_loop():
+    time.sleep(0.3)
+
+
+@pytest.fixture(scope="function")
+async def watchdog():
+    watchdog = LoopWatchdog(interval_ms=10, threshold_ms=100)
+    watchdog.start()
+    yield watchdog
+    watchdog.stop()
+
+
+async def run_blocking_operation():
+    current_operation.set("BlockingOperation")
+    current_resolver.set("Query.bookList")
+    block_the_loop()
+    await asyncio.sleep(0.05)
+
+
+async def test_blocking_call_is_reported_with_its_stack(watchdog, caplog):
+    with caplog.at_level(logging.WARNING, logger="loop_watchdog"):
+        await asyncio.create_task(run_blocking_operation())
+    [record] = caplog.records
+    assert record.getMessage().startswith("Event loop blocked for more than")
+    assert "block_the_loop" in record.getMessage()
+    assert "event_loop_lag_seconds_count" in metrics.render()
+
+
+@pytest.mark.skipif(sys.version_info < (3, 12), reason="needs Task.get_context")
+async def test_blocking_call_is_attributed_to_running_operation(watchdog, caplog):
+    with caplog.at_level(logging.WARNING, logger="loop_watchdog"):
+        await asyncio.create_task(run_blocking_operation())
+    [record] = caplog.records
+    assert "operation: BlockingOperation" in record.getMessage()
+    assert "resolver: Query.bookList" in record.getMessage()
+
+
+async def test_non_blocking_code_is_not_reported(watchdog, caplog):
+    with caplog.at_level(logging.WARNING, logger="loop_watchdog"):
+        await asyncio.sleep(0.2)
+    assert not caplog.records
@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from strawberry import Schema
+
+import metrics
+from conf import get_settings
+from extensions import JWTAuthentication, MemoryAccounting
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[JWTAuthentication, override_sqlalchemy_session, MemoryAccounting],
+    )
+
+
+@pytest.fixture(scope="function")
+def sample_all_operations(monkeypatch):
+    monkeypatch.setenv("MEMORY_ACCOUNTING_SAMPLE_RATE", "1")
+    monkeypatch.setenv("METRICS_OPERATION_NAMES", '["LandingPage"]')
+    get_settings.cache_clear()
+    yield
+    get_settings.cache_clear()
+
+
+async def test_memory_of_sampled_operation_is_recorded(
+    populate_db,
+    request_obj,
+    test_schema,
+    sample_all_operations,
+    mock_decode_jwt_basic,
+    caplog,
+):
+    with caplog.at_level(logging.INFO, logger="extensions"):
+        result = await test_schema.execute(
+            'query LandingPage { bookList(f: {title: "dra"}) { id title } }',
+            context_value={"request": request_obj},
+        )
+    assert not result.errors
+    [record] = [r for r in caplog.records if r.getMessage().startswith("Operation")]
+    assert "'operation': 'LandingPage'" in record.getMessage()
+    assert "'fields': ['bookList(f)']" in record.getMessage()
+    assert 'graphql_operation_peak_memory_bytes_count{operation="LandingPage"} 1' in (
+        metrics.render()
+    )
+
+
+async def test_memory_of_unlisted_operation_is_recorded_as_other(
+    populate_db, request_obj, test_schema, sample_all_operations, mock_decode_jwt_basic
+):
+    result = await test_schema.execute(
+        "query Unlisted { bookList { id } }", context_value={"request": request_obj}
+    )
+    assert not result.errors
+    rendered = metrics.render()
+    assert 'operation="Unlisted"' not in rendered
+    assert 'graphql_operation_peak_memory_bytes_count{operation="other"}' in rendered
+
+
+async def test_memory_is_not_recorded_when_not_sampled(
+    populate_db, request_obj, test_schema, mock_decode_jwt_basic, caplog
+):
+    with caplog.at_level(logging.INFO, logger="extensions"):
+        result = await test_schema.execute(
+            "query NotSampled { bookList { id } }",
+            context_value={"request": request_obj},
+        )
+    assert not result.errors
+    assert not caplog.records
+    assert 'operation="NotSampled"' not in metrics.render()
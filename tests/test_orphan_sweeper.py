@@ -0,0 +1,59 @@
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+
+from database.models import Author, Base, Book, book_authors
+from database.orphan_sweeper import OrphanSweeper
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/sweeper.sqlite3")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def insert_orphans(engine):
+    with engine.begin() as conn:
+        # rows left behind by deletes made before foreign keys cascaded
+        conn.exec_driver_sql("PRAGMA foreign_keys=OFF")
+        conn.execute(
+            insert(Author),
+            [{"id": 1, "first_name": "A", "last_name": "B", "created_by": "t"}],
+        )
+        conn.execute(
+            insert(Book),
+            [
+                {
+                    "id": 1,
+                    "title": "T",
+                    "publication_year": 2000,
+                    "language": "EN",
+                    "created_by": "t",
+                }
+            ],
+        )
+        conn.execute(
+            insert(book_authors),
+            [
+                {"book_id": 1, "authors_id": 1},
+                {"book_id": 2, "authors_id": 1},
+                {"book_id": 3, "authors_id": 1},
+                {"book_id": 1, "authors_id": 4},
+                {"book_id": None, "authors_id": 1},
+            ],
+        )
+
+
+def test_sweep_deletes_orphaned_links_in_batches(engine):
+    insert_orphans(engine)
+    statements = []
+    event.listen(
+        engine,
+        "before_cursor_execute",
+        lambda conn, cursor, statement, *args: statements.append(statement),
+    )
+    assert OrphanSweeper(engine, batch_size=1, interval=60).sweep() == 4
+    with engine.connect() as conn:
+        assert conn.execute(select(book_authors)).all() == [(1, 1)]
+    assert sum(s.startswith("DELETE") for s in statements) == 4
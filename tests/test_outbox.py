@@ -0,0 +1,48 @@
+from datetime import datetime, timedelta
+
+import pytest
+from freezegun import freeze_time
+from sqlalchemy import create_engine, select
+from sqlalchemy.orm import Session
+
+from database.models import Base, Book, Change
+from database.outbox import (
+    RECORDED_CHANGES,
+    UPDATE,
+    get_changes_since,
+    record_changes,
+)
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/outbox.sqlite3")
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def test_changes_are_stamped_with_the_database_clock_at_commit(engine):
+    with Session(engine) as session:
+        with freeze_time(datetime.now() - timedelta(hours=1)):
+            record_changes(session, Book, UPDATE, [(1, 2), (2, 3)], ["title"])
+        session.commit()
+        changed_on = session.scalars(select(Change.changed_on)).all()
+    assert all(datetime.now() - stamp < timedelta(minutes=1) for stamp in changed_on)
+
+
+def test_changes_are_returned_once_settled(engine):
+    with Session(engine) as session:
+        record_changes(session, Book, UPDATE, [(1, 2)])
+        session.commit()
+        assert get_changes_since(session, 0, limit=10, settle_ms=60000) == []
+        assert [
+            change.entity_id for change in get_changes_since(session, 0, 10, 0)
+        ] == [1]
+
+
+def test_changes_rolled_back_are_forgotten(engine):
+    with Session(engine) as session:
+        record_changes(session, Book, UPDATE, [(1, 2)])
+        session.rollback()
+        assert RECORDED_CHANGES not in session.info
@@ -0,0 +1,88 @@
+import cProfile
+import os
+
+import pytest
+from starlette.datastructures import Headers
+from starlette.requests import Request
+from strawberry import Schema
+
+from extensions import JWTAuthentication, Profiling
+from op_profiling import dump
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[JWTAuthentication, override_sqlalchemy_session, Profiling],
+    )
+
+
+@pytest.fixture(scope="session")
+def profiling_request_obj():
+    return Request(
+        {
+            "type": "http",
+            "headers": Headers(
+                {"authentication": "Bearer fake_secret", "x-profile": "1"}
+            ).raw,
+        }
+    )
+
+
+async def test_operation_is_profiled_for_admin_sending_profile_header(
+    populate_db, profiling_request_obj, test_schema, mock_decode_jwt_admin
+):
+    result = await test_schema.execute(
+        "query { bookList { id title } }",
+        context_value={"request": profiling_request_obj},
+    )
+    assert not result.errors
+    profile = result.extensions["profile"]
+    assert profile["sqlMs"] > 0
+    assert profile["totalMs"] == pytest.approx(
+        profile["sqlMs"] + profile["pythonMs"], abs=0.01
+    )
+    assert profile["top"]
+    assert set(profile["top"][0]) == {"function", "calls", "totalMs", "cumulativeMs"}
+
+
+async def test_operation_is_not_profiled_for_basic_user(
+    populate_db, profiling_request_obj, test_schema, mock_decode_jwt_basic
+):
+    result = await test_schema.execute(
+        "query { bookList { id } }", context_value={"request": profiling_request_obj}
+    )
+    assert not result.errors
+    assert "profile" not in (result.extensions or {})
+
+
+async def test_operation_is_not_profiled_without_profile_header(
+    populate_db, request_obj, test_schema, mock_decode_jwt_admin
+):
+    result = await test_schema.execute(
+        "query { bookList { id } }", context_value={"request": request_obj}
+    )
+    assert not result.errors
+    assert "profile" not in (result.extensions or {})
+
+
+async def test_operation_is_not_profiled_while_others_are_in_flight(
+    populate_db, profiling_request_obj, test_schema, mock_decode_jwt_admin, monkeypatch
+):
+    monkeypatch.setattr(Profiling, "in_flight", 1)
+    result = await test_schema.execute(
+        "query { bookList { id } }", context_value={"request": profiling_request_obj}
+    )
+    assert not result.errors
+    assert result.extensions["profile"] == {
+        "skipped": "concurrent operations in flight"
+    }
+    assert Profiling.in_flight == 1
+
+
+def test_dump_keeps_the_file_in_the_output_directory(tmp_path):
+    path = dump(cProfile.Profile(), str(tmp_path), "../../etc/passwd")
+    assert os.path.dirname(path) == str(tmp_path)
+    assert os.path.basename(path).startswith("______etc_passwd-")
@@ -0,0 +1,122 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, event, insert, select
+
+from database.db_conf import enable_sqlite_foreign_keys
+from database.models import Author, Base, Book, IdempotencyKey, book_authors
+from database.purger import Purger
+
+
+@pytest.fixture(scope="function")
+def engine(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/purger.sqlite3")
+    event.listen(engine, "connect", enable_sqlite_foreign_keys)
+    Base.metadata.create_all(engine)
+    yield engine
+    engine.dispose()
+
+
+def insert_deleted(engine):
+    long_ago = datetime.now() - timedelta(days=2)
+    with engine.begin() as conn:
+        conn.execute(
+            insert(Author),
+            [
+                {
+                    "id": id_,
+                    "first_name": "A",
+                    "last_name": "B",
+                    "created_by": "t",
+                    "deleted_on": deleted_on,
+                }
+                for id_, deleted_on in ((1, None), (2, None), (3, long_ago))
+            ],
+        )
+        conn.execute(
+            insert(Book),
+            [
+                {
+                    "id": id_,
+                    "title": "T",
+                    "publication_year": 2000,
+                    "language": "EN",
+                    "created_by": "t",
+                    "deleted_on": deleted_on,
+                }
+                for id_, deleted_on in (
+                    (1, None),
+                    (2, long_ago),
+                    (3, long_ago),
+                    (4, datetime.now()),
+                )
+            ],
+        )
+        conn.execute(
+            insert(book_authors),
+            [
+                {"book_id": 1, "authors_id": 1},
+                {"book_id": 1, "authors_id": 3},
+                {"book_id": 2, "authors_id": 1},
+                {"book_id": 3, "authors_id": 2},
+                {"book_id": 4, "authors_id": 2},
+            ],
+        )
+
+
+def test_purge_deletes_objects_deleted_before_the_grace_period(engine):
+    insert_deleted(engine)
+    purger = Purger(engine, batch_size=1, grace_seconds=3600, interval=60)
+    assert asyncio.run(purger.purge()) == 3
+    with engine.connect() as conn:
+        assert conn.scalars(select(Book.id)).all() == [1, 4]
+        assert conn.scalars(select(Author.id)).all() == [1, 2]
+        assert conn.execute(select(book_authors)).all() == [(1, 1), (4, 2)]
+
+
+def test_purge_stops_when_the_service_is_busy(engine):
+    insert_deleted(engine)
+    purger = Purger(
+        engine, batch_size=1, grace_seconds=3600, interval=60, is_quiet=lambda: False
+    )
+    assert asyncio.run(purger.purge()) == 0
+    with engine.connect() as conn:
+        assert conn.scalars(select(Book.id)).all() == [1, 2, 3, 4]
+
+
+def test_purge_deletes_expired_idempotency_keys(engine):
+    with engine.begin() as conn:
+        conn.execute(
+            insert(IdempotencyKey),
+            [
+                {
+                    "requester": "test_admin",
+                    "key": key,
+                    "fingerprint": "",
+                    "created_on": datetime.now() - timedelta(hours=hours),
+                }
+                for key, hours in (("old", 2), ("older", 3), ("recent", 0))
+            ],
+        )
+    purger = Purger(
+        engine, batch_size=1, grace_seconds=3600, interval=60, key_ttl_seconds=3600
+    )
+    assert asyncio.run(purger.purge()) == 2
+    with engine.connect() as conn:
+        assert conn.scalars(select(IdempotencyKey.key)).all() == ["recent"]
+
+
+def test_purge_keeps_soft_deleted_objects_when_soft_delete_is_disabled(engine):
+    insert_deleted(engine)
+    purger = Purger(
+        engine,
+        batch_size=1,
+        grace_seconds=3600,
+        interval=60,
+        key_ttl_seconds=3600,
+        purge_soft_deleted=False,
+    )
+    assert asyncio.run(purger.purge()) == 0
+    with engine.connect() as conn:
+        assert conn.scalars(select(Book.id)).all() == [1, 2, 3, 4]
@@ -0,0 +1,65 @@
+import pytest
+from starlette.responses import Response
+from strawberry import Schema
+
+from extensions import JWTAuthentication, RateLimiting
+from rate_limit import InMemoryBackend, RateLimiter
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def limiter(monkeypatch):
+    limiter = RateLimiter(InMemoryBackend(), {"basic": 2, "admin": 10}, window=60)
+    monkeypatch.setattr(RateLimiting, "limiter", limiter)
+    return limiter
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[JWTAuthentication, RateLimiting, override_sqlalchemy_session],
+    )
+
+
+async def execute(test_schema, request_obj, query):
+    response = Response()
+    result = await test_schema.execute(
+        query, context_value={"request": request_obj, "response": response}
+    )
+    return result, response
+
+
+async def test_operation_cost_is_taken_from_requester_bucket(
+    populate_db, request_obj, test_schema, limiter, mock_decode_jwt_basic
+):
+    result, response = await execute(test_schema, request_obj, "{ bookList { id } }")
+    assert not result.errors
+    assert response.headers["RateLimit-Policy"] == "2;w=60"
+    assert response.headers["RateLimit-Limit"] == "2"
+    assert response.headers["RateLimit-Remaining"] == "1"
+    assert response.headers["RateLimit-Reset"] == "30"
+
+
+async def test_operation_over_quota_is_rejected(
+    populate_db, request_obj, test_schema, limiter, mock_decode_jwt_basic
+):
+    query = "{ bookList { id } authorList { id } }"
+    result, _ = await execute(test_schema, request_obj, query)
+    assert not result.errors
+    result, response = await execute(test_schema, request_obj, query)
+    assert result.errors[0].extensions["code"] == "RATE_LIMITED"
+    assert response.status_code == 429
+    assert response.headers["Retry-After"] == "60"
+    assert response.headers["RateLimit-Remaining"] == "0"
+
+
+async def test_admin_quota_applies_to_admin_requester(
+    populate_db, request_obj, test_schema, limiter, mock_decode_jwt_admin
+):
+    for _ in range(3):
+        result, response = await execute(
+            test_schema, request_obj, "{ bookList { id } }"
+        )
+        assert not result.errors
+    assert response.headers["RateLimit-Remaining"] == "7"
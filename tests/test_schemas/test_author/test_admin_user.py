@@ -4,13 +4,17 @@ import pytest
 from freezegun import freeze_time
 from strawberry import Schema
 
+from database.models import Author, Book, LanguageChoices
+from extensions import JWTAuthentication
 from src.schema.admin import Mutation, Query
 
 
 @pytest.fixture(scope="function")
 def test_schema(override_sqlalchemy_session):
     return Schema(
-        query=Query, mutation=Mutation, extensions=[override_sqlalchemy_session]
+        query=Query,
+        mutation=Mutation,
+        extensions=[JWTAuthentication, override_sqlalchemy_session],
     )
 
 
@@ -134,6 +138,31 @@ class TestAuthorListAdmin:
             <= "2024-02-15"
         )
 
+    async def test_author_list_admin_query_with_has_books_filter(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        author = db_session.get(Author, 1)
+        db_session.add(
+            Book(
+                title="Dracula",
+                publication_year=1897,
+                language=LanguageChoices.EN,
+                created_by="test_admin",
+                authors=[author],
+            )
+        )
+        db_session.commit()
+        query = "query { authorListAdmin(f: {hasBooks: %s}) { id } }"
+        result = await test_schema.execute(
+            query % "true", context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert result.data["authorListAdmin"] == [{"id": 1}]
+        result = await test_schema.execute(
+            query % "false", context_value={"request": request_obj}
+        )
+        assert {a["id"] for a in result.data["authorListAdmin"]} == {2, 3}
+
     async def test_author_list_admin_query_as_basic_user_throws_error(
         self,
         request_obj,
@@ -385,6 +414,28 @@ class TestAuthorUpdate:
         assert result.errors
         assert result.errors[0].message == no_admin_permission_error
 
+    async def test_update_author_mutation_with_stale_expected_version(
+        self, populate_db, request_obj, test_schema, mock_decode_jwt_admin
+    ):
+        mutation = """mutation {
+          modifyAuthor(authorId: 3, data: {firstName: "J.R.R."}, expectedVersion: 1) {
+            version
+          }
+        }"""
+        result = await test_schema.execute(
+            mutation, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert result.data["modifyAuthor"] == {"version": 2}
+        result = await test_schema.execute(
+            mutation, context_value={"request": request_obj}
+        )
+        assert result.errors[0].extensions == {
+            "code": "VERSION_CONFLICT",
+            "expectedVersion": 1,
+            "currentVersion": 2,
+        }
+
 
 class TestAuthorDelete:
     @pytest.fixture(scope="function")
@@ -1,12 +1,15 @@
 import pytest
 from strawberry import Schema
 
+from extensions import JWTAuthentication
 from src.schema.basic import Query
 
 
 @pytest.fixture(scope="function")
 def test_schema(override_sqlalchemy_session):
-    return Schema(query=Query, extensions=[override_sqlalchemy_session])
+    return Schema(
+        query=Query, extensions=[JWTAuthentication, override_sqlalchemy_session]
+    )
 
 
 class TestAuthorList:
@@ -81,6 +84,28 @@ class TestAuthorList:
         for author in result.data["authorList"]:
             assert "co" in author["lastName"].lower()
 
+    async def test_author_list_query_as_basic_user_with_order_by(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_basic,
+    ):
+        query = """query {
+            authorList(orderBy: [{field: LAST_NAME, direction: DESC}]) {
+                lastName
+            }
+        }"""
+        result = await test_schema.execute(
+            query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert [a["lastName"] for a in result.data["authorList"]] == [
+            "Tolkien",
+            "Cooper",
+            "Cole",
+        ]
+
 
 class TestAuthorDetails:
     @pytest.fixture(scope="function")
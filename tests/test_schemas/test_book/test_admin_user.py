@@ -1,10 +1,15 @@
-from datetime import date
+from datetime import date, datetime
 
 import pytest
 from freezegun import freeze_time
+from sqlalchemy import event, insert, select, update
 from strawberry import Schema
 
+from conf import get_settings
 from database.crud_factory import AuthorSQLCrud, BookSQLCrud
+from database.models import Author as AuthorModel
+from database.models import book_authors
+from extensions import JWTAuthentication
 from filters.book import BookAdminFilter
 from schema.admin import Mutation, Query
 
@@ -12,7 +17,9 @@ from schema.admin import Mutation, Query
 @pytest.fixture(scope="function")
 def test_schema(override_sqlalchemy_session):
     return Schema(
-        query=Query, mutation=Mutation, extensions=[override_sqlalchemy_session]
+        query=Query,
+        mutation=Mutation,
+        extensions=[JWTAuthentication, override_sqlalchemy_session],
     )
 
 
@@ -485,6 +492,17 @@ class TestBookUpdate:
           }
         }"""
 
+    @pytest.fixture(scope="function")
+    def soft_deleted_coauthor(self, db_session):
+        """Link author 2 to book 1, then soft-delete it."""
+        db_session.execute(insert(book_authors).values(book_id=1, authors_id=2))
+        db_session.execute(
+            update(AuthorModel)
+            .where(AuthorModel.id == 2)
+            .values(deleted_on=datetime.now())
+        )
+        db_session.commit()
+
     async def test_book_update_mutation(
         self,
         populate_db,
@@ -519,6 +537,35 @@ class TestBookUpdate:
             "lastUpdatedOn": "2024-05-01",
         }
 
+    async def test_update_book_mutation_with_expected_version(
+        self, populate_db, request_obj, test_schema, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              modifyBook(bookId: 3, data: {title: "The Hobbit"}, expectedVersion: 1) {
+                title
+                version
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["modifyBook"] == {"title": "The Hobbit", "version": 2}
+
+    async def test_update_book_mutation_with_stale_expected_version(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              modifyBook(bookId: 3, data: {title: "Lost"}, expectedVersion: 0) {
+                title
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert result.errors[0].extensions["code"] == "VERSION_CONFLICT"
+        assert BookSQLCrud.get_one_by_id(db_session, 3).title == "The Hobbit"
+
     async def test_update_book_mutation_when_book_id_does_not_exist(
         self,
         populate_db,
@@ -581,6 +628,42 @@ class TestBookUpdate:
         )
         assert result.errors
 
+    async def test_update_book_mutation_when_removing_the_sole_live_author(
+        self,
+        populate_db,
+        soft_deleted_coauthor,
+        request_obj,
+        graphql_update_book_mutation_remove_unique_author,
+        test_schema,
+        mock_decode_jwt_admin,
+    ):
+        result = await test_schema.execute(
+            graphql_update_book_mutation_remove_unique_author,
+            context_value={"request": request_obj},
+        )
+        assert result.errors
+
+    async def test_update_book_mutation_does_not_return_soft_deleted_authors(
+        self,
+        populate_db,
+        soft_deleted_coauthor,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_admin,
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              modifyBook(bookId: 1, data: {title: "Dracula"}) {
+                authors {
+                  id
+                }
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["modifyBook"] == {"authors": [{"id": 1}]}
+
     async def test_update_book_mutation_when_removing_author_that_does_not_exist(
         self,
         populate_db,
@@ -609,6 +692,33 @@ class TestBookUpdate:
         )
         assert not result.errors
 
+    async def test_update_book_mutation_statement_count_does_not_depend_on_authors(
+        self, populate_db, request_obj, test_schema, engine, mock_decode_jwt_admin
+    ):
+        statements = []
+
+        def listener(conn, cursor, statement, *args):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", listener)
+        counts = []
+        try:
+            for book_id, authors in ((1, "[2]"), (2, "[1, 3]")):
+                statements.clear()
+                result = await test_schema.execute(
+                    f"""mutation {{
+                      modifyBook(bookId: {book_id}, data: {{addAuthors: {authors}}}) {{
+                        id
+                      }}
+                    }}""",
+                    context_value={"request": request_obj},
+                )
+                assert not result.errors
+                counts.append(len(statements))
+        finally:
+            event.remove(engine, "before_cursor_execute", listener)
+        assert counts[0] == counts[1] > 0
+
     async def test_update_book_mutation_as_basic_user_throws_error(
         self,
         request_obj,
@@ -650,6 +760,23 @@ class TestAuthorDelete:
         )
         assert result.data["removeBook"]
 
+    async def test_delete_book_mutation_soft_deletes_book(
+        self,
+        populate_db,
+        request_obj,
+        graphql_delete_book_mutation,
+        test_schema,
+        db_session,
+        mock_decode_jwt_admin,
+    ):
+        await test_schema.execute(
+            graphql_delete_book_mutation, context_value={"request": request_obj}
+        )
+        assert [b.id for b in BookSQLCrud.get_many_by_values(db_session)] == [2, 3]
+        # the links of soft-deleted books are only deleted when they get purged
+        book_ids = db_session.scalars(select(book_authors.c.book_id)).all()
+        assert sorted(book_ids) == [1, 2, 3]
+
     async def test_delete_book_mutation_when_book_id_does_not_exist(
         self,
         populate_db,
@@ -677,3 +804,162 @@ class TestAuthorDelete:
         )
         assert result.errors
         assert result.errors[0].message == no_admin_permission_error
+
+
+class TestBookBulkMutations:
+    async def test_update_books_mutation(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              updateBooks(f: {createdBy: "test_admin", publicationYear: 1937},
+                          data: {category: "Classic"}) {
+                affected
+                dryRun
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["updateBooks"] == {"affected": 1, "dryRun": False}
+        book_obj = BookSQLCrud.get_one_by_id(db_session, 3)
+        db_session.refresh(book_obj)
+        assert (book_obj.category, book_obj.version) == ("Classic", 2)
+
+    async def test_remove_books_mutation_dry_run(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              removeBooks(f: {lookup: {language: {eq: "English"}}}, dryRun: true) {
+                affected
+                dryRun
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["removeBooks"] == {"affected": 2, "dryRun": True}
+        assert len(BookSQLCrud.get_many_by_values(db_session)) == 3
+
+    async def test_remove_books_mutation_with_filter_on_authors(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            """mutation {
+              removeBooks(f: {authorLastName: "Tolkien"}) {
+                affected
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["removeBooks"] == {"affected": 1}
+        assert [b.id for b in BookSQLCrud.get_many_by_values(db_session)] == [1, 2]
+
+    async def test_remove_books_mutation_dry_run_counts_books_once(
+        self, populate_db, request_obj, test_schema, db_session, mock_decode_jwt_admin
+    ):
+        # book 1 matches the filter through both of its authors
+        db_session.execute(insert(book_authors).values(book_id=1, authors_id=3))
+        db_session.commit()
+        result = await test_schema.execute(
+            """mutation {
+              removeBooks(
+                f: {lookup: {authorLastName: {in_: ["Stoker", "Tolkien"]}}},
+                dryRun: true
+              ) {
+                affected
+              }
+            }""",
+            context_value={"request": request_obj},
+        )
+        assert not result.errors
+        assert result.data["removeBooks"] == {"affected": 2}
+
+    async def test_remove_books_mutation_without_filter_criteria_is_rejected(
+        self, populate_db, request_obj, test_schema, mock_decode_jwt_admin
+    ):
+        result = await test_schema.execute(
+            "mutation { removeBooks(f: {}) { affected } }",
+            context_value={"request": request_obj},
+        )
+        assert result.errors
+
+
+class TestChangeFeed:
+    @pytest.fixture(scope="function")
+    def graphql_changes_since_query(self):
+        return """query {
+          changesSince(cursor: 0) {
+            changes { entity entityId operation fields version }
+            cursor
+          }
+        }"""
+
+    async def test_mutations_are_recorded_in_the_change_feed(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        graphql_changes_since_query,
+        mock_decode_jwt_admin,
+        monkeypatch,
+    ):
+        monkeypatch.setattr(get_settings(), "CHANGE_FEED_SETTLE_MS", 0)
+        with freeze_time(date(2024, 5, 1)):
+            for mutation in (
+                'modifyBook(bookId: 1, data: {title: "Dracula", addAuthors: [2]})'
+                " { id }",
+                'updateBooks(f: {title: "The Hobbit"}, data: {category: "Classic"})'
+                " { affected }",
+                "removeBook(bookId: 2)",
+            ):
+                result = await test_schema.execute(
+                    f"mutation {{ {mutation} }}",
+                    context_value={"request": request_obj},
+                )
+                assert not result.errors
+        result = await test_schema.execute(
+            graphql_changes_since_query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert result.data["changesSince"]["changes"] == [
+            {
+                "entity": "Book",
+                "entityId": 1,
+                "operation": "update",
+                "fields": ["authors", "last_updated_by", "title"],
+                "version": 2,
+            },
+            {
+                "entity": "Book",
+                "entityId": 3,
+                "operation": "update",
+                "fields": ["category", "last_updated_by"],
+                "version": 2,
+            },
+            {
+                "entity": "Book",
+                "entityId": 2,
+                "operation": "delete",
+                "fields": [],
+                "version": 2,
+            },
+        ]
+
+    async def test_changes_since_does_not_return_unsettled_changes(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        graphql_changes_since_query,
+        mock_decode_jwt_admin,
+    ):
+        await test_schema.execute(
+            "mutation { removeBook(bookId: 2) }", context_value={"request": request_obj}
+        )
+        result = await test_schema.execute(
+            graphql_changes_since_query, context_value={"request": request_obj}
+        )
+        assert result.data["changesSince"] == {"changes": [], "cursor": 0}
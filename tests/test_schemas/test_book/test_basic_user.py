@@ -1,12 +1,17 @@
 import pytest
+from starlette.requests import Request
 from strawberry import Schema
 
+from extensions import JWTAuthentication
+from permissions import IsAuthenticated
 from schema.basic import Query
 
 
 @pytest.fixture(scope="function")
 def test_schema(override_sqlalchemy_session):
-    return Schema(query=Query, extensions=[override_sqlalchemy_session])
+    return Schema(
+        query=Query, extensions=[JWTAuthentication, override_sqlalchemy_session]
+    )
 
 
 class TestBookList:
@@ -103,6 +108,93 @@ class TestBookList:
         for author in result.data["bookList"]:
             assert "dra" in author["title"].lower()
 
+    @pytest.mark.parametrize(
+        "lookup, expected_titles",
+        [
+            ("{publicationYear: {eq: 1897}}", ["Dracula"]),
+            (
+                "{publicationYear: {range: {from_: 1900, to_: 1940}}}",
+                ["Voyage au bout de la nuit", "The Hobbit"],
+            ),
+            ('{title: {prefix: "The"}}', ["The Hobbit"]),
+            ('{title: {in_: ["Dracula", "The Hobbit"]}}', ["Dracula", "The Hobbit"]),
+            ('{language: {eq: "French"}}', ["Voyage au bout de la nuit"]),
+            ('{authorLastName: {eq: "Stoker"}}', ["Dracula"]),
+        ],
+    )
+    async def test_book_list_query_as_basic_user_with_typed_lookup(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_basic,
+        lookup,
+        expected_titles,
+    ):
+        query = "query { bookList(f: {lookup: %s}) { title } }" % lookup
+        result = await test_schema.execute(
+            query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert [b["title"] for b in result.data["bookList"]] == expected_titles
+
+    @pytest.mark.parametrize(
+        "order_by, expected_titles",
+        [
+            (
+                "[{field: PUBLICATION_YEAR, direction: DESC}]",
+                ["The Hobbit", "Voyage au bout de la nuit", "Dracula"],
+            ),
+            (
+                "[{field: TITLE}]",
+                ["Dracula", "The Hobbit", "Voyage au bout de la nuit"],
+            ),
+            (
+                "[{field: CREATED_ON, direction: DESC}, {field: TITLE}]",
+                ["The Hobbit", "Voyage au bout de la nuit", "Dracula"],
+            ),
+        ],
+    )
+    async def test_book_list_query_as_basic_user_with_order_by(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_basic,
+        order_by,
+        expected_titles,
+    ):
+        query = "query { bookList(orderBy: %s) { title } }" % order_by
+        result = await test_schema.execute(
+            query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert [b["title"] for b in result.data["bookList"]] == expected_titles
+
+    async def test_book_list_query_as_basic_user_with_filter_and_order_by(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_basic,
+    ):
+        query = """query {
+            bookList(
+                f: {lookup: {publicationYear: {range: {from_: 1900, to_: 1940}}}}
+                orderBy: [{field: TITLE, direction: ASC}]
+            ) {
+                title
+            }
+        }"""
+        result = await test_schema.execute(
+            query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert [b["title"] for b in result.data["bookList"]] == [
+            "The Hobbit",
+            "Voyage au bout de la nuit",
+        ]
+
 
 class TestBookDetails:
     @pytest.fixture(scope="function")
@@ -196,3 +288,34 @@ class TestBookDetails:
             book_details_query_wrong_id, context_value={"request": request_obj}
         )
         assert result.errors
+
+
+class TestAuthentication:
+    async def test_token_is_decoded_once_per_operation(
+        self,
+        populate_db,
+        request_obj,
+        test_schema,
+        mock_decode_jwt_basic,
+    ):
+        query = """query {
+            bookList { id }
+            bookDetails(bookId: 1) { id }
+        }"""
+        result = await test_schema.execute(
+            query, context_value={"request": request_obj}
+        )
+        assert not result.errors
+        assert mock_decode_jwt_basic.call_count == 1
+
+    async def test_query_without_token_is_rejected(
+        self,
+        populate_db,
+        test_schema,
+    ):
+        request = Request({"type": "http", "headers": []})
+        result = await test_schema.execute(
+            "query { bookList { id } }", context_value={"request": request}
+        )
+        assert result.errors
+        assert result.errors[0].message == IsAuthenticated.message
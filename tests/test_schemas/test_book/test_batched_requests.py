@@ -0,0 +1,93 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from strawberry import Schema
+from strawberry.fastapi import GraphQLRouter
+from strawberry.http import GraphQLRequestData
+from strawberry.schema.config import StrawberryConfig
+
+from extensions import JWTAuthentication, SQLAlchemySession
+from router import BatchGraphQLRouter
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def session_factory(mocker, db_session):
+    factory = mocker.Mock(return_value=db_session)
+    mocker.patch("database.db_conf.SessionLocal", factory)
+    return factory
+
+
+@pytest.fixture(scope="function")
+def client(session_factory):
+    schema = Schema(
+        query=Query,
+        extensions=[JWTAuthentication, SQLAlchemySession],
+        config=StrawberryConfig(batching_config={"max_operations": 3}),
+    )
+    app = FastAPI()
+    app.include_router(BatchGraphQLRouter(schema), prefix="/graphql")
+    return TestClient(app, headers={"authentication": "Bearer fake_secret"})
+
+
+def test_batched_queries_share_one_session(
+    populate_db, client, session_factory, mock_decode_jwt_basic
+):
+    response = client.post(
+        "/graphql",
+        json=[
+            {"query": "query { bookList { id } }"},
+            {"query": "query { authorList { id } }"},
+            {"query": "query { bookDetails(bookId: 1) { title } }"},
+        ],
+    )
+    assert response.status_code == 200
+    assert [list(r["data"]) for r in response.json()] == [
+        ["bookList"],
+        ["authorList"],
+        ["bookDetails"],
+    ]
+    assert session_factory.call_count == 1
+    assert mock_decode_jwt_basic.call_count == 3
+
+
+def test_batch_larger_than_max_operations_is_rejected(client, mock_decode_jwt_basic):
+    response = client.post(
+        "/graphql", json=[{"query": "query { bookList { id } }"}] * 4
+    )
+    assert response.status_code == 400
+
+
+async def test_batched_mutations_run_one_at_a_time(mocker, session_factory):
+    running = []
+    mutations_running = []
+
+    async def execute_operation(self, request, request_adapter, data, *args):
+        running.append(data.query)
+        mutations_running.append(sum(q.startswith("mutation") for q in running))
+        await asyncio.sleep(0.01)
+        running.remove(data.query)
+        return data.query
+
+    mocker.patch.object(GraphQLRouter, "execute_operation", execute_operation)
+    router = BatchGraphQLRouter(Schema(query=Query))
+    queries = [
+        "mutation { first }",
+        "query { a }",
+        "mutation { second }",
+        "query { b }",
+        "{ c }",
+    ]
+    results = await router.execute_operation(
+        None,
+        None,
+        [GraphQLRequestData(query, None, None, None) for query in queries],
+        {},
+        None,
+        None,
+    )
+    assert results == queries
+    # a single mutation runs at a time, the queries run alongside it
+    assert mutations_running == [1, 1, 1, 1, 1]
@@ -0,0 +1,93 @@
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from strawberry import Schema
+
+from extensions import HTTPCaching, JWTAuthentication, SQLAlchemySession
+from http_caching import etag_matches
+from http_compression import CompressionMiddleware
+from router import BatchGraphQLRouter
+from schema.admin import Mutation
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def client(mocker, db_session):
+    mocker.patch("database.db_conf.SessionLocal", mocker.Mock(return_value=db_session))
+    schema = Schema(
+        query=Query,
+        mutation=Mutation,
+        extensions=[JWTAuthentication, HTTPCaching, SQLAlchemySession],
+    )
+    app = FastAPI()
+    app.include_router(
+        BatchGraphQLRouter(schema, allow_queries_via_get=True), prefix="/graphql"
+    )
+    return TestClient(app, headers={"authentication": "Bearer fake_secret"})
+
+
+@pytest.mark.parametrize(
+    "header, expected",
+    [
+        ('"abc"', True),
+        ('W/"abc"', True),
+        ('"abc-gzip"', True),
+        ('"other", "abc-br"', True),
+        ("*", True),
+        ('"other"', False),
+        (None, False),
+    ],
+)
+def test_etag_matches(header, expected):
+    assert etag_matches(header, '"abc"') is expected
+
+
+def test_query_response_has_etag_and_is_revalidated(
+    populate_db, client, mock_decode_jwt_basic
+):
+    params = {"query": "{ bookList { id title } }"}
+    response = client.get("/graphql", params=params)
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    etag = response.headers["etag"]
+
+    response = client.get("/graphql", params=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert not response.content
+
+    response = client.post("/graphql", json=params, headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_compressed_response_is_revalidated_with_its_coding_specific_etag(
+    populate_db, client, mock_decode_jwt_basic
+):
+    client.app.add_middleware(CompressionMiddleware, minimum_size=1)
+    params = {"query": "{ bookList { id title } }"}
+    headers = {"Accept-Encoding": "gzip"}
+    response = client.get("/graphql", params=params, headers=headers)
+    etag = response.headers["etag"]
+    assert etag.endswith('-gzip"')
+
+    response = client.get(
+        "/graphql", params=params, headers={**headers, "If-None-Match": etag}
+    )
+    assert response.status_code == 304
+    assert response.headers["etag"] == etag
+    assert response.headers["vary"] == "Accept-Encoding"
+
+
+def test_mutation_response_is_not_cacheable(client, mock_decode_jwt_admin):
+    response = client.post(
+        "/graphql", json={"query": "mutation { removeBook(bookId: 999) }"}
+    )
+    assert response.headers["cache-control"] == "no-store"
+    assert "etag" not in response.headers
+
+
+def test_mutation_over_get_is_rejected(client, mock_decode_jwt_admin):
+    response = client.get(
+        "/graphql", params={"query": "mutation { removeBook(bookId: 999) }"}
+    )
+    assert response.status_code == 400
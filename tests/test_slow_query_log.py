@@ -0,0 +1,73 @@
+import logging
+
+import pytest
+from sqlalchemy.exc import OperationalError
+from strawberry import Schema
+
+from database.slow_query_log import SlowQueryLog, get_explain_prefix
+from extensions import JWTAuthentication, OperationContext
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[JWTAuthentication, override_sqlalchemy_session, OperationContext],
+    )
+
+
+@pytest.fixture(scope="function")
+def slow_query_log(engine):
+    log = SlowQueryLog(engine, threshold_ms=0, explain_sample_rate=1.0)
+    yield log
+    log.remove()
+
+
+async def test_slow_query_is_logged_with_operation_and_plan(
+    populate_db,
+    request_obj,
+    test_schema,
+    slow_query_log,
+    mock_decode_jwt_basic,
+    caplog,
+):
+    with caplog.at_level(logging.WARNING, logger="database.slow_query_log"):
+        result = await test_schema.execute(
+            'query BookList { bookList(f: {title: "dra"}) { id } }',
+            context_value={"request": request_obj},
+        )
+        slow_query_log.remove()
+    assert not result.errors
+    messages = [r.getMessage() for r in caplog.records]
+    slow_queries = [m for m in messages if m.startswith("Slow query: ")]
+    assert any(
+        "'operation': 'BookList'" in m and "'resolver': 'Query.bookList'" in m
+        for m in slow_queries
+    )
+    assert all("dra" not in m for m in slow_queries)
+    assert any(m.startswith("Slow query plan") for m in messages)
+
+
+@pytest.mark.parametrize(
+    "statement, expected",
+    [
+        ("SELECT * FROM books", "EXPLAIN (ANALYZE, BUFFERS)"),
+        ("SELECT * FROM books WHERE id = 1 FOR UPDATE", "EXPLAIN"),
+        ("SELECT * FROM books\nFOR NO KEY UPDATE NOWAIT", "EXPLAIN"),
+        ("SELECT * FROM books FOR SHARE SKIP LOCKED", "EXPLAIN"),
+    ],
+)
+def test_statements_locking_rows_are_not_analyzed(statement, expected):
+    assert get_explain_prefix("postgresql", statement) == expected
+
+
+def test_sqlite_statements_are_explained_with_query_plan():
+    assert get_explain_prefix("sqlite", "SELECT 1 FOR UPDATE") == "EXPLAIN QUERY PLAN"
+
+
+def test_start_time_of_failed_statement_is_discarded(engine, slow_query_log):
+    with engine.connect() as conn:
+        with pytest.raises(OperationalError):
+            conn.exec_driver_sql("SELECT * FROM missing_table")
+        assert conn.info["query_start_time"] == []
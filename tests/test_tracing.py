@@ -0,0 +1,84 @@
+import pytest
+from strawberry import Schema
+
+from extensions import JWTAuthentication, Tracing
+from schema.basic import Query
+from tracing import SpanExporter, Tracer, instrument_engine, parse_traceparent
+
+TRACE_ID = "4bf92f3577b34da6a3ce929d0e0e4736"
+
+
+class InMemorySpanExporter(SpanExporter):
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans += spans
+
+
+@pytest.fixture(scope="function")
+def exporter():
+    return InMemorySpanExporter()
+
+
+@pytest.fixture(scope="function")
+def tracer(mocker, engine, exporter):
+    tracer = Tracer(exporter, sample_rate=1.0)
+    mocker.patch("extensions.get_tracer", return_value=tracer)
+    mocker.patch("database.query_builders.get_tracer", return_value=tracer)
+    instrument_engine(engine, tracer)
+    return tracer
+
+
+@pytest.fixture(scope="function")
+def test_schema(override_sqlalchemy_session):
+    return Schema(
+        query=Query,
+        extensions=[Tracing, JWTAuthentication, override_sqlalchemy_session],
+    )
+
+
+async def execute_in_trace(tracer, test_schema, request_obj, flags):
+    parent = parse_traceparent(f"00-{TRACE_ID}-00f067aa0ba902b7-{flags}")
+    with tracer.start_span("POST /graphql", parent=parent, kind="SERVER"):
+        return await test_schema.execute(
+            "query { bookList { id } }", context_value={"request": request_obj}
+        )
+
+
+async def test_spans_are_nested_under_the_incoming_trace(
+    populate_db, request_obj, test_schema, tracer, exporter, mock_decode_jwt_basic
+):
+    result = await execute_in_trace(tracer, test_schema, request_obj, "01")
+    assert not result.errors
+    spans = {span["name"]: span for span in exporter.spans}
+    assert {
+        "graphql.operation",
+        "graphql.parse",
+        "graphql.validate",
+        "graphql.execute",
+        "graphql.resolve Query.bookList",
+        "SQLQuery.build",
+        "db.statement",
+    } <= spans.keys()
+    assert {span["traceId"] for span in exporter.spans} == {TRACE_ID}
+    assert spans["POST /graphql"]["parentSpanId"] == "00f067aa0ba902b7"
+    resolver_span_id = spans["graphql.resolve Query.bookList"]["spanId"]
+    assert spans["db.statement"]["parentSpanId"] == resolver_span_id
+    assert spans["SQLQuery.build"]["parentSpanId"] == resolver_span_id
+
+
+async def test_unsampled_incoming_trace_is_not_recorded(
+    populate_db, request_obj, test_schema, tracer, exporter, mock_decode_jwt_basic
+):
+    result = await execute_in_trace(tracer, test_schema, request_obj, "00")
+    assert not result.errors
+    assert not exporter.spans
+
+
+@pytest.mark.parametrize(
+    "header",
+    [None, "", "garbage", f"00-{'0' * 32}-00f067aa0ba902b7-01"],
+)
+def test_invalid_traceparent_is_ignored(header):
+    assert parse_traceparent(header) is None
@@ -0,0 +1,91 @@
+import pytest
+from sqlalchemy.exc import OperationalError
+from strawberry import Schema
+
+from conf import get_settings
+from database.transactions import TransactionOptions, get_transaction_options
+from extensions import JWTAuthentication, SQLAlchemySession
+from schema.basic import Query
+
+
+@pytest.fixture(scope="function")
+def connection(mocker):
+    connection = mocker.Mock()
+    connection.dialect.name = "postgresql"
+    return connection
+
+
+def executed(connection):
+    return [call.args[0] for call in connection.exec_driver_sql.call_args_list]
+
+
+def test_query_transactions_are_read_only_with_timeouts(connection):
+    TransactionOptions(
+        read_only=True, statement_timeout_ms=2000, lock_timeout_ms=500
+    ).apply(connection)
+    assert executed(connection) == [
+        "SET TRANSACTION READ ONLY",
+        "SET LOCAL statement_timeout = 2000",
+        "SET LOCAL lock_timeout = 500",
+    ]
+
+
+def test_deferrable_transactions_are_serializable(connection):
+    TransactionOptions(read_only=True, deferrable=True).apply(connection)
+    assert executed(connection) == [
+        "SET TRANSACTION ISOLATION LEVEL SERIALIZABLE READ ONLY DEFERRABLE"
+    ]
+
+
+def test_options_are_not_applied_on_other_databases(connection):
+    connection.dialect.name = "sqlite"
+    TransactionOptions(read_only=True, statement_timeout_ms=2000).apply(connection)
+    assert executed(connection) == []
+
+
+def test_merged_options_are_the_strictest():
+    merged = TransactionOptions(
+        read_only=True, statement_timeout_ms=2000, lock_timeout_ms=0
+    ).merge(
+        TransactionOptions(
+            read_only=True, statement_timeout_ms=500, lock_timeout_ms=800
+        )
+    )
+    assert merged == TransactionOptions(
+        read_only=True, statement_timeout_ms=500, lock_timeout_ms=800
+    )
+
+
+def test_timeouts_are_applied_to_the_transaction_in_progress(connection):
+    TransactionOptions(read_only=True, statement_timeout_ms=500).apply_timeouts(
+        connection
+    )
+    assert executed(connection) == ["SET LOCAL statement_timeout = 500"]
+
+
+def test_operation_timeouts_override_the_role_ones(monkeypatch):
+    monkeypatch.setenv("DB_OPERATION_STATEMENT_TIMEOUTS_MS", '{"Report": 60000}')
+    get_settings.cache_clear()
+    try:
+        report = get_transaction_options("query", False, "Report")
+        other = get_transaction_options("mutation", True, "Other")
+    finally:
+        get_settings.cache_clear()
+    assert (report.read_only, report.statement_timeout_ms) == (True, 60000)
+    assert (other.read_only, other.statement_timeout_ms) == (False, 10000)
+
+
+async def test_statement_timeout_is_reported_as_graphql_error(
+    mocker, request_obj, mock_decode_jwt_basic
+):
+    canceled = mocker.Mock(pgcode="57014")
+    mocker.patch(
+        "schema.basic.BookSQLCrud.get_many_by_values",
+        side_effect=OperationalError("SELECT", {}, canceled),
+    )
+    mocker.patch("database.db_conf.SessionLocal")
+    schema = Schema(query=Query, extensions=[JWTAuthentication, SQLAlchemySession])
+    result = await schema.execute(
+        "query { bookList { id } }", context_value={"request": request_obj}
+    )
+    assert result.errors[0].extensions == {"code": "STATEMENT_TIMEOUT"}